@@ -1,5 +1,7 @@
 import xmlrpc.client
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_dataset_export as dx
 from collections import defaultdict
 
 try:
@@ -46,25 +48,25 @@ try:
     print(f"Total BOM components: {len(all_comp_ids)}\n")
 
     # Get stock
-    quants = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.quant', 'search_read',
-        [[['product_id', 'in', all_comp_ids], ['location_id.usage', '=', 'internal']]],
-        {'fields': ['product_id', 'quantity', 'reserved_quantity']}
-    )
+    quants = oc.search_read_records(models, uid, 'stock.quant',
+        [['product_id', 'in', all_comp_ids], ['location_id.usage', '=', 'internal']],
+        oc.Quant)
+    dx.export('quants', quants)
     from collections import defaultdict
     _raw = defaultdict(lambda: [0.0, 0.0])
     for q in quants:
-        _raw[q['product_id'][0]][0] += q['quantity']
-        _raw[q['product_id'][0]][1] += q['reserved_quantity']
+        _raw[q.product_id][0] += q.quantity
+        _raw[q.product_id][1] += q.reserved_quantity
     stock_by_comp = {pid: max(0, v[0]-v[1]) for pid, v in _raw.items()}
 
     # Get open incoming
-    moves = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.move', 'search_read',
-        [[['product_id', 'in', all_comp_ids],
-          ['state', 'in', ['waiting','confirmed','assigned','partially_available']],
-          ['picking_type_id.code', '=', 'incoming']]],
-        {'fields': ['product_id', 'product_qty', 'quantity_done', 'picking_id']}
-    )
-    pick_ids = list({m['picking_id'][0] for m in moves if m.get('picking_id')})
+    moves = oc.search_read_records(models, uid, 'stock.move',
+        [['product_id', 'in', all_comp_ids],
+         ['state', 'in', ['waiting','confirmed','assigned','partially_available']],
+         ['picking_type_id.code', '=', 'incoming']],
+        oc.IncomingMove)
+    dx.export('moves', moves)
+    pick_ids = list({m.picking_id for m in moves if m.picking_id})
     pick_states = {}
     if pick_ids:
         picks = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.picking', 'read',
@@ -73,12 +75,12 @@ try:
         pick_states = {p['id']: p['state'] for p in picks}
     incoming_by_comp = defaultdict(float)
     for m in moves:
-        pick_state = pick_states.get(m['picking_id'][0] if m.get('picking_id') else None, '')
-        ordered    = m.get('product_qty') or 0
-        done       = m.get('quantity_done') or 0
+        pick_state = pick_states.get(m.picking_id, '')
+        ordered    = m.product_qty
+        done       = m.quantity_done
         remaining  = ordered if pick_state != 'done' else max(0, ordered - done)
         if remaining > 0:
-            incoming_by_comp[m['product_id'][0]] += remaining
+            incoming_by_comp[m.product_id] += remaining
 
     # Find zero stock AND zero incoming parts
     zero_parts = [cid for cid in all_comp_ids
@@ -0,0 +1,178 @@
+import os
+import json
+import numpy as np
+import odoo_config as cfg
+import odoo_client as oc
+import odoo_bom_index as bix
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+
+# ================================================================
+# AVAILABLE-TO-PROMISE — projected inventory timeline per finished product
+# ================================================================
+# Timeline = on-hand today, + open MO output on date_planned_start, + open PO
+# receipts on date_planned, − committed SO lines on their commitment / expected
+# date (anything past due lands on today). ATP on a day is the lowest projected
+# balance from that day on, so it never decreases along the timeline and
+# "earliest day with ATP ≥ qty" is a binary search.
+# CTP adds what the free components on hand can build, available after the
+# product's manufacturing lead time.
+SNAPSHOT_FILE = 'atp_snapshot.json'
+MAX_AGE_HOURS = 1
+OPEN_MO_STATES = ['draft', 'confirmed', 'progress', 'to_close']
+
+
+def build(models, uid):
+    """Pull stock / MOs / POs / SOs for every finished product and flatten them to daily timelines."""
+    print("Building ATP snapshot...")
+    today = datetime.now(timezone.utc).date()
+    index = bix.load(models, uid)
+    fin   = {pid for pid, p in index['products'].items() if p[2] == 'normal'}
+    fin  |= {p['id'] for p in oc.execute(models, uid, 'product.product', 'search_read',
+             [[['default_code', 'in', cfg.ALL_PLAN_PRODUCTS]]], {'fields': ['id']})}
+    fin   = sorted(fin)
+
+    children = defaultdict(list)                       # parent → [(component, qty per unit)]
+    for comp, ups in index['used_in'].items():
+        for parent, qty in ups:
+            children[parent].append((comp, qty))
+    comp_ids = {c for pid in fin for c, _ in children.get(pid, ())}
+
+    quants = oc.search_read_all(models, uid, 'stock.quant',
+        [['product_id', 'in', list(set(fin) | comp_ids)], ['location_id.usage', '=', 'internal']],
+        ['product_id', 'quantity', 'reserved_quantity'])
+    on_hand, free = defaultdict(float), defaultdict(float)
+    for q in quants:
+        on_hand[q['product_id'][0]] += q['quantity']
+        free[q['product_id'][0]]    += q['quantity'] - q['reserved_quantity']
+
+    events = defaultdict(lambda: defaultdict(float))   # pid → {day: qty}
+    mos = oc.search_read_all(models, uid, 'mrp.production',
+        [['product_id', 'in', fin], ['state', 'in', OPEN_MO_STATES]],
+        ['product_id', 'product_qty', 'qty_produced', 'date_planned_start'])
+    for m in mos:
+        events[m['product_id'][0]][_day(m['date_planned_start'], today)] += m['product_qty'] - (m['qty_produced'] or 0)
+
+    po_lines = oc.search_read_all(models, uid, 'purchase.order.line',
+        [['product_id', 'in', fin], ['order_id.state', '=', 'purchase']],
+        ['product_id', 'product_qty', 'qty_received', 'date_planned'])
+    for l in po_lines:
+        if l['product_qty'] - l['qty_received'] > 0:
+            events[l['product_id'][0]][_day(l['date_planned'], today)] += l['product_qty'] - l['qty_received']
+
+    so_lines = oc.search_read_all(models, uid, 'sale.order.line',
+        [['product_id', 'in', fin], ['state', '=', 'sale']],
+        ['order_id', 'product_id', 'product_uom_qty', 'qty_delivered'])
+    so_lines = [l for l in so_lines if l['product_uom_qty'] - l['qty_delivered'] > 0]
+    orders   = oc.read_batched(models, uid, 'sale.order', {l['order_id'][0] for l in so_lines},
+                               ['commitment_date', 'expected_date', 'date_order'])
+    for l in so_lines:
+        o   = orders.get(l['order_id'][0], {})
+        day = _day(o.get('commitment_date') or o.get('expected_date') or o.get('date_order'), today)
+        events[l['product_id'][0]][day] -= l['product_uom_qty'] - l['qty_delivered']
+
+    info = oc.read_batched(models, uid, 'product.product', fin, ['default_code', 'name', 'produce_delay'])
+    products = {}
+    for pid in fin:
+        p     = info.get(pid, {})
+        ev    = events.get(pid, {})
+        days  = sorted(set(ev) | {today.isoformat()})
+        comps = children.get(pid, [])
+        products[pid] = {
+            'ref':       p.get('default_code') or '',
+            'name':      p.get('name') or '',
+            'lead':      int(p.get('produce_delay') or 0),
+            'buildable': int(min(max(free.get(c, 0.0), 0.0) // q for c, q in comps if q > 0)) if comps else 0,
+            'days':      days,
+            'delta':     [round(on_hand.get(pid, 0.0) if d == today.isoformat() else 0.0, 4) + ev.get(d, 0.0)
+                          for d in days],
+        }
+    print(f"  → {len(products)} products, {len(mos)} MOs, {len(po_lines)} PO lines, {len(so_lines)} SO lines")
+    return {'built': datetime.now(timezone.utc).isoformat(), 'today': today.isoformat(), 'products': products}
+
+
+def _day(value, today):
+    day = str(value)[:10] if value else today.isoformat()
+    return max(day, today.isoformat())
+
+
+def _indexed(data):
+    """Numpy timelines + ref lookup. proj = running balance, atp = suffix minimum of proj."""
+    products = {}
+    for pid, p in data['products'].items():
+        proj = np.cumsum(np.asarray(p['delta'], dtype=np.float64))
+        products[int(pid)] = dict(p, days=np.array(p['days'], dtype='datetime64[D]'), proj=proj,
+                                  atp=np.minimum.accumulate(proj[::-1])[::-1])
+    return {
+        'built':    data['built'],
+        'today':    np.datetime64(data['today'], 'D'),
+        'products': products,
+        'by_ref':   {p['ref']: pid for pid, p in products.items() if p['ref']},
+    }
+
+
+def load(models, uid, path=SNAPSHOT_FILE, max_age_hours=MAX_AGE_HOURS, rebuild=False):
+    """Saved snapshot if it is fresh enough, else rebuild from Odoo and save."""
+    if not rebuild and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if datetime.now(timezone.utc) - datetime.fromisoformat(data['built']) < timedelta(hours=max_age_hours):
+            return _indexed(data)
+    data = build(models, uid)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return _indexed(data)
+
+
+def _earliest(p, qty):
+    """First day ATP reaches `qty`, or None."""
+    i = np.searchsorted(p['atp'], qty, side='left')
+    return p['days'][i] if i < len(p['days']) else None
+
+
+def query(snap, product, qty, by=None):
+    """
+    ATP / CTP answer for `qty` units of `product` (ref or id) by day `by` (default today):
+      atp_qty   — promisable from the projected timeline on `by`
+      atp_date  — earliest day `qty` is promisable without building more
+      ctp_date  — earliest day when free components on hand are also turned into units
+    """
+    pid = snap['by_ref'].get(str(product), product)
+    p   = snap['products'].get(pid)
+    if p is None:
+        return None
+    by  = max(np.datetime64(by, 'D') if by else snap['today'], snap['today'])
+    j   = np.searchsorted(p['days'], by, side='right') - 1
+    atp_date = _earliest(p, qty)
+
+    ready    = snap['today'] + np.timedelta64(p['lead'], 'D')
+    ctp_date = atp_date
+    if p['buildable'] > 0:
+        rest = _earliest(p, qty - p['buildable'])
+        if rest is not None:
+            built = max(rest, ready)
+            ctp_date = built if atp_date is None else min(atp_date, built)
+
+    day = lambda d: str(d) if d is not None else None
+    return {
+        'product':   p['ref'],
+        'name':      p['name'],
+        'qty':       qty,
+        'by':        str(by),
+        'atp_qty':   round(float(p['atp'][j]), 2),
+        'atp_date':  day(atp_date),
+        'atp_ok':    bool(atp_date is not None and atp_date <= by),
+        'ctp_date':  day(ctp_date),
+        'ctp_ok':    bool(ctp_date is not None and ctp_date <= by),
+        'buildable': p['buildable'],
+        'built':     snap['built'][:16],
+    }
+
+
+def timeline(snap, product):
+    """[(day, projected on hand, ATP)] for `product` (ref or id)."""
+    pid = snap['by_ref'].get(str(product), product)
+    p   = snap['products'].get(pid)
+    if p is None:
+        return None
+    return [(str(d), round(float(b), 2), round(float(a), 2)) for d, b, a in zip(p['days'], p['proj'], p['atp'])]
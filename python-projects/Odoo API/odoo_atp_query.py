@@ -0,0 +1,106 @@
+import json
+import time
+import argparse
+import threading
+import odoo_client as oc
+import odoo_atp as atp
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# ================================================================
+# Available-to-promise queries
+#   python odoo_atp_query.py 102036 50                 can we ship 50 today?
+#   python odoo_atp_query.py 102036 50 --by 2026-11-30
+#   python odoo_atp_query.py 102036 --timeline
+#   python odoo_atp_query.py --serve --port 8765       GET /atp?product=102036&qty=50&by=2026-11-30
+#                                                      GET /timeline?product=102036
+# The snapshot (atp_snapshot.json) is rebuilt when older than an hour; the
+# server rebuilds it every --refresh minutes in the background.
+# ================================================================
+parser = argparse.ArgumentParser(description="Available-to-promise / capable-to-promise")
+parser.add_argument('product', nargs='?', help="Product internal reference")
+parser.add_argument('qty',     nargs='?', type=float, default=1, help="Units wanted")
+parser.add_argument('--by',       help="Ship date YYYY-MM-DD (default today)")
+parser.add_argument('--timeline', action='store_true', help="Print the projected timeline")
+parser.add_argument('--rebuild',  action='store_true', help="Rebuild the snapshot from Odoo first")
+parser.add_argument('--serve',    action='store_true', help="Run the local HTTP endpoint")
+parser.add_argument('--port',     type=int, default=8765)
+parser.add_argument('--refresh',  type=int, default=15, help="Server snapshot refresh (minutes)")
+args = parser.parse_args()
+
+models, uid = oc.connect()
+snap = atp.load(models, uid, rebuild=args.rebuild)
+lock = threading.Lock()
+
+
+def refresher():
+    global snap
+    while True:
+        time.sleep(args.refresh * 60)
+        try:
+            fresh = atp.load(models, uid, rebuild=True)
+            with lock:
+                snap = fresh
+        except Exception as e:
+            print(f"Snapshot refresh failed: {e}")
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        q   = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with lock:
+            s = snap
+        try:
+            if url.path == '/atp':
+                body = atp.query(s, q['product'], float(q.get('qty', 1)), q.get('by'))
+            elif url.path == '/timeline':
+                body = atp.timeline(s, q['product'])
+            elif url.path == '/health':
+                body = {'built': s['built'], 'products': len(s['products'])}
+            else:
+                return self.reply(404, {'error': 'use /atp, /timeline or /health'})
+        except (KeyError, ValueError) as e:
+            return self.reply(400, {'error': f"bad query: {e}"})
+        if body is None:
+            return self.reply(404, {'error': f"unknown product {q['product']}"})
+        self.reply(200, body)
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *a):
+        pass
+
+
+if args.serve:
+    threading.Thread(target=refresher, daemon=True).start()
+    print(f"ATP service on http://127.0.0.1:{args.port}  (snapshot {snap['built'][:16]}, "
+          f"refresh every {args.refresh} min)")
+    ThreadingHTTPServer(('127.0.0.1', args.port), Handler).serve_forever()
+
+product = args.product or input("Product reference: ").strip()
+if args.timeline:
+    rows = atp.timeline(snap, product)
+    if rows is None:
+        raise SystemExit(f"Unknown product {product}")
+    print(f"{'Day':<12}{'Projected':>12}{'ATP':>12}")
+    for d, b, a in rows:
+        print(f"{d:<12}{b:>12.1f}{a:>12.1f}")
+else:
+    t0 = time.perf_counter()
+    r  = atp.query(snap, product, args.qty, args.by)
+    us = (time.perf_counter() - t0) * 1e6
+    if r is None:
+        raise SystemExit(f"Unknown product {product}")
+    print(f"\n{r['product']} — {r['name']}   (snapshot {r['built']} UTC, answered in {us:.0f} µs)")
+    print(f"  ATP on {r['by']}:  {r['atp_qty']:.0f} units")
+    print(f"  {r['qty']:.0f} units from stock / MOs / POs:  "
+          f"{'✅ yes' if r['atp_ok'] else '❌ no'} — earliest {r['atp_date'] or 'not in the plan'}")
+    print(f"  Building from free components ({r['buildable']} units):  "
+          f"{'✅ yes' if r['ctp_ok'] else '❌ no'} — earliest {r['ctp_date'] or 'not possible'}")
@@ -0,0 +1,61 @@
+import os
+import time
+import argparse
+import odoo_client as oc
+import odoo_run_delta as dl
+import odoo_dataset_export as dx
+import odoo_fetch_planner as fp
+import odoo_report_datasets as rd
+
+# ================================================================
+# Morning batch — the planning reports in one process on shared data
+#   python odoo_batch.py                          the five planning reports
+#   python odoo_batch.py po_plan procurement      just these (helpdesk / repair too)
+#   python odoo_batch.py --export                 also dump each report's raw datasets (odoo_dataset_export)
+#   python odoo_batch.py --no-snapshot            show "What Changed" but keep this run out of the history
+# Each report declares the datasets it reads (odoo_report_datasets). The
+# planner merges identical queries, fetches each once (in parallel), then
+# the report scripts run unchanged with their Odoo connection pointed at the
+# shared results — their own calls are answered from those datasets and only
+# the rest goes to Odoo.
+# ================================================================
+REPORTS = rd.REPORTS
+
+parser = argparse.ArgumentParser(description="Run the planning reports on one shared fetch")
+parser.add_argument('reports', nargs='*', help=f"{', '.join(REPORTS)} (default: {', '.join(rd.BATCH)})")
+parser.add_argument('--workers', type=int, default=fp.WORKERS, help="Parallel fetches")
+parser.add_argument('--export',  action='store_true',
+                    help=f"Write the raw fetched datasets under {dx.EXPORT_DIR}/ ({dx.FORMAT})")
+parser.add_argument('--no-snapshot', action='store_true',
+                    help=f"Compare with the last run but don't save this one under {dl.DELTA_DIR}/")
+args = parser.parse_args()
+names = args.reports or rd.BATCH
+if set(names) - set(REPORTS):
+    parser.error(f"unknown report(s): {', '.join(sorted(set(names) - set(REPORTS)))}")
+
+here = os.path.dirname(os.path.abspath(__file__))
+os.chdir(here)
+dx.ENABLED = args.export
+dl.SAVE    = not args.no_snapshot
+
+print("Connecting to Odoo...")
+models, uid = oc.connect()
+print("Connected!\n")
+
+t0      = time.perf_counter()
+planner = fp.FetchPlanner(models, uid, workers=args.workers)
+print(f"Planning shared fetch for: {', '.join(names)}")
+planner.prefetch([s for n in names for s in REPORTS[n][1]])
+
+timing = []
+for n in names:
+    print(f"\n{'=' * 64}\n▶ {REPORTS[n][0]}\n{'=' * 64}")
+    t1 = time.perf_counter()
+    fp.run_report(planner, os.path.join(here, REPORTS[n][0]))
+    timing.append((n, time.perf_counter() - t1))
+
+print(f"\n{'=' * 64}\nBATCH SUMMARY\n{'=' * 64}")
+for n, secs in timing:
+    print(f"  {n:<18} {secs:>7.1f}s")
+print(f"  {'total':<18} {time.perf_counter() - t0:>7.1f}s")
+print(f"  {planner.summary()}")
@@ -1,6 +1,11 @@
 import xmlrpc.client
 import openpyxl
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_dataset_export as dx
+import odoo_po_writeback as wbk
+import odoo_mps as mps
+import odoo_plan_sweep as sweep
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from collections import defaultdict
@@ -18,6 +23,11 @@ BLANKET_MONTHS   = 10  # Mar → Dec 2026
 SAFETY_MONTHS    = 1
 DELIVERY_FREQ    = 1   # monthly deliveries
 
+# Write-back — one draft purchase.order per supplier, one line per monthly delivery. Re-running
+# for the same BLANKET_START rewrites those drafts (matched on Source Document) instead of duplicating.
+CREATE_DRAFT_POS   = False
+WRITE_BACK_DRY_RUN = True   # True = only report what would be created / updated
+
 # Months in blanket
 def add_months(d, months):
     month = d.month - 1 + months
@@ -158,6 +168,16 @@ try:
     all_comp_ids = list(comp_monthly.keys())
     print(f"  {len(all_comp_ids)} unique components\n")
 
+    # --- Finished-goods demand per blanket month (static plan or MPS) → components × months ---
+    if cfg.DEMAND_SOURCE == 'mps':
+        demand_refs, demand, demand_src = mps.demand_matrix(models, uid, MONTHLY_PLAN, BLANKET_START, BLANKET_MONTHS)
+    else:
+        demand_refs = list(MONTHLY_PLAN)
+        demand      = mps.static_matrix(MONTHLY_PLAN, demand_refs, BLANKET_MONTHS)
+    comp_by_month = dict(zip(all_comp_ids, sweep.bom_matrix(all_comp_ids, demand_refs, bom_by_product) @ demand))
+    for comp_id, req in comp_by_month.items():
+        comp_monthly[comp_id]['monthly'] = float(req.mean())
+
     # --- Component product details ---
     comp_prods = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.product', 'search_read',
         [[['id', 'in', all_comp_ids]]],
@@ -171,7 +191,7 @@ try:
     suppliers = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.supplierinfo', 'search_read',
         [[['product_tmpl_id', 'in', comp_tmpl_ids]]],
         {'fields': ['product_tmpl_id', 'name', 'delay', 'min_qty', 'price',
-                    'product_code', 'sequence']}
+                    'product_code', 'sequence', 'currency_id']}
     )
     sup_by_tmpl = {}
     for s in sorted(suppliers, key=lambda x: x.get('sequence', 99)):
@@ -181,33 +201,32 @@ try:
 
     # --- Current stock ---
     print("Fetching stock...")
-    quants = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.quant', 'search_read',
-        [[['product_id', 'in', all_comp_ids],
-          ['location_id.usage', '=', 'internal']]],
-        {'fields': ['product_id', 'quantity', 'reserved_quantity']}
-    )
+    quants = oc.search_read_records(models, uid, 'stock.quant',
+        [['product_id', 'in', all_comp_ids],
+         ['location_id.usage', '=', 'internal']],
+        oc.Quant)
+    dx.export('quants', quants)
     # Sum all quant rows per product first, then take max(0)
     # (individual rows can be negative due to Odoo's double-entry; net is what matters)
     _stock_raw = defaultdict(lambda: [0.0, 0.0])  # [total_qty, total_reserved]
     for q in quants:
-        pid_ = q['product_id'][0]
-        _stock_raw[pid_][0] += q['quantity']
-        _stock_raw[pid_][1] += q['reserved_quantity']
+        _stock_raw[q.product_id][0] += q.quantity
+        _stock_raw[q.product_id][1] += q.reserved_quantity
     stock_by_comp = defaultdict(float)
     for pid_, (qty, res) in _stock_raw.items():
         stock_by_comp[pid_] = max(0, qty - res)
 
     # --- Open incoming moves ---
     print("Fetching open incoming...")
-    moves = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.move', 'search_read',
-        [[['product_id', 'in', all_comp_ids],
-          ['state', 'in', ['waiting', 'confirmed', 'assigned', 'partially_available']],
-          ['picking_type_id.code', '=', 'incoming']]],
-        {'fields': ['product_id', 'product_qty', 'quantity_done', 'date', 'picking_id']}
-    )
+    moves = oc.search_read_records(models, uid, 'stock.move',
+        [['product_id', 'in', all_comp_ids],
+         ['state', 'in', ['waiting', 'confirmed', 'assigned', 'partially_available']],
+         ['picking_type_id.code', '=', 'incoming']],
+        oc.IncomingMove)
+    dx.export('moves', moves)
     # Get picking states to determine true remaining qty
     # If picking is not done, use full product_qty (ignore quantity_done which can be unreliable)
-    pick_ids = list({m['picking_id'][0] for m in moves if m.get('picking_id')})
+    pick_ids = list({m.picking_id for m in moves if m.picking_id})
     pick_states = {}
     if pick_ids:
         picks = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.picking', 'read',
@@ -217,10 +236,9 @@ try:
 
     incoming_by_comp = defaultdict(float)
     for m in moves:
-        pick_id    = m['picking_id'][0] if m.get('picking_id') else None
-        pick_state = pick_states.get(pick_id, '')
-        ordered    = m.get('product_qty') or 0
-        done       = m.get('quantity_done') or 0
+        pick_state = pick_states.get(m.picking_id, '')
+        ordered    = m.product_qty
+        done       = m.quantity_done
         # If picking is not done yet, remaining = ordered - actually_received
         # quantity_done on a non-done picking is just a draft entry, not confirmed
         if pick_state != 'done':
@@ -228,7 +246,7 @@ try:
         else:
             remaining = ordered - done  # partial receipt
         if remaining > 0:
-            incoming_by_comp[m['product_id'][0]] += remaining
+            incoming_by_comp[m.product_id] += remaining
 
     # ================================================================
     # CALCULATE BLANKET PO PLAN
@@ -254,7 +272,8 @@ try:
         available  = stock + incoming
 
         # Gross requirement for blanket period
-        gross_6m   = monthly * BLANKET_MONTHS
+        month_req  = comp_by_month[comp_id]
+        gross_6m   = float(month_req.sum())
         safety     = monthly * SAFETY_MONTHS
 
         # Total target = 6 months production + 1 month safety
@@ -280,6 +299,9 @@ try:
 
         # Monthly delivery qty (spread evenly)
         delivery_qty   = round(net_to_order / BLANKET_MONTHS, 1) if net_to_order > 0 else 0
+        # Each month's share follows that month's demand (flat when demand is flat or zero)
+        share          = month_req / gross_6m if gross_6m > 0 else [1 / BLANKET_MONTHS] * BLANKET_MONTHS
+        deliveries     = [round(net_to_order * f, 1) for f in share]
 
         # Flags
         no_supplier  = not sup
@@ -303,10 +325,12 @@ try:
             'name':           comp_monthly[comp_id]['name'],
             'uom':            uom,
             'supplier':       sup_name,
+            'sup_id':         sup['name'][0] if sup.get('name') else None,
             'sup_code':       sup_code,
             'lead_days':      lead_days,
             'min_qty':        min_qty,
             'price':          price,
+            'price_curr':     sup['currency_id'][1] if sup.get('currency_id') else 'USD',
             'stock':          round(stock, 1),
             'incoming':       round(incoming, 1),
             'available':      round(available, 1),
@@ -317,6 +341,7 @@ try:
             'target':         round(target, 1),
             'net_to_order':   round(net_to_order, 1),
             'delivery_qty':   round(delivery_qty, 1),
+            'deliveries':     deliveries,
             'order_date':     order_date_str,
             'days_to_order':  days_to_order,
             'est_value':      round(est_value, 2),
@@ -348,6 +373,24 @@ try:
     total_value = sum(r['est_value'] for r in plan_rows if r['est_value'])
     print(f"  💰 Est. total:   ${total_value:,.0f}")
 
+    # ================================================================
+    # WRITE-BACK — draft POs per supplier, one line per delivery month
+    # ================================================================
+    po_actions = []
+    if CREATE_DRAFT_POS:
+        print(f"\nWriting draft POs{' (dry run)' if WRITE_BACK_DRY_RUN else ''}...")
+        po_actions = wbk.write_drafts(models, uid, [{
+            'supplier_id':  r['sup_id'],
+            'supplier':     r['supplier'],
+            'product_id':   r['comp_id'],
+            'qty':          qty,
+            'price':        r['price'],
+            'currency':     r['price_curr'],
+            'date_planned': m.strftime('%Y-%m-%d'),
+        } for r in plan_rows if r['net_to_order'] and not r['no_supplier']
+          for m, qty in zip(MONTHS, r['deliveries'])],
+            key=f"Blanket PO Plan {BLANKET_START.strftime('%Y-%m')}", dry_run=WRITE_BACK_DRY_RUN)
+
     # ================================================================
     # BUILD EXCEL
     # ================================================================
@@ -522,13 +565,12 @@ try:
     order_rows_only = [r for r in plan_rows if not r['no_order']]
     for r in order_rows_only:
         fill = row_fill(r)
-        # Split total order evenly across months
-        monthly_del = r['delivery_qty']
+        # Split total order across months in line with each month's demand
         notes = r['warning'] if r['no_supplier'] or r['zero_lead'] else ''
         vals = [
             r['ref'], r['name'][:36], r['supplier'][:20],
             r['lead_days'], r['order_date'], r['net_to_order']
-        ] + [monthly_del] * BLANKET_MONTHS + [notes]
+        ] + r['deliveries'] + [notes]
         ws3.append(vals)
         rn = ws3.max_row
         for col in range(1, SCOLS+1):
@@ -573,6 +615,8 @@ try:
         ws.row_dimensions[rn].height = 16
 
     sum_row(ws4, "Planning period", f"{MONTH_LABELS[0]} – {MONTH_LABELS[-1]} (10 months, end of year)", "DDEBF7", True)
+    sum_row(ws4, "Demand source", "Static monthly plan" if cfg.DEMAND_SOURCE != 'mps' else
+            f"MPS forecast by month ({sum(s == 'MPS' for s in demand_src.values())}/{len(demand_refs)} products)", "DDEBF7")
     sum_row(ws4, "Total components in scope", len(plan_rows), "DDEBF7")
     sum_row(ws4, "🔴 Components — ORDER NOW", len(urgent_rows), COLORS['red'])
     sum_row(ws4, "🟠 Components — Order within 30 days", len(soon_rows), COLORS['amber'])
@@ -582,6 +626,10 @@ try:
     sum_row(ws4, "⚠ Components — Lead time = 0 (check)", sum(1 for r in plan_rows if r['zero_lead'] and not r['no_supplier']), COLORS['yellow'])
     ws4.append([])
     sum_row(ws4, "💰 Estimated total blanket PO value", f"${total_value:,.0f}", "DDEBF7", True)
+    if po_actions:
+        verb = "to create / update (dry run)" if WRITE_BACK_DRY_RUN else "created / updated"
+        sum_row(ws4, f"📝 Draft POs {verb}", ' / '.join(
+            f"{sum(1 for a in po_actions if a['action'] == act)} {act}" for act in ('create', 'update', 'skip')), "DDEBF7")
     ws4.append([])
 
     # By supplier summary
@@ -0,0 +1,124 @@
+import os
+import json
+import odoo_client as oc
+import odoo_dataset_export as dx
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+
+# ================================================================
+# REVERSE BOM INDEX — component → every product it is built into
+# ================================================================
+# Built once from all active mrp.bom / mrp.bom.line records and saved to
+# INDEX_FILE; later runs load the file and answer multi-level where-used
+# queries from memory (memoized, so repeat lookups are dict hits).
+INDEX_FILE    = 'bom_where_used.json'
+MAX_AGE_HOURS = 24   # rebuild from Odoo when the saved index is older than this
+
+
+def build(models, uid):
+    """Pull every BOM and BOM line in bulk and flatten them to (component, parent, qty/unit) edges."""
+    print("Building reverse BOM index...")
+    boms  = oc.search_read_all(models, uid, 'mrp.bom', [],
+                               ['product_tmpl_id', 'product_id', 'product_qty', 'type'])
+    lines = oc.search_read_all(models, uid, 'mrp.bom.line', [],
+                               ['bom_id', 'product_id', 'product_qty'])
+    dx.export('bom_lines', lines)
+    bom_by_id = {b['id']: b for b in boms}
+
+    # BOMs are usually defined on the template — expand to every variant
+    tmpl_ids = list({oc.m2o_id(b['product_tmpl_id']) for b in boms if not b.get('product_id')})
+    variants = defaultdict(list)
+    for v in oc.search_read_all(models, uid, 'product.product',
+                                [['product_tmpl_id', 'in', tmpl_ids]], ['product_tmpl_id']):
+        variants[oc.m2o_id(v['product_tmpl_id'])].append(v['id'])
+
+    edges     = []
+    bom_type  = {}
+    for l in lines:
+        bom = bom_by_id.get(oc.m2o_id(l['bom_id']))
+        if not bom or not l.get('product_id'):
+            continue
+        parents = [oc.m2o_id(bom['product_id'])] if bom.get('product_id') \
+                  else variants.get(oc.m2o_id(bom['product_tmpl_id']), [])
+        qty_per = (l['product_qty'] or 0) / (bom['product_qty'] or 1)
+        for p in parents:
+            edges.append([oc.m2o_id(l['product_id']), p, qty_per])
+            # A kit (phantom) BOM wins over a normal one for the same product
+            if bom_type.get(p) != 'phantom':
+                bom_type[p] = bom['type']
+
+    prod_ids = {e[0] for e in edges} | {e[1] for e in edges}
+    prods    = oc.read_batched(models, uid, 'product.product', prod_ids,
+                               ['default_code', 'name'], batch_size=1000)
+    products = {pid: [p.get('default_code') or '', p.get('name') or '', bom_type.get(pid, '')]
+                for pid, p in prods.items()}
+    print(f"  → {len(boms)} BOMs, {len(edges)} component links, {len(products)} products")
+    return {'built': datetime.now(timezone.utc).isoformat(), 'products': products, 'edges': edges}
+
+
+def _indexed(data):
+    used_in = defaultdict(list)
+    for comp, parent, qty in data['edges']:
+        used_in[comp].append((parent, qty))
+    return {
+        'built':    data['built'],
+        'products': {int(k): v for k, v in data['products'].items()},
+        'used_in':  used_in,
+        'memo':     {},
+    }
+
+
+def load(models, uid, path=INDEX_FILE, max_age_hours=MAX_AGE_HOURS, rebuild=False):
+    """Saved index if it is fresh enough, else rebuild from Odoo and save."""
+    if not rebuild and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(data['built'])
+        if age < timedelta(hours=max_age_hours):
+            print(f"Reverse BOM index loaded from {path} (built {data['built'][:16]})")
+            return _indexed(data)
+    data = build(models, uid)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return _indexed(data)
+
+
+def where_used(index, comp_id):
+    """
+    Every product `comp_id` ends up in, any number of levels up:
+      {parent_id: {'level': shortest BOM depth, 'qty': comp qty per parent unit (all paths)}}
+    """
+    return _where_used(index, comp_id, set())[0]
+
+
+def _where_used(index, comp_id, stack):
+    """(ancestors, truncated) — truncated when a BOM loop through `stack` was cut somewhere below."""
+    memo = index['memo']
+    if comp_id in memo:
+        return memo[comp_id], False
+    stack.add(comp_id)
+    out, truncated = {}, False
+
+    def add(pid, level, qty):
+        if pid not in out:
+            out[pid] = {'level': level, 'qty': 0.0}
+        out[pid]['level'] = min(out[pid]['level'], level)
+        out[pid]['qty']  += qty
+
+    for parent, qty in index['used_in'].get(comp_id, ()):
+        if parent in stack:
+            truncated = True   # BOM loop — Odoo refuses these, but never recurse forever
+            continue
+        add(parent, 1, qty)
+        anc_of_parent, cut = _where_used(index, parent, stack)
+        truncated = truncated or cut
+        for anc, info in anc_of_parent.items():
+            add(anc, info['level'] + 1, qty * info['qty'])
+    stack.discard(comp_id)
+    if not truncated:   # a result cut short by a loop depends on the caller's path — don't reuse it
+        memo[comp_id] = out
+    return out, truncated
+
+
+def is_kit(index, pid):
+    return index['products'].get(pid, ['', '', ''])[2] == 'phantom'
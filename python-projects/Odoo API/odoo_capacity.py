@@ -0,0 +1,143 @@
+import numpy as np
+import odoo_client as oc
+from datetime import datetime, timedelta
+
+# ================================================================
+# WORK-CENTER CAPACITY — load vs available hours, work centers × weeks
+# ================================================================
+# Routing: minutes per unit of each product on each work center (operation
+# cycle time / work-center capacity / efficiency, per unit of the BOM) and
+# setup minutes per MO (work-center start + stop time). Available hours come
+# from the work center's working calendar minus global leaves.
+# Once build() has run, a changed plan is just a new products × weeks qty
+# matrix and one matrix product (load()), no Odoo calls.
+OPEN_MO_STATES = ['draft', 'confirmed', 'progress', 'to_close']
+
+
+def build(models, uid, product_ids, start, weeks):
+    """
+    Routing matrices for `product_ids` and weekly capacity from Monday `start` (date) for `weeks` weeks.
+    Returns {'products', 'row', 'wc_ids', 'wc_names', 'R', 'S', 'capacity', 'start', 'weeks'}.
+    """
+    products = sorted(set(product_ids))
+    row      = {p: i for i, p in enumerate(products)}
+    tmpl_of  = {pid: oc.m2o_id(p['product_tmpl_id'])
+                for pid, p in oc.read_batched(models, uid, 'product.product', products, ['product_tmpl_id']).items()}
+
+    # One normal BOM per product: variant-specific first, then lowest sequence
+    boms = oc.search_read_all(models, uid, 'mrp.bom',
+        [['product_tmpl_id', 'in', list(set(tmpl_of.values()))], ['type', '=', 'normal']],
+        ['product_tmpl_id', 'product_id', 'product_qty', 'sequence'])
+    bom_of = {}
+    for pid, tmpl in tmpl_of.items():
+        cands = [b for b in boms if oc.m2o_id(b['product_tmpl_id']) == tmpl
+                 and oc.m2o_id(b['product_id']) in (0, pid)]
+        if cands:
+            bom_of[pid] = min(cands, key=lambda b: (b.get('product_id') is False, b['sequence'] or 0, b['id']))
+
+    ops = oc.search_read_all(models, uid, 'mrp.routing.workcenter',
+        [['bom_id', 'in', [b['id'] for b in bom_of.values()]]],
+        ['bom_id', 'workcenter_id', 'time_cycle', 'time_cycle_manual'])
+    wc_ids = sorted({oc.m2o_id(o['workcenter_id']) for o in ops if o.get('workcenter_id')})
+    wcs    = oc.read_batched(models, uid, 'mrp.workcenter', wc_ids,
+                             ['name', 'default_capacity', 'time_efficiency', 'time_start', 'time_stop',
+                              'resource_calendar_id'])
+    col    = {w: j for j, w in enumerate(wc_ids)}
+
+    R = np.zeros((len(products), len(wc_ids)))   # minutes per unit
+    S = np.zeros((len(products), len(wc_ids)))   # setup minutes per MO
+    ops_by_bom = {}
+    for o in ops:
+        ops_by_bom.setdefault(oc.m2o_id(o['bom_id']), []).append(o)
+    for pid, bom in bom_of.items():
+        for o in ops_by_bom.get(bom['id'], ()):
+            wid = oc.m2o_id(o['workcenter_id'])
+            if wid not in col:
+                continue
+            wc    = wcs.get(wid, {})
+            cycle = o.get('time_cycle') or o.get('time_cycle_manual') or 0.0
+            per   = (wc.get('default_capacity') or 1.0) * (wc.get('time_efficiency') or 100.0) / 100.0
+            R[row[pid], col[wid]] += cycle / per / (bom['product_qty'] or 1.0)
+            S[row[pid], col[wid]]  = (wc.get('time_start') or 0.0) + (wc.get('time_stop') or 0.0)
+
+    cal_of = [oc.m2o_id(wcs.get(w, {}).get('resource_calendar_id')) for w in wc_ids]
+    return {
+        'products': products,
+        'row':      row,
+        'wc_ids':   wc_ids,
+        'wc_names': [wcs.get(w, {}).get('name', str(w)) for w in wc_ids],
+        'R':        R,
+        'S':        S,
+        'capacity': weekly_hours(models, uid, cal_of, start, weeks),
+        'start':    start,
+        'weeks':    weeks,
+    }
+
+
+def weekly_hours(models, uid, cal_of, start, weeks):
+    """Available hours, one row per entry of `cal_of` (calendar id, 0 = none) × weeks, leaves removed."""
+    if not cal_of:
+        return np.zeros((0, weeks))
+    cal_ids = sorted({c for c in cal_of if c})
+    att = oc.search_read_all(models, uid, 'resource.calendar.attendance',
+        [['calendar_id', 'in', cal_ids]], ['calendar_id', 'dayofweek', 'hour_from', 'hour_to', 'week_type']
+    ) if cal_ids else []
+    # Working intervals per calendar and weekday: (hour_from, hour_to, weight)
+    # — two-week calendars list both weeks, so each counts half
+    shifts = {c: [[] for _ in range(7)] for c in cal_ids}
+    for a in att:
+        shifts[a['calendar_id'][0]][int(a['dayofweek'])].append(
+            (a['hour_from'], a['hour_to'], 0.5 if a.get('week_type') else 1.0))
+    day_hours = {c: np.array([sum((t - f) * w for f, t, w in day) for day in shifts[c]]) for c in cal_ids}
+
+    hours = np.array([np.tile(day_hours.get(c, np.zeros(7)), weeks) for c in cal_of]).reshape(len(cal_of), -1)
+
+    end    = start + timedelta(days=weeks * 7)
+    leaves = oc.search_read_all(models, uid, 'resource.calendar.leaves',
+        [['resource_id', '=', False], ['date_from', '<', end.strftime('%Y-%m-%d')],
+         ['date_to', '>=', start.strftime('%Y-%m-%d')]],
+        ['calendar_id', 'date_from', 'date_to'])
+    cal_arr = np.array([c or 0 for c in cal_of])
+    t_start = datetime.combine(start, datetime.min.time())
+    for l in leaves:
+        # Leave as hours from `start`; date_to is exclusive (a full-day leave ends at 00:00 the next day)
+        h0 = (datetime.fromisoformat(str(l['date_from'])[:19]) - t_start).total_seconds() / 3600
+        h1 = (datetime.fromisoformat(str(l['date_to'])[:19]) - t_start).total_seconds() / 3600
+        cals = [oc.m2o_id(l['calendar_id'])] if l.get('calendar_id') else cal_ids
+        for d in range(max(0, int(h0 // 24)), min(weeks * 7, int(-(-h1 // 24)))):
+            lf, lt = max(h0 - 24 * d, 0.0), min(h1 - 24 * d, 24.0)
+            if lt <= lf:
+                continue
+            for c in cals:
+                # Only the working hours the leave overlaps are lost
+                lost = sum(max(0.0, min(t, lt) - max(f, lf)) * w for f, t, w in shifts.get(c, [[]] * 7)[d % 7])
+                if lost:
+                    hours[cal_arr == c, d] -= lost
+    hours = np.maximum(hours, 0.0)   # overlapping leaves never take a day below zero
+    return hours.reshape(len(cal_of), weeks, 7).sum(axis=2)
+
+
+def week_index(model, dates):
+    """datetime64 array → week column (before start → 0, after the horizon → -1)."""
+    d = (np.asarray(dates, dtype='datetime64[D]') - np.datetime64(model['start'], 'D')).astype(np.int64) // 7
+    return np.where(d >= model['weeks'], -1, np.maximum(d, 0))
+
+
+def qty_matrix(model, product_ids, weeks, qty):
+    """Products × weeks qty matrix and MO-count matrix from parallel arrays (week -1 = dropped)."""
+    Q = np.zeros((len(model['products']), model['weeks']))
+    N = np.zeros_like(Q)
+    r = np.array([model['row'].get(p, -1) for p in product_ids], dtype=np.int64)
+    w = np.asarray(weeks, dtype=np.int64)
+    k = (r >= 0) & (w >= 0)
+    np.add.at(Q, (r[k], w[k]), np.asarray(qty, dtype=np.float64)[k])
+    np.add.at(N, (r[k], w[k]), 1.0)
+    return Q, N
+
+
+def load(model, Q, N=None):
+    """Work centers × weeks load in hours: (minutes/unit)ᵀ · qty + (setup/MO)ᵀ · MO count."""
+    minutes = model['R'].T @ Q
+    if N is not None:
+        minutes += model['S'].T @ N
+    return minutes / 60.0
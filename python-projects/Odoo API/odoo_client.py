@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import atexit
+import hashlib
+import threading
+import xmlrpc.client
+import numpy as np
+import odoo_config as cfg
+from collections import OrderedDict
+
+# ================================================================
+# SHARED ODOO ACCESS — connection + batched / paginated fetching
+# ================================================================
+PAGE_SIZE  = 2000   # rows per search_read page
+READ_BATCH = 200    # ids per read() call
+
+# Query-result cache for reference data (cached_execute) — seconds per model
+CACHE_FILE    = 'odoo_query_cache.json'
+CACHE_MAX     = 500          # entries kept on disk / in memory, least recently used dropped first
+CACHE_DEFAULT = 3600
+CACHE_TTL     = {
+    'helpdesk.team':  7 * 86400,
+    'helpdesk.stage': 7 * 86400,
+    'helpdesk.tag':   86400,
+    'repair.tags':    86400,
+    'res.partner':    86400,
+    'product.product': 6 * 3600,
+}
+
+
+def connect():
+    """Authenticate and return (models, uid) — same as the inline block in every report."""
+    common = xmlrpc.client.ServerProxy(f"{cfg.URL}/xmlrpc/2/common")
+    uid    = common.authenticate(cfg.DB, cfg.USERNAME, cfg.API_KEY, {})
+    models = xmlrpc.client.ServerProxy(f"{cfg.URL}/xmlrpc/2/object")
+    return models, uid
+
+
+def execute(models, uid, model, method, args, kwargs=None):
+    return models.execute_kw(cfg.DB, uid, cfg.API_KEY, model, method, args, kwargs or {})
+
+
+def search_read_all(models, uid, model, domain, fields, page_size=PAGE_SIZE):
+    """search_read the whole result set in id-ordered pages (keyset, not offset)."""
+    rows    = []
+    last_id = 0
+    while True:
+        page = execute(models, uid, model, 'search_read',
+            [list(domain) + [['id', '>', last_id]]],
+            {'fields': fields, 'order': 'id asc', 'limit': page_size}
+        )
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last_id = page[-1]['id']
+
+
+def read_batched(models, uid, model, ids, fields, batch_size=READ_BATCH):
+    """read() a list of ids in fixed-size chunks. Returns {id: record}."""
+    ids = list(ids)
+    out = {}
+    for i in range(0, len(ids), batch_size):
+        for rec in execute(models, uid, model, 'read', [ids[i:i+batch_size]], {'fields': fields}):
+            out[rec['id']] = rec
+    return out
+
+
+# ================================================================
+# QUERY CACHE — reference lookups reused across runs
+# ================================================================
+def _norm_value(v):
+    if isinstance(v, (list, tuple, set)):
+        return tuple(sorted(set(v), key=repr))
+    return v
+
+
+def norm_domain(domain):
+    """Canonical (hashable) domain: value lists sorted/deduped, leaves sorted when it is a plain AND."""
+    out = [t if isinstance(t, str) else (t[0], t[1], _norm_value(t[2])) for t in domain]
+    if not any(isinstance(t, str) for t in out):
+        out.sort(key=repr)
+    return tuple(out)
+
+
+def query_hash(model, method, args, kwargs=None):
+    """
+    Canonical hash of one execute_kw call over (model, method, domain, fields, kwargs) —
+    calls that only differ in the order of ids / values / fields / domain leaves hash the same.
+    """
+    kwargs = dict(kwargs or {})
+    fields = sorted(set(kwargs.pop('fields', None) or []))
+    args   = list(args)
+    if method in ('search_read', 'search', 'search_count'):
+        head = norm_domain(args[0] if args else kwargs.pop('domain', []))
+    elif method == 'read':
+        head = _norm_value(args[0]) if args else []
+    else:
+        head = None
+    rest = args[1:] if head is not None else args
+    raw  = json.dumps([model, method, head, fields, rest, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+_cache       = None             # key → [expires (epoch s), model, result], oldest use first
+_cache_lock  = threading.Lock()
+_cache_dirty = False
+cache_stats  = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+
+def _cache_load():
+    global _cache
+    if _cache is None:
+        _cache = OrderedDict()
+        if os.path.exists(CACHE_FILE):
+            try:
+                with open(CACHE_FILE, encoding='utf-8') as f:
+                    _cache.update(json.load(f))
+            except (OSError, ValueError):
+                pass            # unreadable cache file — start empty, it is rewritten on exit
+    return _cache
+
+
+def cache_save():
+    """Write live entries to CACHE_FILE (also done automatically at exit)."""
+    global _cache_dirty
+    with _cache_lock:
+        if _cache is None or not _cache_dirty:
+            return
+        now = time.time()
+        tmp = CACHE_FILE + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in _cache.items() if v[0] > now}, f)
+        os.replace(tmp, CACHE_FILE)
+        _cache_dirty = False
+
+
+atexit.register(cache_save)
+
+
+def cached_execute(models, uid, model, method, args, kwargs=None, ttl=None):
+    """
+    execute() through the query cache: a result younger than the model's TTL (CACHE_TTL,
+    or `ttl` seconds) is returned without calling Odoo, including from earlier runs.
+    """
+    global _cache_dirty
+    ttl = CACHE_TTL.get(model, CACHE_DEFAULT) if ttl is None else ttl
+    key = query_hash(model, method, args, kwargs)
+    now = time.time()
+    with _cache_lock:
+        cache = _cache_load()
+        hit   = cache.get(key)
+        if hit and hit[0] > now:
+            cache.move_to_end(key)
+            cache_stats['hits'] += 1
+            return json.loads(json.dumps(hit[2]))          # callers may annotate what they get
+        cache_stats['expired' if hit else 'misses'] += 1
+    result = execute(models, uid, model, method, args, kwargs)
+    with _cache_lock:
+        cache[key] = [now + ttl, model, result]
+        cache.move_to_end(key)
+        while len(cache) > CACHE_MAX:
+            cache.popitem(last=False)
+            cache_stats['evicted'] += 1
+        _cache_dirty = True
+    return json.loads(json.dumps(result))
+
+
+def cache_clear(model=None):
+    """Drop every cached result (or just those of `model`)."""
+    global _cache_dirty
+    with _cache_lock:
+        cache = _cache_load()
+        for k in [k for k, v in cache.items() if model is None or v[1] == model]:
+            del cache[k]
+        _cache_dirty = True
+
+
+def cache_summary():
+    s     = cache_stats
+    calls = s['hits'] + s['misses'] + s['expired']
+    rate  = s['hits'] / calls * 100 if calls else 0.0
+    return (f"Query cache: {s['hits']}/{calls} hits ({rate:.0f}%), {s['misses']} new, "
+            f"{s['expired']} expired, {s['evicted']} evicted, {len(_cache_load())} entries")
+
+
+# ================================================================
+# DECODING HELPERS
+# ================================================================
+def m2o_id(val):
+    """Many2one [id, name] → id (0 when empty/False)."""
+    return val[0] if val else 0
+
+
+def to_datetime64(values):
+    """Odoo 'YYYY-MM-DD HH:MM:SS' strings (or False) → datetime64[s] array, NaT for empty."""
+    return np.array([v[:19] if v else 'NaT' for v in values], dtype='datetime64[s]')
+
+
+# ================================================================
+# COMPACT RECORDS — __slots__ rows for loops that keep records around
+# ================================================================
+# A search_read dict costs several hundred bytes before any `_` annotation is
+# added. record_type() builds a __slots__ class for just the fields a loop
+# reads: many2one values become the id (plus the display name only when
+# asked for), numbers and strings are stored bare, annotation slots are
+# declared up front instead of added as extra keys.
+def _m2o(v):      return (v[0] if v else 0,)
+def _m2o_name(v): return (v[0], sys.intern(v[1])) if v else (0, '')   # one copy of each repeated name
+def _float(v):    return (float(v or 0.0),)
+def _int(v):      return (int(v or 0),)
+def _str(v):      return (v or '',)
+def _bool(v):     return (bool(v),)
+def _ids(v):      return (tuple(v or ()),)
+
+RECORD_KINDS = {'m2o': _m2o, 'm2o_name': _m2o_name, 'float': _float, 'int': _int,
+                'str': _str, 'bool': _bool, 'ids': _ids}
+
+
+class Record:
+    """Base of the record types built by record_type()."""
+    __slots__ = ()
+    _kinds    = {}
+
+    def get(self, field, default=None):
+        """Dict-style read in Odoo's shape (many2one as [id, name] / False) — for frame() and other generic readers."""
+        if self._kinds.get(field) in ('m2o', 'm2o_name'):
+            i = getattr(self, field)
+            return [i, getattr(self, field + '_name', '')] if i else False
+        return getattr(self, field, default)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{s}={getattr(self, s)!r}' for s in self.__slots__)})"
+
+
+def record_type(name, schema, extra=()):
+    """
+    schema — {field: kind}, kind one of RECORD_KINDS:
+      'm2o' → id (0 = empty); 'm2o_name' → id and <field>_name; 'float' / 'int' / 'str' / 'bool';
+      'ids' → tuple of ids (one2many / many2many)
+    `extra` — annotation slots, None until set. 'id' is always included.
+    The class's .fields is the search_read field list, .decode(row) builds one record.
+    """
+    slots = ['id']
+    for f, kind in schema.items():
+        if kind not in RECORD_KINDS:
+            raise ValueError(f"unknown record kind '{kind}' for {f}")
+        slots += [f, f + '_name'] if kind == 'm2o_name' else [f]
+    slots += list(extra)
+    convs = [(f, RECORD_KINDS[kind]) for f, kind in schema.items()]
+    pad   = (None,) * len(extra)
+    names = tuple(slots)
+    cls   = type(name, (Record,), {'__slots__': names, '_kinds': dict(schema), 'fields': ['id'] + list(schema)})
+    new   = object.__new__
+
+    def decode(row):
+        rec  = new(cls)
+        vals = [row['id']]
+        for f, conv in convs:
+            vals += conv(row.get(f))
+        for s, v in zip(names, vals + list(pad)):
+            setattr(rec, s, v)
+        return rec
+    cls.decode = staticmethod(decode)
+    return cls
+
+
+def records(rows, cls):
+    """search_read / read results → list of `cls` records."""
+    return [cls.decode(r) for r in rows]
+
+
+def search_read_records(models, uid, model, domain, cls, page_size=PAGE_SIZE):
+    """search_read_all() decoding each page into `cls` records — the page dicts are dropped as it goes."""
+    out     = []
+    last_id = 0
+    while True:
+        page = execute(models, uid, model, 'search_read',
+            [list(domain) + [['id', '>', last_id]]],
+            {'fields': cls.fields, 'order': 'id asc', 'limit': page_size}
+        )
+        out.extend(cls.decode(r) for r in page)
+        if len(page) < page_size:
+            return out
+        last_id = page[-1]['id']
+
+
+# Record types shared by the planning and helpdesk scripts
+Quant        = record_type('Quant', {'product_id': 'm2o', 'quantity': 'float', 'reserved_quantity': 'float'})
+IncomingMove = record_type('IncomingMove', {'product_id': 'm2o', 'product_qty': 'float',
+                                            'quantity_done': 'float', 'picking_id': 'm2o'})
+TicketState  = record_type('TicketState', {'team_id': 'm2o', 'stage_id': 'm2o_name', 'user_id': 'm2o',
+                                           'create_date': 'str'})
@@ -97,6 +97,11 @@ MONTHLY_PRODUCTION_PLAN = {
     '102585': 125,   # [normal]  devices: 101336
                # tremoflo C-100 Airwave Oscillometry System & Accessories - ERT US Edition
 }
+# Where the PO / blanket / procurement plans take finished-goods demand from:
+#   'static' = the dict above, same every month
+#   'mps'    = per-month forecast of the Master Production Schedule (odoo_mps.py);
+#              products with no MPS rows keep their rate from the dict
+DEMAND_SOURCE = 'static'
 PLANNING_MONTHS = 3  # current month + next 2
 
 # ================================================================
@@ -0,0 +1,198 @@
+import os
+import re
+import sys
+import json
+import shutil
+import numpy as np
+import odoo_frames as fr
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:          # optional — without it the columns are written as .npy files
+    pa = pq = None
+
+# ================================================================
+# DATASET EXPORT — raw fetched rows to disk for analysis outside the reports
+# ================================================================
+# With ENABLED on, a report calls export(name, rows) on what it fetched and the
+# rows are written as typed columns (odoo_frames schema) under
+#   EXPORT_DIR/<dataset>/run=<UTC timestamp>/<script>.parquet      (pyarrow installed)
+#   EXPORT_DIR/<dataset>/run=<UTC timestamp>/<script>/<column>.npy (otherwise)
+# The column set of a dataset comes from SCHEMAS only, so every run has the same
+# schema whatever fields the script asked for. Which fields were really fetched
+# (and which many2one ones came with display names — oc records keep the id only)
+# is recorded in the 'odoo' Parquet metadata / _schema.json as 'fetched' and
+# 'named'; in Parquet the other columns are null, in .npy they are 0 / NaT / ''.
+# Many2one and text columns are dictionary encoded; .npy columns are memory-mapped
+# by load().
+ENABLED    = os.environ.get('ODOO_EXPORT') == '1'   # or odoo_batch.py --export for the batch
+EXPORT_DIR = 'datasets'
+FORMAT     = 'parquet' if pa else 'npy'
+RUN        = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')   # one partition per process
+
+SCHEMAS = {
+    'quants': ('stock.quant', {
+        'product_id': 'm2o', 'location_id': 'm2o', 'lot_id': 'm2o',
+        'quantity': 'float', 'reserved_quantity': 'float'}),
+    'moves': ('stock.move', {
+        'product_id': 'm2o', 'picking_id': 'm2o', 'purchase_line_id': 'm2o', 'state': 'cat',
+        'product_qty': 'float', 'quantity_done': 'float', 'date': 'datetime'}),
+    'po_lines': ('purchase.order.line', {
+        'order_id': 'm2o', 'product_id': 'm2o', 'product_qty': 'float', 'qty_received': 'float',
+        'qty_invoiced': 'float', 'price_unit': 'float', 'date_planned': 'datetime'}),
+    'tickets': ('helpdesk.ticket', {
+        'name': 'cat', 'stage_id': 'm2o', 'team_id': 'm2o', 'user_id': 'm2o', 'partner_id': 'm2o',
+        'ticket_type_id': 'm2o', 'product_id': 'm2o', 'lot_id': 'm2o', 'division_id': 'm2o',
+        'create_uid': 'm2o', 'priority': 'cat', 'x_studio_customer_type': 'cat', 'tag_ids_char': 'cat',
+        'tag_ids': 'm2m', 'x_studio_under_warranty': 'bool', 'create_date': 'datetime',
+        'date_last_stage_update': 'datetime'}),
+    'repairs': ('repair.order', {
+        'name': 'cat', 'state': 'cat', 'product_id': 'm2o', 'lot_id': 'm2o', 'partner_id': 'm2o',
+        'user_id': 'm2o', 'division_id': 'm2o', 'ticket_id': 'm2o', 'location_id': 'm2o',
+        'tag_ids': 'm2m', 'x_studio_reason_for_return': 'cat', 'x_studio_under_warranty_ts_case': 'bool',
+        'create_date': 'datetime', 'guarantee_limit': 'datetime'}),
+    'bom_lines': ('mrp.bom.line', {
+        'bom_id': 'm2o', 'product_id': 'm2o', 'product_qty': 'float', 'product_uom_id': 'm2o',
+        'child_bom_id': 'm2o'}),
+}
+
+
+def _script():
+    return os.path.splitext(os.path.basename(sys.argv[0] or 'interactive'))[0] or 'interactive'
+
+
+def _columns(F, schema):
+    """Frame → ordered {column: array}, the column set fixed by the schema."""
+    cols = {'id': F['id']}
+    for f, kind in schema.items():
+        if kind == 'm2o':
+            cols[f + '_id'] = F[f + '_id']
+        if kind == 'm2m':
+            cols[f + '_ptr'], cols[f + '_ids'] = F[f + '_ptr'], F[f + '_ids']
+        else:
+            cols[f] = F[f]
+    return cols
+
+
+def _fetched(rows, schema):
+    """
+    (fetched, named) — the schema fields present in `rows`, and the many2one ones among them
+    that carry display names. A record type only has its own fields, and its 'm2o' kind keeps
+    the id alone; search_read dicts have the same keys on every row.
+    """
+    if not rows:
+        return list(schema), [f for f, kind in schema.items() if kind == 'm2o']
+    first = rows[0]
+    if isinstance(first, dict):
+        fetched = [f for f in schema if f in first]
+        return fetched, [f for f in fetched if schema[f] == 'm2o']
+    kinds   = type(first)._kinds
+    fetched = [f for f in schema if f in kinds]
+    return fetched, [f for f in fetched if schema[f] == 'm2o' and kinds[f] == 'm2o_name']
+
+
+def _arrow_table(F, schema, fetched, named):
+    cols = {}
+    for c, arr in _columns(F, schema).items():
+        kind = schema.get(c)
+        if kind in ('m2o', 'cat'):
+            cols[c] = pa.DictionaryArray.from_arrays(arr, pa.array(F['cats'][c].tolist(), type=pa.string()))
+        elif c.endswith('_ptr') and schema.get(c[:-4]) == 'm2m':
+            f = c[:-4]
+            cols[f] = pa.ListArray.from_arrays(pa.array(arr.astype(np.int32)), pa.array(F[f + '_ids']))
+        elif c.endswith('_ids') and schema.get(c[:-4]) == 'm2m':
+            continue
+        else:
+            cols[c] = pa.array(arr)
+    # Not fetched → null, so it can't be read as a real 0 / '' / NaT
+    for c in list(cols):
+        f = c[:-3] if c.endswith('_id') and schema.get(c[:-3]) == 'm2o' else c
+        if c != 'id' and (f not in fetched or (c == f and schema[f] == 'm2o' and f not in named)):
+            cols[c] = pa.nulls(F['n'], type=cols[c].type)
+    return pa.table(cols)
+
+
+def export(name, rows, key=None):
+    """
+    Write `rows` (search_read dicts or oc records) as dataset `name` of this run, in the running
+    script's partition (`<script>.<key>` when one script exports several batches, e.g. one per
+    division). No-op unless ENABLED. Returns the path.
+    """
+    if not ENABLED:
+        return None
+    model, schema = SCHEMAS[name]
+    F    = fr.frame(rows, schema)
+    fetched, named = _fetched(rows, schema)
+    meta = {'dataset': name, 'model': model, 'schema': schema, 'rows': F['n'], 'run': RUN,
+            'fetched': fetched, 'named': named}
+    part = f"{_script()}.{re.sub(r'[^A-Za-z0-9_-]+', '_', key)}" if key else _script()
+    base = os.path.join(EXPORT_DIR, name, f"run={RUN}")
+    os.makedirs(base, exist_ok=True)
+    if FORMAT == 'parquet':
+        path = os.path.join(base, f"{part}.parquet")
+        table = _arrow_table(F, schema, fetched, named)
+        table = table.replace_schema_metadata({'odoo': json.dumps({**meta, 'part': part})})
+        pq.write_table(table, path + '.tmp')
+        os.replace(path + '.tmp', path)
+    else:
+        path = os.path.join(base, part)
+        tmp  = path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for c, arr in _columns(F, schema).items():
+            np.save(os.path.join(tmp, f"{c}.npy"), arr)
+        for f, cats in F['cats'].items():
+            np.save(os.path.join(tmp, f"{f}.cats.npy"), cats)
+        with open(os.path.join(tmp, '_schema.json'), 'w', encoding='utf-8') as fh:
+            json.dump({**meta, 'part': part}, fh, indent=1)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+    print(f"  → exported {F['n']} {model} rows to {path}")
+    return path
+
+
+# ================================================================
+# READING BACK
+# ================================================================
+def runs(name, root=EXPORT_DIR):
+    """Run timestamps exported for a dataset, oldest first."""
+    d = os.path.join(root, name)
+    return sorted(r[4:] for r in os.listdir(d) if r.startswith('run=')) if os.path.isdir(d) else []
+
+
+def parts(name, run=None, root=EXPORT_DIR):
+    """Partitions (exporting scripts) of a dataset in a run (default: the latest)."""
+    run = run or (runs(name, root) or [None])[-1]
+    d   = os.path.join(root, name, f"run={run}")
+    if not run or not os.path.isdir(d):
+        return []
+    return sorted(p[:-8] if p.endswith('.parquet') else p for p in os.listdir(d) if not p.endswith('.tmp'))
+
+
+def load(name, part, run=None, root=EXPORT_DIR):
+    """
+    One exported partition (default: the latest run). A .parquet partition comes back as a
+    memory-mapped pyarrow Table (export details in its schema metadata b'odoo'); an .npy one as
+    an odoo_frames frame of memory-mapped columns plus 'fetched' and 'named'.
+    """
+    run  = run or (runs(name, root) or [None])[-1]
+    base = os.path.join(root, name, f"run={run}", part)
+    if os.path.exists(base + '.parquet'):
+        if pq is None:
+            raise RuntimeError(f"{base}.parquet needs pyarrow")
+        return pq.read_table(base + '.parquet', memory_map=True)
+    if not os.path.isdir(base):
+        raise FileNotFoundError(f"no '{name}' export from {part} in run {run}")
+    with open(os.path.join(base, '_schema.json'), encoding='utf-8') as fh:
+        meta = json.load(fh)
+    m2o = [f for f, kind in meta['schema'].items() if kind == 'm2o']
+    F = {'cats': {}, 'n': meta['rows'], 'run': meta['run'], 'model': meta['model'],
+         'fetched': meta.get('fetched', list(meta['schema'])), 'named': meta.get('named', m2o)}
+    for fn in os.listdir(base):
+        if fn.endswith('.cats.npy'):
+            F['cats'][fn[:-9]] = np.load(os.path.join(base, fn))
+        elif fn.endswith('.npy'):
+            F[fn[:-4]] = np.load(os.path.join(base, fn), mmap_mode='r')
+    return F
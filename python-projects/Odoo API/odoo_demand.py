@@ -0,0 +1,67 @@
+import numpy as np
+from statistics import NormalDist
+import odoo_client as oc
+
+# ================================================================
+# DEMAND HISTORY — done consumption moves as columnar arrays
+# ================================================================
+# Consumption = stock leaving internal locations for production (MO raw
+# material moves) or customers (deliveries). One paginated stock.move pull.
+CONSUMING_USAGES = ['production', 'customer']
+
+
+def fetch_consumption(models, uid, product_ids, since):
+    """Done consumption moves of `product_ids` since `since` → {'product_id', 'qty', 'date'} arrays."""
+    moves = oc.search_read_all(models, uid, 'stock.move',
+        [['product_id', 'in', list(product_ids)], ['state', '=', 'done'],
+         ['location_id.usage', '=', 'internal'],
+         ['location_dest_id.usage', 'in', CONSUMING_USAGES],
+         ['date', '>=', since.strftime('%Y-%m-%d %H:%M:%S')]],
+        ['product_id', 'product_qty', 'date']
+    )
+    return {
+        'product_id': np.array([oc.m2o_id(m['product_id']) for m in moves], dtype=np.int32),
+        'qty':        np.array([m['product_qty'] or 0.0 for m in moves], dtype=np.float64),
+        'date':       oc.to_datetime64([m['date'] for m in moves]),
+    }
+
+
+def period_matrix(hist, product_ids, start, periods, unit='W'):
+    """
+    Products × periods demand matrix ('W' weeks, 'M' months, ...) starting at the
+    period containing `start`. Returns (ids sorted ascending, matrix) — row i is ids[i].
+    """
+    ids   = np.array(sorted(product_ids), dtype=np.int32)
+    mat   = np.zeros((len(ids), periods))
+    if not len(ids):
+        return ids, mat
+    row   = np.searchsorted(ids, hist['product_id'])
+    slot  = (hist['date'].astype(f'datetime64[{unit}]') - np.datetime64(start, unit)).astype(np.int64)
+    keep  = (row < len(ids)) & (slot >= 0) & (slot < periods)
+    keep[keep] &= ids[row[keep]] == hist['product_id'][keep]
+    np.add.at(mat, (row[keep], slot[keep]), hist['qty'][keep])
+    return ids, mat
+
+
+def rolling_stats(mat, window):
+    """
+    Trailing-window mean and (sample) variance along the period axis for every
+    product at once, from running sums — column j covers periods j .. j+window-1.
+    """
+    zero = np.zeros((mat.shape[0], 1))
+    c1   = np.cumsum(np.hstack([zero, mat]), axis=1)
+    c2   = np.cumsum(np.hstack([zero, mat * mat]), axis=1)
+    s1   = c1[:, window:] - c1[:, :-window]
+    s2   = c2[:, window:] - c2[:, :-window]
+    mean = s1 / window
+    var  = np.maximum(s2 - window * mean * mean, 0.0) / max(window - 1, 1)
+    return mean, var
+
+
+def safety_stock(service_level, d_mean, d_var, l_mean, l_var):
+    """
+    Safety stock for a cycle service level with uncertain demand and lead time:
+      z · sqrt(L · σd² + d² · σL²)     (d, σd² per day; L, σL² in days)
+    """
+    z = NormalDist().inv_cdf(service_level)
+    return z * np.sqrt(np.asarray(l_mean) * d_var + np.asarray(d_mean) ** 2 * l_var)
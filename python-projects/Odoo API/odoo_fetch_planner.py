@@ -0,0 +1,358 @@
+import sys
+import time
+import runpy
+import builtins
+import threading
+import contextlib
+import xmlrpc.client
+import odoo_config as cfg
+import odoo_client as oc
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+# ================================================================
+# SHARED FETCH PLANNER — declare datasets, fetch each distinct query once
+# ================================================================
+# Reports declare the datasets they need as dataset(model, domain, fields).
+# Identical queries (same model + normalized domain) are merged with their
+# field lists unioned, then fetched once, independent queries in parallel.
+# A dataset whose domain depends on another one's rows (e.g. the pickings of
+# the open incoming moves) names it in `needs` and passes a callable domain;
+# those run in a later level of the plan.
+# SharedModels then stands in for the xmlrpc object proxy: a report's own
+# search_read / read is answered from an identical earlier call, or filtered
+# out of a prefetched dataset whose domain it narrows, before going to Odoo.
+WORKERS   = 6
+CACHED    = {'search_read', 'read', 'search', 'search_count', 'fields_get', 'name_get'}
+LOCAL_OPS = {'=', '!=', 'in', 'not in', '<', '<=', '>', '>='}
+LOCAL_TYPES = {'char', 'text', 'html', 'selection', 'integer', 'float', 'monetary', 'boolean',
+               'date', 'datetime', 'many2one'}   # field types a leaf is matched on locally; x2many etc. go to Odoo
+REFRESH_OVERLAP = timedelta(minutes=5)   # refresh() re-reads this much before the last sync
+
+_ServerProxy = xmlrpc.client.ServerProxy   # the real one, even while a runner has patched it
+
+
+def dataset(model, domain, fields, name=None, needs=()):
+    """One declared query. `domain` may be a callable({name: rows}) when it `needs` other datasets."""
+    return {'model': model, 'domain': domain, 'fields': list(fields), 'name': name, 'needs': tuple(needs)}
+
+
+def m2o_ids(rows, field):
+    """Sorted distinct ids of a many2one column — for building a dependent dataset's domain."""
+    return sorted({r[field][0] for r in rows if r.get(field)})
+
+
+# ================================================================
+# NORMALIZATION
+# ================================================================
+norm_domain = oc.norm_domain
+
+
+def query_key(model, method, args, kwargs):
+    """Canonical key of one execute_kw call — the model (for invalidation) + oc.query_hash."""
+    return model, oc.query_hash(model, method, args, kwargs)
+
+
+def _levels(specs):
+    """Group specs into dependency levels — level n only needs names produced by levels < n."""
+    by_name = defaultdict(list)
+    for s in specs:
+        if s['name']:
+            by_name[s['name']].append(s)
+    depth = {}
+
+    def level_of(s, seen=()):
+        if id(s) in depth:
+            return depth[id(s)]
+        d = 0
+        for n in s['needs']:
+            if n in seen:
+                raise ValueError(f"dataset dependency cycle through '{n}'")
+            if n not in by_name:
+                raise ValueError(f"dataset needs unknown '{n}'")
+            d = max(d, 1 + max(level_of(p, seen + (n,)) for p in by_name[n]))
+        depth[id(s)] = d
+        return d
+
+    levels = defaultdict(list)
+    for s in specs:
+        levels[level_of(s)].append(s)
+    return [levels[i] for i in sorted(levels)]
+
+
+def _project(rec, fields):
+    out = {'id': rec['id']}
+    for f in fields:
+        out[f] = rec[f]
+    return out
+
+
+def _copy(res):
+    # Reports annotate the dicts they get back — every caller gets its own
+    return [dict(r) for r in res] if isinstance(res, list) and res and isinstance(res[0], dict) else res
+
+
+def _matcher(leaf, ftype):
+    """Row test for one domain leaf on a scalar or many2one field (many2one compared by id)."""
+    field, op, val = leaf
+    if ftype == 'many2one':
+        get = lambda r: r[field][0] if r.get(field) else False
+    else:
+        get = lambda r: r.get(field)
+    if op in ('in', 'not in'):
+        vals = frozenset(val)
+        return (lambda r: get(r) in vals) if op == 'in' else (lambda r: get(r) not in vals)
+    if op == '=':
+        return lambda r: get(r) == val
+    if op == '!=':
+        return lambda r: get(r) != val
+    cmp = {'<': lambda a, b: a < b, '<=': lambda a, b: a <= b,
+           '>': lambda a, b: a > b, '>=': lambda a, b: a >= b}[op]
+    return lambda r: get(r) not in (None, False) and cmp(get(r), val)
+
+
+# ================================================================
+# PLANNER
+# ================================================================
+class FetchPlanner:
+    """Prefetches declared datasets once and answers later calls from them (see SharedModels)."""
+
+    def __init__(self, models, uid, workers=WORKERS):
+        self.models  = models                 # main-thread proxy for anything not prefetched
+        self.uid     = uid
+        self.workers = workers
+        self.cache   = {}                     # query_key → result
+        self.tables  = defaultdict(list)      # model → prefetched datasets usable for narrowing
+        self.results = {}                     # dataset name → rows
+        self.datasets = []                    # every prefetched query, in fetch (dependency) order
+        self.stats   = Counter()
+        self.types   = {}                     # model → {field: type}, for local matching
+        self._local  = threading.local()
+
+    def _proxy(self):
+        # xmlrpc ServerProxy is not thread-safe — one per worker thread
+        if not hasattr(self._local, 'models'):
+            self._local.models = _ServerProxy(f"{cfg.URL}/xmlrpc/2/object")
+        return self._local.models
+
+    def _fetch(self, q, extra=()):
+        """The dataset's rows in id-ordered keyset pages (as oc.search_read_all), on this thread's proxy."""
+        if any(not isinstance(t, str) and t[1] == 'in' and not t[2] for t in q['domain']):
+            return []                         # 'id in []' from an empty upstream dataset
+        rows    = []
+        last_id = 0
+        while True:
+            page = self._proxy().execute_kw(cfg.DB, self.uid, cfg.API_KEY, q['model'], 'search_read',
+                [list(q['domain']) + list(extra) + [['id', '>', last_id]]],
+                {'fields': sorted(q['fields']), 'order': 'id asc', 'limit': oc.PAGE_SIZE}
+            )
+            rows.extend(page)
+            if len(page) < oc.PAGE_SIZE:
+                return rows
+            last_id = page[-1]['id']
+
+    def prefetch(self, specs):
+        """Fetch every distinct query in `specs` once, each dependency level in parallel."""
+        t0      = time.perf_counter()
+        levels  = _levels(specs)
+        queries = 0
+        for level in levels:
+            merged = {}
+            for s in level:
+                domain = s['domain'](self.results) if callable(s['domain']) else s['domain']
+                q = merged.setdefault((s['model'], norm_domain(domain)),
+                                      {'model': s['model'], 'domain': domain, 'fields': {'id'}, 'names': set(),
+                                       'source': s['domain'] if callable(s['domain']) else None})
+                q['fields'] |= set(s['fields'])
+                if s['name']:
+                    q['names'].add(s['name'])
+            with ThreadPoolExecutor(max_workers=self.workers) as ex:
+                futures = [(q, ex.submit(self._fetch, q)) for q in merged.values()]
+                for q, fut in futures:
+                    q['synced'] = datetime.now(timezone.utc) - REFRESH_OVERLAP
+                    self._register(q, fut.result())
+                    print(f"  → {q['model']:<28} {len(q['rows']):>7} rows  {sorted(q['names']) or ''}")
+            queries += len(merged)
+        self.stats['declared'] += len(specs)
+        self.stats['fetched']  += queries
+        print(f"Prefetched {queries} distinct queries ({len(specs)} declared, {len(levels)} levels) "
+              f"in {time.perf_counter() - t0:.1f}s\n")
+
+    def _register(self, q, rows):
+        q['rows']   = rows
+        q['by_id']  = {r['id']: r for r in rows}
+        q['leaves'] = set(norm_domain(q['domain']))
+        self.cache[query_key(q['model'], 'search_read', [q['domain']], {'fields': sorted(q['fields'])})] = rows
+        for n in q['names']:
+            self.results[n] = rows
+        if not any(d is q for d in self.datasets):
+            self.datasets.append(q)
+            if not any(isinstance(t, str) for t in q['domain']):
+                self.tables[q['model']].append(q)
+
+    def refresh(self):
+        """
+        Bring every prefetched dataset up to date without refetching it: rows written since the
+        last sync (write_date, with REFRESH_OVERLAP for clock skew) replace their old version, and
+        one id search drops records that were deleted or left the domain. Datasets with a derived
+        domain are refetched after their upstream. Cached one-off report calls are dropped.
+        """
+        t0 = time.perf_counter()
+        self.cache.clear()
+        changed = 0
+        base    = [q for q in self.datasets if not q['source']]
+
+        def delta(q):
+            since = q['synced'].strftime('%Y-%m-%d %H:%M:%S')
+            now   = datetime.now(timezone.utc) - REFRESH_OVERLAP
+            rows  = self._fetch(q, [['write_date', '>=', since]])
+            live  = set(self._proxy().execute_kw(cfg.DB, self.uid, cfg.API_KEY, q['model'], 'search',
+                                                 [q['domain']]))
+            return now, rows, live
+
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            futures = [(q, ex.submit(delta, q)) for q in base]
+            for q, fut in futures:
+                q['synced'], rows, live = fut.result()
+                by_id = {i: r for i, r in q['by_id'].items() if i in live}
+                changed += len(q['by_id']) - len(by_id) + len(rows)
+                by_id.update((r['id'], r) for r in rows)
+                self._register(q, list(by_id.values()))
+        for q in self.datasets:
+            if q['source']:
+                q['domain'] = q['source'](self.results)
+                q['synced'] = datetime.now(timezone.utc) - REFRESH_OVERLAP
+                self._register(q, self._fetch(q))
+        self.stats['refreshes'] += 1
+        print(f"Refreshed {len(self.datasets)} datasets ({changed} rows re-read or dropped) in {time.perf_counter() - t0:.1f}s")
+        return changed
+
+    # ------------------------------------------------------------
+    def _types(self, model):
+        """{field: type} of `model`, one fields_get per model."""
+        if model not in self.types:
+            meta = self.models.execute_kw(cfg.DB, self.uid, cfg.API_KEY, model, 'fields_get',
+                                          [], {'attributes': ['type']})
+            self.types[model] = {f: d.get('type') for f, d in meta.items()}
+            self.types[model]['id'] = 'integer'
+        return self.types[model]
+
+    def _narrow(self, model, domain, kwargs):
+        """search_read answered by filtering a prefetched dataset, or None."""
+        fields = kwargs.get('fields')
+        order  = (kwargs.get('order') or '').replace(' ', '').lower()
+        if not fields or set(kwargs) - {'fields', 'order', 'limit', 'context'} or order not in ('', 'id', 'idasc'):
+            return None
+        if kwargs.get('context') or (kwargs.get('limit') and not order):
+            return None   # context (active_test, lang) changes the rows; a bare limit takes the model's _order
+        leaves = norm_domain(domain)
+        if any(isinstance(t, str) for t in leaves):
+            return None
+        for t in self.tables.get(model, ()):
+            if not set(fields) <= t['fields'] or not t['leaves'] <= set(leaves):
+                continue
+            rest = [l for l in leaves if l not in t['leaves']]
+            if any('.' in l[0] or l[0] not in t['fields'] or l[1] not in LOCAL_OPS for l in rest):
+                continue
+            types = self._types(model) if rest else {}
+            if any(types.get(l[0]) not in LOCAL_TYPES for l in rest):
+                return None
+            tests = [_matcher(l, types[l[0]]) for l in rest]
+            rows  = [r for r in t['rows'] if all(m(r) for m in tests)]
+            if order:
+                rows.sort(key=lambda r: r['id'])
+            if kwargs.get('limit'):
+                rows = rows[:kwargs['limit']]
+            return [_project(r, fields) for r in rows]
+        return None
+
+    def _read(self, model, ids, kwargs):
+        fields = kwargs.get('fields')
+        if not fields or set(kwargs) - {'fields', 'context'} or kwargs.get('context'):
+            return None
+        ids = list(ids) if isinstance(ids, (list, tuple)) else [ids]
+        for t in self.tables.get(model, ()):
+            if set(fields) <= t['fields'] and all(i in t['by_id'] for i in ids):
+                return [_project(t['by_id'][i], fields) for i in ids]
+        return None
+
+    def call(self, model, method, args, kwargs):
+        kwargs = kwargs or {}
+        if method not in CACHED:
+            # Writes go straight through and drop everything cached for that model
+            self.stats['write'] += 1
+            self.tables.pop(model, None)
+            self.datasets = [q for q in self.datasets if q['model'] != model]
+            for k in [k for k in self.cache if k[0] == model]:
+                del self.cache[k]
+            return self.models.execute_kw(cfg.DB, self.uid, cfg.API_KEY, model, method, args, kwargs)
+
+        key = query_key(model, method, args, kwargs)
+        if key in self.cache:
+            self.stats['exact'] += 1
+            return _copy(self.cache[key])
+        res = None
+        if method == 'search_read':
+            res = self._narrow(model, args[0] if args else kwargs.get('domain', []),
+                               {k: v for k, v in kwargs.items() if k != 'domain'})
+        elif method == 'read' and args:
+            res = self._read(model, args[0], kwargs)
+        if res is not None:
+            self.stats['narrowed'] += 1
+            return res
+        self.stats['odoo'] += 1
+        res = self.models.execute_kw(cfg.DB, self.uid, cfg.API_KEY, model, method, args, kwargs)
+        self.cache[key] = res
+        return _copy(res)
+
+    def summary(self):
+        s = self.stats
+        served = s['exact'] + s['narrowed']
+        total  = served + s['odoo']
+        return (f"{s['fetched']} prefetched queries ({s['declared']} declared) | report calls: {total}, "
+                f"{served} served from shared data ({s['exact']} identical, {s['narrowed']} narrowed), "
+                f"{s['odoo']} to Odoo, {s['write']} writes")
+
+
+class SharedModels:
+    """Drop-in for the xmlrpc /object proxy: models.execute_kw(...) goes through the planner."""
+
+    def __init__(self, planner):
+        self.planner = planner
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        return self.planner.call(model, method, args, kwargs)
+
+
+class SharedCommon:
+    """Drop-in for the xmlrpc /common proxy: authenticate() returns the already known uid."""
+
+    def __init__(self, uid):
+        self.uid = uid
+
+    def authenticate(self, *args):
+        return self.uid
+
+    def version(self):
+        return {}
+
+
+def run_report(planner, path, log=None):
+    """
+    Run a report script in-process against the planner's shared data and return its globals.
+    The script's own ServerProxy calls get SharedCommon / SharedModels, input() returns at once,
+    and with `log` (a file-like) its console output goes there instead of stdout.
+    """
+    shared, common = SharedModels(planner), SharedCommon(planner.uid)
+    saved = xmlrpc.client.ServerProxy, builtins.input, sys.argv
+    xmlrpc.client.ServerProxy = lambda url, *a, **kw: common if url.endswith('/common') else shared
+    builtins.input = lambda *a: ''
+    sys.argv = [path]
+    try:
+        with contextlib.redirect_stdout(log) if log is not None else contextlib.nullcontext():
+            return runpy.run_path(path, run_name='__main__')
+    except SystemExit:
+        return {}
+    finally:
+        xmlrpc.client.ServerProxy, builtins.input, sys.argv = saved
@@ -0,0 +1,106 @@
+import numpy as np
+import odoo_client as oc
+
+# ================================================================
+# STATISTICAL DEMAND FORECAST — every product at once, loop over months only
+# ================================================================
+# History: confirmed sale.order.line qty by order month. Each product gets
+# simple exponential smoothing (regular demand) or Croston / SBA (intermittent
+# demand — average interval between non-zero months above ADI_CUTOFF).
+# Smoothing constants are chosen per product from ALPHAS by one-step-ahead
+# squared error, evaluated for all products × all alphas in the same pass.
+ALPHAS     = np.array([0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5])
+ADI_CUTOFF = 1.32   # Syntetos–Boylan: above this, demand is intermittent
+
+
+def fetch_sales(models, uid, product_ids, since):
+    """Confirmed SO lines of `product_ids` ordered since `since` → {'product_id', 'qty', 'date'} arrays."""
+    lines = oc.search_read_all(models, uid, 'sale.order.line',
+        [['product_id', 'in', list(product_ids)], ['state', 'in', ['sale', 'done']],
+         ['order_id.date_order', '>=', since.strftime('%Y-%m-%d')]],
+        ['order_id', 'product_id', 'product_uom_qty'])
+    orders = oc.read_batched(models, uid, 'sale.order', {oc.m2o_id(l['order_id']) for l in lines},
+                             ['date_order'], batch_size=1000)
+    return {
+        'product_id': np.array([oc.m2o_id(l['product_id']) for l in lines], dtype=np.int32),
+        'qty':        np.array([l['product_uom_qty'] or 0.0 for l in lines], dtype=np.float64),
+        'date':       oc.to_datetime64([orders.get(oc.m2o_id(l['order_id']), {}).get('date_order')
+                                        for l in lines]),
+    }
+
+
+def ses(Y, alphas=ALPHAS):
+    """
+    Simple exponential smoothing of every row of Y (products × months) for every alpha.
+    Returns (forecast per product, chosen alpha, one-step SSE) using each product's best alpha.
+    """
+    P, T = Y.shape
+    a     = alphas[None, :]
+    level = np.repeat(Y[:, :1], len(alphas), axis=1)             # P × A, start at first month
+    sse   = np.zeros((P, len(alphas)))
+    for t in range(1, T):
+        y      = Y[:, t:t + 1]
+        sse   += (y - level) ** 2
+        level  = a * y + (1 - a) * level
+    best = sse.argmin(axis=1)
+    rows = np.arange(P)
+    return level[rows, best], alphas[best], sse[rows, best]
+
+
+def croston(Y, alphas=ALPHAS):
+    """
+    Croston with the Syntetos–Boylan bias correction for every row of Y and every alpha.
+    Size and interval are only updated in months with demand; the first interval counts
+    from the start of the history. Returns like ses().
+    """
+    P, T = Y.shape
+    A     = len(alphas)
+    a     = alphas[None, :]
+    first = np.where((Y > 0).any(axis=1), (Y > 0).argmax(axis=1), T)
+    size  = np.zeros((P, A))
+    intv  = np.ones((P, A))
+    since = np.ones((P, A))                                      # months since last demand
+    seen  = np.zeros((P, 1), dtype=bool)
+    sse   = np.zeros((P, A))
+    for t in range(T):
+        y    = Y[:, t:t + 1]
+        fc   = np.where(seen, size / intv * (1 - a / 2), 0.0)
+        sse += np.where(seen, (y - fc) ** 2, 0.0)
+        hit  = (y > 0) & seen
+        size = np.where(hit, a * y + (1 - a) * size, size)
+        intv = np.where(hit, a * since + (1 - a) * intv, intv)
+        init = (first == t)[:, None]                             # first demand seeds size and interval
+        size = np.where(init, y, size)
+        intv = np.where(init, t + 1.0, intv)
+        since = np.where(y > 0, 1.0, since + 1.0)
+        seen |= init
+    best = sse.argmin(axis=1)
+    rows = np.arange(P)
+    fc   = np.where(seen[:, 0], size[rows, best] / intv[rows, best] * (1 - alphas[best] / 2), 0.0)
+    return fc, alphas[best], sse[rows, best]
+
+
+def classify(Y):
+    """ADI (average months between demands) and CV² of non-zero demand per row of Y."""
+    nz   = Y > 0
+    n    = nz.sum(axis=1)
+    adi  = np.where(n > 0, Y.shape[1] / np.maximum(n, 1), np.inf)
+    mean = np.where(n > 0, Y.sum(axis=1) / np.maximum(n, 1), 0.0)
+    var  = np.where(n > 1, (np.where(nz, Y - mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(n - 1, 1), 0.0)
+    cv2  = np.where(mean > 0, var / np.where(mean > 0, mean, 1.0) ** 2, 0.0)
+    return adi, cv2
+
+
+def forecast(Y):
+    """Pick SES or Croston per product by ADI. Returns {'forecast', 'method', 'alpha', 'adi', 'cv2'}."""
+    adi, cv2 = classify(Y)
+    f_ses, a_ses, _ = ses(Y)
+    f_cro, a_cro, _ = croston(Y)
+    inter = adi > ADI_CUTOFF
+    return {
+        'forecast': np.where(inter, f_cro, f_ses),
+        'method':   np.where(inter, 'Croston', 'SES'),
+        'alpha':    np.where(inter, a_cro, a_ses),
+        'adi':      adi,
+        'cv2':      cv2,
+    }
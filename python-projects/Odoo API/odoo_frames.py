@@ -0,0 +1,138 @@
+import numpy as np
+import odoo_client as oc
+
+# ================================================================
+# COLUMNAR FRAMES — search_read results as typed numpy columns
+# ================================================================
+# frame() turns a list of record dicts into one array per field, typed from a
+# schema: many2one [id, name] pairs split into an id column and a categorical
+# name column, datetimes parsed in one vectorized call, selection / char
+# values with few distinct values stored as small integer codes into a
+# category table, many2many id lists flattened CSR-style (offsets + ids).
+# Group-bys are then bincounts over the codes instead of Python loops, and
+# nothing per record has to be parsed or annotated.
+EMPTY = ''   # category of an empty / False value
+
+
+def _categorical(values):
+    cats, codes = np.unique(np.array([v if v else EMPTY for v in values], dtype=str), return_inverse=True)
+    return codes.astype(np.int32), cats
+
+
+def frame(records, schema):
+    """
+    records — search_read dicts (or oc.record_type records); schema — {field: kind}, kind one of
+      'm2o'       → <field>_id int64 (0 = empty) and <field> coded by display name
+      'cat'       → <field> int32 codes into frame['cats'][field]
+      'datetime'  → <field> datetime64[s] (NaT = empty)
+      'float' / 'int' / 'bool'
+      'm2m'       → <field>_ptr (n + 1 offsets) and <field>_ids (all ids, flat)
+    'id' is always included. Returns {column: array, 'cats': {field: category names}, 'n': rows}.
+    """
+    fr = {'id': np.array([r.get('id') for r in records], dtype=np.int64), 'cats': {}, 'n': len(records)}
+    for f, kind in schema.items():
+        col = [r.get(f) for r in records]
+        if kind == 'm2o':
+            fr[f + '_id'] = np.array([v[0] if v else 0 for v in col], dtype=np.int64)
+            fr[f], fr['cats'][f] = _categorical([v[1] if v else EMPTY for v in col])
+        elif kind == 'cat':
+            fr[f], fr['cats'][f] = _categorical(col)
+        elif kind == 'datetime':
+            fr[f] = oc.to_datetime64(col)
+        elif kind == 'float':
+            fr[f] = np.array([v or 0.0 for v in col], dtype=np.float64)
+        elif kind == 'int':
+            fr[f] = np.array([v or 0 for v in col], dtype=np.int64)
+        elif kind == 'bool':
+            fr[f] = np.array([bool(v) for v in col], dtype=bool)
+        elif kind == 'm2m':
+            lens = np.array([len(v) if v else 0 for v in col], dtype=np.int64)
+            fr[f + '_ptr'] = np.concatenate([[0], np.cumsum(lens)])
+            fr[f + '_ids'] = np.array([i for v in col if v for i in v], dtype=np.int64)
+        else:
+            raise ValueError(f"unknown column kind '{kind}' for {f}")
+    return fr
+
+
+def add_lists(fr, field, lists):
+    """Add a CSR column of string lists (e.g. tag names per row): ids are codes into cats[field]."""
+    lens = np.array([len(v) for v in lists], dtype=np.int64)
+    fr[field + '_ptr'] = np.concatenate([[0], np.cumsum(lens)])
+    fr[field + '_ids'], fr['cats'][field] = _categorical([x for v in lists for x in v])
+    fr[field + '_ids'] = fr[field + '_ids'].astype(np.int64)
+    return fr
+
+
+def labels(fr, field):
+    """Display value of every row of a categorical column."""
+    return fr['cats'][field][fr[field]]
+
+
+def code_of(fr, field, value):
+    """Code of `value` in a categorical column, -1 when it never occurs."""
+    cats = fr['cats'][field]
+    i    = np.searchsorted(cats, value)
+    return int(i) if i < len(cats) and cats[i] == value else -1
+
+
+def recode(codes, cats, mapping, default=None):
+    """
+    Map a categorical column through {old label: new label} (unmapped labels kept, or `default`).
+    Returns (new codes, new categories) — the per-category work happens once, not per row.
+    """
+    new = np.array([mapping.get(c, c if default is None else default) for c in cats], dtype=str)
+    new_cats, inv = np.unique(new, return_inverse=True) if len(new) else (new, np.zeros(0, dtype=np.int64))
+    return inv.astype(np.int32)[codes], new_cats
+
+
+def age_days(dates, now):
+    """Whole days from each datetime64 to `now` (aware datetime); empty dates → 0."""
+    ref = np.datetime64(now.replace(tzinfo=None), 's')
+    d   = (ref - dates).astype('timedelta64[D]').astype(np.int64)
+    return np.where(np.isnat(dates), 0, d)
+
+
+def day_strings(dates):
+    """datetime64 → 'YYYY-MM-DD' strings ('' for NaT)."""
+    s = np.datetime_as_string(dates.astype('datetime64[D]'))
+    return np.where(np.isnat(dates), '', s)
+
+
+def month_strings(dates, empty='Unknown'):
+    """datetime64 → 'YYYY-MM' strings (`empty` for NaT)."""
+    s = np.datetime_as_string(dates.astype('datetime64[M]'))
+    return np.where(np.isnat(dates), empty, s)
+
+
+def bucket(values, edges):
+    """Bucket index per value: 0 for ≤ edges[0], 1 for ≤ edges[1], … len(edges) above the last."""
+    return np.searchsorted(np.asarray(edges), values, side='left')
+
+
+def crosstab(a, na, b, nb, mask=None):
+    """na × nb counts of (a, b) code pairs, optionally only rows where `mask`."""
+    if mask is not None:
+        a, b = a[mask], b[mask]
+    return np.bincount(a.astype(np.int64) * nb + b, minlength=na * nb).reshape(na, nb)
+
+
+def m2m_rows(fr, field):
+    """Row index of every entry of a many2many column (parallel to <field>_ids)."""
+    return np.repeat(np.arange(fr['n']), np.diff(fr[field + '_ptr']))
+
+
+def m2m_any(fr, field, ids):
+    """Rows whose many2many column contains any of `ids`."""
+    hit = np.isin(fr[field + '_ids'], list(ids))
+    return np.bincount(m2m_rows(fr, field)[hit], minlength=fr['n']) > 0
+
+
+def m2m_counts(fr, field, mask=None):
+    """(ids, counts) of a many2many column over the rows where `mask`, most frequent first."""
+    ids = fr[field + '_ids']
+    if mask is not None:
+        ids = ids[mask[m2m_rows(fr, field)]]
+    u, n = np.unique(ids, return_counts=True)
+    order = np.lexsort((u, -n))
+    return u[order], n[order]
+
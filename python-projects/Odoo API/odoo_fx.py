@@ -0,0 +1,77 @@
+import os
+import json
+import numpy as np
+from bisect import bisect_right
+from datetime import datetime, timezone, timedelta
+import odoo_client as oc
+
+# ================================================================
+# HISTORICAL FX — res.currency.rate history, converted as of any date
+# ================================================================
+# Odoo stores `rate` = units of the currency per 1 unit of the company
+# currency, one row per (currency, day). The whole history is pulled once,
+# cached in RATES_FILE, and looked up with bisect (latest rate on or before
+# the date). A currency with no rate rows is the company currency (rate 1).
+RATES_FILE    = 'fx_rates.json'
+MAX_AGE_HOURS = 24
+
+
+def load(models, uid, path=RATES_FILE, max_age_hours=MAX_AGE_HOURS, rebuild=False):
+    """{currency name: (sorted 'YYYY-MM-DD' dates, rates)} from cache, else from Odoo."""
+    if not rebuild and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if datetime.now(timezone.utc) - datetime.fromisoformat(data['built']) < timedelta(hours=max_age_hours):
+            return {c: (v[0], v[1]) for c, v in data['rates'].items()}
+
+    print("Loading currency rate history...")
+    rows = oc.search_read_all(models, uid, 'res.currency.rate', [], ['currency_id', 'name', 'rate'])
+    by_curr = {}
+    for r in rows:
+        if r.get('currency_id') and r.get('rate'):
+            by_curr.setdefault(r['currency_id'][1], {})[str(r['name'])[:10]] = r['rate']
+    rates = {c: (sorted(d), [d[k] for k in sorted(d)]) for c, d in by_curr.items()}
+    print(f"  → {len(rows)} rates for {len(rates)} currencies")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'built': datetime.now(timezone.utc).isoformat(), 'rates': rates}, f)
+    return rates
+
+
+def rate_on(rates, currency, day):
+    """Rate of `currency` on `day` ('YYYY-MM-DD…' or date); earliest known rate before history starts."""
+    if currency not in rates:
+        return 1.0
+    dates, values = rates[currency]
+    i = bisect_right(dates, str(day)[:10])
+    return values[i - 1] if i else values[0]
+
+
+def to_usd(rates, amount, currency, day):
+    if not amount: return 0.0
+    if currency == 'USD': return amount
+    return amount * rate_on(rates, 'USD', day) / rate_on(rates, currency, day)
+
+
+def column_to_usd(rates, amounts, currencies, days):
+    """Vectorized to_usd for whole columns — one searchsorted per currency present."""
+    amounts    = np.asarray(amounts, dtype=np.float64)
+    currencies = np.asarray(currencies)
+    days       = np.asarray(days)
+    days       = days.astype('datetime64[D]') if np.issubdtype(days.dtype, np.datetime64) \
+                 else np.array([str(d)[:10] for d in days], dtype='datetime64[D]')
+
+    def rate_col(curr, mask):
+        if curr not in rates:
+            return np.ones(mask.sum())
+        dates  = np.array(rates[curr][0], dtype='datetime64[D]')
+        values = np.asarray(rates[curr][1], dtype=np.float64)
+        i      = np.searchsorted(dates, days[mask], side='right')
+        return values[np.maximum(i - 1, 0)]
+
+    usd_rate  = rate_col('USD', np.ones(len(amounts), dtype=bool))
+    curr_rate = np.ones(len(amounts))
+    for curr in np.unique(currencies):
+        mask = currencies == curr
+        curr_rate[mask] = rate_col(curr, mask)
+    return amounts * usd_rate / curr_rate
@@ -1,11 +1,18 @@
 import xmlrpc.client
 import openpyxl
+import numpy as np
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_stage_history as sh
+import odoo_frames as fr
+import odoo_dataset_export as dx
+import odoo_run_delta as dl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from datetime import datetime, timezone
 
 # Divisions and device lines loaded from config
+DELTA_SHEET = True   # save a snapshot of every ticket's stage / assignee and add a "What Changed" sheet vs the last run
 
 def make_fill(hex_color):
     return PatternFill("solid", fgColor=hex_color)
@@ -23,22 +30,23 @@ try:
 
     now = datetime.now(timezone.utc)
 
-    # Resolve C2 product IDs
-    c2_products = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.product', 'search_read',
+    # Resolve C2 product IDs — reference lookups come from the query cache between runs
+    c2_products = oc.cached_execute(models, uid, 'product.product', 'search_read',
         [[['default_code', 'in', cfg.C2_PRODUCT_REFS]]],
         {'fields': ['id']}
     )
     c2_product_ids = {p['id'] for p in c2_products}
 
-    all_teams = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'helpdesk.team', 'search_read',
+    all_teams = oc.cached_execute(models, uid, 'helpdesk.team', 'search_read',
         [[]], {'fields': ['id', 'name']}
     )
     team_map = {t['name']: t['id'] for t in all_teams}
 
-    all_stages = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'helpdesk.stage', 'search_read',
+    all_stages = oc.cached_execute(models, uid, 'helpdesk.stage', 'search_read',
         [[]], {'fields': ['id', 'name', 'sequence']}
     )
     stage_order = {s['name']: s['sequence'] for s in all_stages}
+    stage_label = {s['id']: s['name'] for s in all_stages}
 
     wb = openpyxl.Workbook()
     wb.remove(wb.active)
@@ -94,8 +102,11 @@ try:
         c.border = thin_border()
 
     sum_row = 5
+    all_tickets = []   # every fetched ticket (compact records), for the stage dwell-time sheet
+    delta_cols  = {k: [] for k in ('id', 'stage', 'user', 'stage_name', 'assignee', 'subject', 'division')}
 
-    # ---- ONE SHEET PER DIVISION ----
+    # ---- FETCH TICKETS PER DIVISION ----
+    division_tickets = {}
     for division in cfg.DIVISIONS:
         team_id = team_map.get(division)
         if not team_id:
@@ -108,7 +119,19 @@ try:
             {'fields': FIELDS}
         )
         print(f"  → {len(tickets)} tickets found")
+        dx.export('tickets', tickets, key=division.replace("Support - ", ""))
+        all_tickets.extend(oc.records(tickets, oc.TicketState))
+        division_tickets[division] = tickets
+
+    # Other related products of every ticket in one batched read (not through the query cache —
+    # one entry per distinct id list would push the reference lookups out of it)
+    other_ids = {p[0] if isinstance(p, list) else p
+                 for tickets in division_tickets.values() for t in tickets
+                 for p in (t.get('x_studio_other_related_products') or [])}
+    other_prod = oc.read_batched(models, uid, 'product.product', other_ids, ['default_code', 'name'])
 
+    # ---- ONE SHEET PER DIVISION ----
+    for division, tickets in division_tickets.items():
         color      = division_colors.get(division, "2E4057")
         short_name = division.replace("Support - ", "")
         ws = wb.create_sheet(short_name)
@@ -147,63 +170,54 @@ try:
         for i, w in enumerate(col_widths, 1):
             ws.column_dimensions[get_column_letter(i)].width = w
 
-        # Group by stage
-        by_stage = {}
-        for t in tickets:
-            sname = t['stage_id'][1] if t['stage_id'] else 'Unknown'
-            by_stage.setdefault(sname, []).append(t)
+        # Columnar view: dates parsed and ages computed for the whole division at once
+        F = fr.frame(tickets, {'stage_id': 'm2o', 'user_id': 'm2o',
+                               'create_date': 'datetime', 'date_last_stage_update': 'datetime'})
+        stage_codes, stage_cats = fr.recode(F['stage_id'], F['cats']['stage_id'], {fr.EMPTY: 'Unknown'})
+        created     = F['create_date']
+        days_open   = fr.age_days(created, now)
+        created_fmt = fr.day_strings(created)
+        updated_fmt = fr.day_strings(F['date_last_stage_update'])
+        # Rows in create-date order, undated first
+        by_created  = np.argsort(np.where(np.isnat(created), np.datetime64(0, 's'), created), kind='stable')
+
+        for k, v in (('id', F['id']), ('stage', F['stage_id_id']), ('user', F['user_id_id']),
+                     ('stage_name', stage_cats[stage_codes]),
+                     ('assignee', np.where(F['user_id_id'] == 0, 'Unassigned', fr.labels(F, 'user_id'))),
+                     ('subject', [t.get('name') or '' for t in tickets]), ('division', [short_name] * len(tickets))):
+            delta_cols[k].extend(v)
 
         row_num = 5
 
-        for stage_name in sorted(by_stage.keys(), key=lambda s: stage_order.get(s, 99)):
-            stage_tickets = by_stage[stage_name]
+        for code in sorted(np.unique(stage_codes).tolist(), key=lambda c: stage_order.get(stage_cats[c], 99)):
+            stage_name = str(stage_cats[code])
+            rows  = by_created[stage_codes[by_created] == code]
             sfill = stage_fills.get(stage_name, make_fill("FFFFFF"))
 
             # Stage group header
             ws.merge_cells(f"A{row_num}:U{row_num}")
-            ws.cell(row=row_num, column=1).value = f"  ▶  {stage_name}  ({len(stage_tickets)} tickets)"
+            ws.cell(row=row_num, column=1).value = f"  ▶  {stage_name}  ({len(rows)} tickets)"
             ws.cell(row=row_num, column=1).font  = Font(bold=True, size=11, color="FFFFFF")
             ws.cell(row=row_num, column=1).fill  = make_fill(color)
             ws.cell(row=row_num, column=1).alignment = left
             ws.row_dimensions[row_num].height = 18
             row_num += 1
 
-            days_list  = []
-            unassigned = 0
-
-            for t in sorted(stage_tickets, key=lambda x: x.get('create_date') or ''):
-                created_str = t.get('create_date', '')
-                if created_str:
-                    created_dt = datetime.strptime(created_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                    days_open  = (now - created_dt).days
-                    created_fmt = created_dt.strftime('%Y-%m-%d')
-                else:
-                    days_open   = 0
-                    created_fmt = ''
-                days_list.append(days_open)
-
-                last_update = t.get('date_last_stage_update', '')
-                last_update_fmt = datetime.strptime(last_update, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d') if last_update else ''
-
+            for i in rows.tolist():
+                t    = tickets[i]
+                days = int(days_open[i])
                 assigned = t['user_id'][1] if t['user_id'] else 'Unassigned'
-                if assigned == 'Unassigned':
-                    unassigned += 1
 
                 # Other related products
-                other_prods = ''
-                if t.get('x_studio_other_related_products'):
-                    prod_ids = [p[0] if isinstance(p, list) else p for p in t['x_studio_other_related_products']]
-                    if prod_ids:
-                        prods = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.product', 'read',
-                            [prod_ids], {'fields': ['default_code', 'name']}
-                        )
-                        other_prods = ', '.join([f"[{p.get('default_code','')}] {p['name']}" for p in prods])
+                prods       = [other_prod[pid] for pid in (p[0] if isinstance(p, list) else p
+                               for p in (t.get('x_studio_other_related_products') or [])) if pid in other_prod]
+                other_prods = ', '.join([f"[{p.get('default_code','')}] {p['name']}" for p in prods])
 
                 row_data = [
                     f"#{t['id']}",
                     t.get('name', ''),
                     stage_name,
-                    days_open,
+                    days,
                     t['partner_id'][1]      if t['partner_id']      else '',
                     t.get('partner_email', '')                       or '',
                     t['ticket_type_id'][1]  if t['ticket_type_id']  else '',
@@ -213,23 +227,23 @@ try:
                     'C2' if (t['product_id'] and t['product_id'][0] in c2_product_ids) else 'C-100',
                     t['lot_id'][1]          if t['lot_id']          else '',
                     t.get('x_studio_age_of_device', '')              or '',
-                    created_fmt,
+                    str(created_fmt[i]),
                     t['create_uid'][1]      if t['create_uid']      else '',
                     assigned,
                     t['division_id'][1]     if t['division_id']     else '',
                     priority_map.get(str(t.get('priority', '0')), 'Normal'),
                     'Yes' if t.get('x_studio_under_warranty') else 'No',
                     other_prods,
-                    last_update_fmt,
+                    str(updated_fmt[i]),
                 ]
                 ws.append(row_data)
 
                 # Highlight aging open tickets
                 row_fill = sfill
                 if stage_name not in ('Solved', 'Cancelled'):
-                    if days_open > 60:
+                    if days > 60:
                         row_fill = make_fill("FFB3B3")
-                    elif days_open > 30:
+                    elif days > 30:
                         row_fill = make_fill("FFD9B3")
 
                 for col in range(1, len(col_headers) + 1):
@@ -241,17 +255,13 @@ try:
                 row_num += 1
 
             # Summary stats for this stage
-            if days_list:
-                avg_d = round(sum(days_list) / len(days_list), 1)
-                min_d = min(days_list)
-                max_d = max(days_list)
-                oldest = min((t.get('create_date','') for t in stage_tickets if t.get('create_date')), default='')
-                oldest_fmt = datetime.strptime(oldest, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d') if oldest else ''
-            else:
-                avg_d = min_d = max_d = 0
-                oldest_fmt = ''
-
-            ws_sum.append([division, stage_name, len(stage_tickets), avg_d, min_d, max_d, oldest_fmt, unassigned])
+            d          = days_open[rows]
+            dated      = rows[~np.isnat(created[rows])]
+            oldest_fmt = str(fr.day_strings(created[dated].min(keepdims=True))[0]) if len(dated) else ''
+            unassigned = int((F['user_id_id'][rows] == 0).sum())
+
+            ws_sum.append([division, stage_name, len(rows), round(float(d.mean()), 1), int(d.min()), int(d.max()),
+                           oldest_fmt, unassigned])
             for col in range(1, 9):
                 c = ws_sum.cell(row=sum_row, column=col)
                 c.fill      = stage_fills.get(stage_name, make_fill("FFFFFF"))
@@ -269,9 +279,158 @@ try:
     for i, w in enumerate(sum_widths, 1):
         ws_sum.column_dimensions[get_column_letter(i)].width = w
 
+    # ---- STAGE DWELL TIMES (from stage_id tracking history) ----
+    print("Fetching stage history...")
+    hist = sh.fetch_tracking(models, uid, 'helpdesk.ticket', 'stage_id')
+    print(f"  → {len(hist['res_id'])} stage changes")
+    for code, label in hist['names'].items():
+        stage_label.setdefault(code, label)
+
+    seg = sh.dwell_segments(
+        hist,
+        [t.id for t in all_tickets],
+        oc.to_datetime64([t.create_date for t in all_tickets]),
+        [t.stage_id for t in all_tickets],
+        now,
+    )
+    team_by_ticket = {t.id: t.team_id for t in all_tickets}
+    seg_team = np.array([team_by_ticket.get(int(r), 0) for r in seg['res_id']], dtype=np.int32)
+
+    ws_dw = wb.create_sheet("Stage Dwell Times")
+    ws_dw.freeze_panes = "A5"
+    ws_dw.merge_cells("A1:I1")
+    ws_dw["A1"] = "Time Spent per Stage (days) — from stage change history"
+    ws_dw["A1"].font = Font(bold=True, size=16)
+    ws_dw["A1"].alignment = center
+    ws_dw.merge_cells("A2:I2")
+    ws_dw["A2"] = (f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
+                   f"Completed = ticket has left the stage   |   Open = ticket is in the stage now")
+    ws_dw["A2"].alignment = center
+    ws_dw["A2"].font = Font(italic=True)
+    ws_dw.append([])
+
+    dw_headers = ["Division", "Stage", "# Completed", "Median Days", "P75 Days", "P90 Days",
+                  "Avg Days", "# Open Now", "Median Days So Far"]
+    ws_dw.append(dw_headers)
+    for col in range(1, len(dw_headers) + 1):
+        c = ws_dw.cell(row=4, column=col)
+        c.font = header_font
+        c.fill = make_fill("2E4057")
+        c.alignment = center
+        c.border = thin_border()
+
+    dw_row = 5
+    for division in ["All Divisions"] + cfg.DIVISIONS:
+        mask = None if division == "All Divisions" else seg_team == team_map.get(division, -1)
+        stats = sh.dwell_stats(seg, mask)
+        for code in sorted(stats, key=lambda c: stage_order.get(stage_label.get(c, ''), 99)):
+            st    = stats[code]
+            sname = stage_label.get(code, f'Stage({code})')
+            ws_dw.append([division, sname, st['done'], st['p50'], st['p75'], st['p90'],
+                          st['mean'], st['open'], st['open_p50']])
+            for col in range(1, len(dw_headers) + 1):
+                c = ws_dw.cell(row=dw_row, column=col)
+                c.fill      = stage_fills.get(sname, make_fill("FFFFFF"))
+                c.border    = thin_border()
+                c.alignment = center
+            dw_row += 1
+        ws_dw.append([])
+        dw_row += 1
+
+    for i, w in enumerate([22, 18, 13, 13, 11, 11, 11, 12, 18], 1):
+        ws_dw.column_dimensions[get_column_letter(i)].width = w
+
+    # ---- WHAT CHANGED (against the previous run's snapshot) ----
+    delta = None
+    if DELTA_SHEET:
+        cur = dl.snapshot(delta_cols['id'],
+                          {'stage': np.array(delta_cols['stage'], dtype=np.int64),
+                           'user':  np.array(delta_cols['user'], dtype=np.int64)},
+                          {k: np.array(delta_cols[k], dtype=str) for k in ('stage_name', 'assignee', 'subject', 'division')})
+        prev, delta = dl.compare('helpdesk', cur, now)
+
+    if delta:
+        moved    = dl.changed(delta, prev, cur, 'stage')
+        reassign = dl.changed(delta, prev, cur, 'user')
+        sections = [
+            ("New Tickets",      "1F4E79", [(None, c) for c in delta['new'].tolist()]),
+            ("Stage Changed",    "375623", list(zip(delta['prev'][moved].tolist(), delta['cur'][moved].tolist()))),
+            ("Reassigned",       "7F6000", list(zip(delta['prev'][reassign].tolist(), delta['cur'][reassign].tolist()))),
+            ("No Longer Listed", "7B2C2C", [(p, None) for p in delta['gone'].tolist()]),
+        ]
+
+        def source(pair):
+            p, c = pair
+            return (cur, c) if c is not None else (prev, p)
+
+        def by_division(pair):
+            src, i = source(pair)
+            return str(src['division'][i]), int(src['id'][i])
+        print(f"Changes since {prev['run']}: " + ', '.join(f"{len(rows)} {title.lower()}" for title, _, rows in sections))
+
+        ws_dt = wb.create_sheet("What Changed")
+        ws_dt.freeze_panes = "A5"
+        ws_dt.merge_cells("A1:H1")
+        ws_dt["A1"] = f"What Changed Since the Last Run — {prev['run']} UTC"
+        ws_dt["A1"].font = Font(bold=True, size=16)
+        ws_dt["A1"].alignment = center
+        ws_dt.merge_cells("A2:H2")
+        ws_dt["A2"] = (f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
+                       f"{len(prev['id'])} tickets last run → {len(cur['id'])} now   |   {delta['same']} unchanged")
+        ws_dt["A2"].alignment = center
+        ws_dt["A2"].font = Font(italic=True)
+        ws_dt.append([])
+
+        dt_headers = ["Ticket #", "Subject", "Division", "Change", "Stage Before", "Stage Now",
+                      "Assigned Before", "Assigned Now"]
+        ws_dt.append(dt_headers)
+        for col in range(1, len(dt_headers) + 1):
+            c = ws_dt.cell(row=4, column=col)
+            c.font = header_font
+            c.fill = make_fill("2E4057")
+            c.alignment = center
+            c.border = thin_border()
+
+        dt_row = 5
+        for title, color, rows in sections:
+            if not rows:
+                continue
+            ws_dt.merge_cells(f"A{dt_row}:H{dt_row}")
+            ws_dt.cell(row=dt_row, column=1).value = f"  ▶  {title}  ({len(rows)} tickets)"
+            ws_dt.cell(row=dt_row, column=1).font  = Font(bold=True, size=11, color="FFFFFF")
+            ws_dt.cell(row=dt_row, column=1).fill  = make_fill(color)
+            ws_dt.cell(row=dt_row, column=1).alignment = left
+            ws_dt.row_dimensions[dt_row].height = 18
+            dt_row += 1
+            for p, c in sorted(rows, key=by_division):
+                src, i = source((p, c))
+                ws_dt.append([
+                    f"#{src['id'][i]}", str(src['subject'][i]), str(src['division'][i]), title,
+                    str(prev['stage_name'][p]) if p is not None else '',
+                    str(cur['stage_name'][c])  if c is not None else '',
+                    str(prev['assignee'][p])   if p is not None else '',
+                    str(cur['assignee'][c])    if c is not None else '',
+                ])
+                sname = str(cur['stage_name'][c]) if c is not None else ''
+                for col in range(1, len(dt_headers) + 1):
+                    cell = ws_dt.cell(row=dt_row, column=col)
+                    cell.fill      = stage_fills.get(sname, make_fill("FFFFFF"))
+                    cell.border    = thin_border()
+                    cell.alignment = left
+                ws_dt.row_dimensions[dt_row].height = 15
+                dt_row += 1
+            ws_dt.append([])
+            dt_row += 1
+
+        for i, w in enumerate([10, 35, 12, 16, 16, 16, 20, 20], 1):
+            ws_dt.column_dimensions[get_column_letter(i)].width = w
+
     output_file = f"helpdesk_report_{now.strftime('%Y%m%d_%H%M')}.xlsx"
     wb.save(output_file)
     print(f"\nExcel report saved: {output_file}")
+    if DELTA_SHEET:
+        dl.save('helpdesk', cur, now)
+    print(oc.cache_summary())
     print("=== Done ===")
 
 except Exception as e:
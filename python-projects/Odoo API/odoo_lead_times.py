@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import odoo_client as oc
+
+# ================================================================
+# LEAD-TIME STORE — actual PO approve → receipt days, kept on disk
+# ================================================================
+# One entry per done purchase receipt move, as compact numpy columns.
+# refresh() only asks Odoo for receipts done since the newest one already
+# stored, so the full history scan happens once.
+STORE_FILE   = 'lead_time_store.npz'
+MAX_DAYS     = 730   # same anomaly cut-off as odoo_lead_time_check.py
+MIN_SAMPLES  = 3     # fewer receipts than this → fall back (supplier, then configured delay)
+
+COLUMNS = {
+    'move_id':     np.int32,
+    'product_id':  np.int32,
+    'supplier_id': np.int32,
+    'days':        np.int16,
+    'received':    'datetime64[s]',
+}
+
+
+def _empty():
+    return {k: np.zeros(0, dtype=t) for k, t in COLUMNS.items()}
+
+
+def load(path=STORE_FILE):
+    if not os.path.exists(path):
+        return _empty()
+    with np.load(path) as f:
+        return {k: f[k].astype(t) for k, t in COLUMNS.items()}
+
+
+def save(store, path=STORE_FILE):
+    np.savez_compressed(path, **store)
+
+
+def refresh(models, uid, path=STORE_FILE):
+    """Append receipts done since the last refresh and save. Returns the full store."""
+    store  = load(path)
+    domain = [['picking_type_id.code', '=', 'incoming'], ['state', '=', 'done'],
+              ['purchase_line_id', '!=', False]]
+    if len(store['received']):
+        hwm = str(store['received'].max()).replace('T', ' ')
+        domain.append(['picking_id.date_done', '>=', hwm])   # >= : same-second receipts are deduped below
+    print(f"Refreshing lead-time store ({len(store['days'])} receipts on file)...")
+
+    moves = oc.search_read_all(models, uid, 'stock.move', domain,
+                               ['product_id', 'picking_id', 'purchase_line_id'])
+    known = set(store['move_id'].tolist())
+    moves = [m for m in moves if m.get('picking_id') and m['id'] not in known]
+    if not moves:
+        print("  → up to date")
+        return store
+
+    picks = oc.read_batched(models, uid, 'stock.picking',
+                            {oc.m2o_id(m['picking_id']) for m in moves}, ['date_done'])
+    lines = oc.read_batched(models, uid, 'purchase.order.line',
+                            {oc.m2o_id(m['purchase_line_id']) for m in moves}, ['order_id'])
+    pos   = oc.read_batched(models, uid, 'purchase.order',
+                            {oc.m2o_id(l['order_id']) for l in lines.values()}, ['date_approve', 'partner_id'])
+
+    move_id, prod, sup, approved, received = [], [], [], [], []
+    for m in moves:
+        pick = picks.get(oc.m2o_id(m['picking_id']), {})
+        po   = pos.get(oc.m2o_id(lines.get(oc.m2o_id(m['purchase_line_id']), {}).get('order_id')), {})
+        if not pick.get('date_done') or not po.get('date_approve'):
+            continue
+        move_id.append(m['id'])
+        prod.append(oc.m2o_id(m['product_id']))
+        sup.append(oc.m2o_id(po.get('partner_id')))
+        approved.append(po['date_approve'])
+        received.append(pick['date_done'])
+
+    rec  = oc.to_datetime64(received)
+    days = (rec - oc.to_datetime64(approved)).astype('timedelta64[D]').astype(np.int64)
+    ok   = (days >= 0) & (days <= MAX_DAYS)
+    new  = {
+        'move_id':     np.array(move_id, dtype=np.int32)[ok],
+        'product_id':  np.array(prod, dtype=np.int32)[ok],
+        'supplier_id': np.array(sup, dtype=np.int32)[ok],
+        'days':        days[ok].astype(np.int16),
+        'received':    rec[ok],
+    }
+    store = {k: np.concatenate([store[k], new[k]]) for k in COLUMNS}
+    save(store, path)
+    print(f"  → {len(new['days'])} new receipts, {len(store['days'])} total")
+    return store
+
+
+def percentiles(store, key):
+    """
+    Lead-time distribution per product ('product_id') or supplier ('supplier_id'):
+    {'ids', 'n', 'p50', 'p90'} arrays sorted by id, for lookup().
+    """
+    ids, days = store[key], store['days'].astype(np.float64)
+    order     = np.lexsort((days, ids))
+    ids, days = ids[order], days[order]
+    uniq, start, n = np.unique(ids, return_index=True, return_counts=True)
+
+    def q(p):
+        # np.percentile's linear rule on every sorted group at once: position start + p·(n-1)
+        pos  = start + p * (n - 1)
+        lo   = np.floor(pos).astype(np.int64)
+        hi   = np.minimum(lo + 1, start + n - 1)
+        return days[lo] + (pos - lo) * (days[hi] - days[lo])
+    return {'ids': uniq, 'n': n, 'p50': q(0.5), 'p90': q(0.9)}
+
+
+def moments(store, key):
+    """Mean and variance of lead days per product or supplier: {'ids', 'n', 'mean', 'var'} sorted by id."""
+    uniq, inv, n = np.unique(store[key], return_inverse=True, return_counts=True)
+    days = store['days'].astype(np.float64)
+    mean = np.bincount(inv, weights=days, minlength=len(uniq)) / np.maximum(n, 1)
+    var  = np.bincount(inv, weights=(days - mean[inv]) ** 2, minlength=len(uniq)) / np.maximum(n - 1, 1)
+    return {'ids': uniq, 'n': n, 'mean': mean, 'var': var}
+
+
+def lookup(stats, id_, min_samples=MIN_SAMPLES, fields=('p50', 'p90')):
+    """(n, *fields) for one id, or None when there is not enough history."""
+    i = np.searchsorted(stats['ids'], id_)
+    if i >= len(stats['ids']) or stats['ids'][i] != id_ or stats['n'][i] < min_samples:
+        return None
+    return (int(stats['n'][i]),) + tuple(float(stats[f][i]) for f in fields)
+
+
+def samples(store, key, ids):
+    """
+    Raw lead-time observations for each id in `ids`, as one flat array plus
+    (start, count) per id — a ragged layout that can be indexed vectorized.
+    """
+    order = np.argsort(store[key], kind='stable')
+    keys  = store[key][order]
+    days  = store['days'][order].astype(np.float64)
+    ids   = np.asarray(ids)
+    start = np.searchsorted(keys, ids, side='left')
+    count = np.searchsorted(keys, ids, side='right') - start
+    return days, start, count
@@ -0,0 +1,226 @@
+import openpyxl
+import odoo_config as cfg
+import odoo_client as oc
+import odoo_serials
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from datetime import datetime, timezone
+
+# ================================================================
+# CONFIG
+# ================================================================
+FIELD_BUCKETS = [(0, 6, '0-6 mo'), (6, 12, '6-12 mo'), (12, 24, '12-24 mo'),
+                 (24, 36, '24-36 mo'), (36, 9999, '36+ mo')]
+MIN_BATCH_UNITS = 5     # batches smaller than this are not flagged as outliers
+OUTLIER_FACTOR  = 2.0   # flag batches whose repair rate is > 2× the fleet rate
+
+# ================================================================
+# HELPERS
+# ================================================================
+def make_fill(hex):    return PatternFill("solid", fgColor=hex)
+def thin_border():
+    s = Side(style='thin')
+    return Border(left=s, right=s, top=s, bottom=s)
+
+def style_row(ws, row_num, num_cols, fill, left_cols=None):
+    for col in range(1, num_cols + 1):
+        c = ws.cell(row=row_num, column=col)
+        c.fill   = fill
+        c.border = thin_border()
+        c.alignment = Alignment(
+            horizontal="left" if left_cols and col in left_cols else "center",
+            vertical="center"
+        )
+
+def write_title(ws, title, subtitle, num_cols):
+    ws.append([title])
+    ws.merge_cells(f"A1:{get_column_letter(num_cols)}1")
+    ws["A1"].font      = Font(bold=True, size=16, color="FFFFFF")
+    ws["A1"].fill      = make_fill(MAIN_COLOR)
+    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws.row_dimensions[1].height = 26
+    ws.append([subtitle])
+    ws.merge_cells(f"A2:{get_column_letter(num_cols)}2")
+    ws["A2"].font      = Font(italic=True)
+    ws["A2"].alignment = Alignment(horizontal="center")
+    ws.append([])
+
+def write_section_title(ws, title, color, num_cols):
+    ws.append([title])
+    r = ws.max_row
+    ws.merge_cells(f"A{r}:{get_column_letter(num_cols)}{r}")
+    ws.cell(row=r, column=1).font      = Font(bold=True, size=12, color="FFFFFF")
+    ws.cell(row=r, column=1).fill      = make_fill(color)
+    ws.cell(row=r, column=1).alignment = Alignment(horizontal="left", vertical="center")
+    ws.row_dimensions[r].height = 18
+
+def write_headers(ws, headers, color):
+    ws.append(headers)
+    r = ws.max_row
+    for col, h in enumerate(headers, 1):
+        c = ws.cell(row=r, column=col)
+        c.font      = Font(color="FFFFFF", bold=True, size=10)
+        c.fill      = make_fill(color)
+        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        c.border    = thin_border()
+    ws.row_dimensions[r].height = 30
+
+def field_bucket(months):
+    for lo, hi, label in FIELD_BUCKETS:
+        if lo <= months < hi:
+            return label
+    return FIELD_BUCKETS[-1][2]
+
+def rollup(serials, key):
+    """Group serials by key(row) → shipped / ticketed / repaired counts and rates."""
+    agg = {}
+    for s in serials:
+        a = agg.setdefault(key(s), {'shipped': 0, 'ticketed': 0, 'repaired': 0, 'repairs': 0})
+        a['shipped']  += 1
+        a['ticketed'] += 1 if s['n_tickets'] else 0
+        a['repaired'] += 1 if s['n_repairs'] else 0
+        a['repairs']  += s['n_repairs']
+    for a in agg.values():
+        a['ticket_rate'] = round(a['ticketed'] / a['shipped'] * 100, 2)
+        a['repair_rate'] = round(a['repaired'] / a['shipped'] * 100, 2)
+    return agg
+
+MAIN_COLOR = "2E4057"
+RATE_HEADERS = ["Shipped", "# With Ticket", "Ticket Rate %", "# Repaired", "Repair Rate %", "Total Repairs"]
+
+def rate_cells(a):
+    return [a['shipped'], a['ticketed'], a['ticket_rate'], a['repaired'], a['repair_rate'], a['repairs']]
+
+def rate_fill(rate, fleet_rate):
+    if fleet_rate and rate > fleet_rate * OUTLIER_FACTOR: return make_fill("FFB3B3")
+    if fleet_rate and rate > fleet_rate:                  return make_fill("FFD9B3")
+    return make_fill("E2EFDA")
+
+try:
+    print("Connecting to Odoo...")
+    models, uid = oc.connect()
+    print("Connected!\n")
+
+    now = datetime.now(timezone.utc)
+
+    serials = odoo_serials.load_installed_base(models, uid)
+    print(f"  → {len(serials)} shipped serials\n")
+
+    for s in serials:
+        shipped = datetime.strptime(s['delivered'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        s['_months'] = (now - shipped).days / 30.44
+        s['_bucket'] = field_bucket(s['_months'])
+
+    fleet      = rollup(serials, lambda s: 'All')['All'] if serials else None
+    fleet_rate = fleet['repair_rate'] if fleet else 0
+    by_device  = rollup(serials, lambda s: s['device'])
+    by_ref     = rollup(serials, lambda s: (s['device'], s['ref']))
+    by_batch   = rollup(serials, lambda s: (s['batch'], s['ref'], s['device']))
+    by_bucket  = rollup(serials, lambda s: (s['_bucket'], s['device']))
+    batch_produced = {}
+    for s in serials:
+        k = (s['batch'], s['ref'], s['device'])
+        if s['produced'] and (k not in batch_produced or s['produced'] < batch_produced[k]):
+            batch_produced[k] = s['produced']
+
+    # ================================================================
+    # BUILD EXCEL
+    # ================================================================
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    # ================================================================
+    # SHEET 1 — SUMMARY
+    # ================================================================
+    ws = wb.create_sheet("Summary")
+    ws.column_dimensions["A"].width = 22
+    ws.column_dimensions["B"].width = 14
+    for i in range(3, 10):
+        ws.column_dimensions[get_column_letter(i)].width = 14
+    write_title(ws, "Field Failure Rates — Shipped Serials",
+                f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
+                f"Serials shipped: {len(serials)}   |   Fleet repair rate: {fleet_rate}%", 8)
+
+    write_section_title(ws, "  📦  By Device Line", MAIN_COLOR, 7)
+    write_headers(ws, ["Device"] + RATE_HEADERS, MAIN_COLOR)
+    for device in cfg.DEVICE_LINES:
+        if device in by_device:
+            ws.append([device] + rate_cells(by_device[device]))
+            style_row(ws, ws.max_row, 7, rate_fill(by_device[device]['repair_rate'], fleet_rate), left_cols=[1])
+    ws.append([])
+
+    write_section_title(ws, "  🏷  By Product", MAIN_COLOR, 8)
+    write_headers(ws, ["Device", "Product Ref"] + RATE_HEADERS, MAIN_COLOR)
+    for (device, ref), a in sorted(by_ref.items(), key=lambda x: (x[0][0], -x[1]['shipped'])):
+        ws.append([device, ref] + rate_cells(a))
+        style_row(ws, ws.max_row, 8, rate_fill(a['repair_rate'], fleet_rate), left_cols=[1, 2])
+    ws.append([])
+
+    # ================================================================
+    # SHEET 2 — BY PRODUCTION BATCH
+    # ================================================================
+    ws2 = wb.create_sheet("By Production Batch")
+    for i, w in enumerate([22, 12, 10, 14] + [14] * 6, 1):
+        ws2.column_dimensions[get_column_letter(i)].width = w
+    write_title(ws2, "Failure Rate by Production Batch (Manufacturing Order)",
+                f"Red = repair rate > {OUTLIER_FACTOR:g}× fleet ({fleet_rate}%) with ≥ {MIN_BATCH_UNITS} units   |   "
+                f"'Unknown' = serial not traced to a production order", 10)
+    write_headers(ws2, ["Batch (MO)", "Product Ref", "Device", "Produced"] + RATE_HEADERS, MAIN_COLOR)
+    ws2.freeze_panes = "A5"
+    for (batch, ref, device), a in sorted(by_batch.items(),
+                                          key=lambda x: (-x[1]['repair_rate'], -x[1]['shipped'])):
+        fill = rate_fill(a['repair_rate'], fleet_rate) if a['shipped'] >= MIN_BATCH_UNITS \
+               else make_fill("F2F2F2")
+        ws2.append([batch, ref, device, batch_produced.get((batch, ref, device), '')[:10]] + rate_cells(a))
+        style_row(ws2, ws2.max_row, 10, fill, left_cols=[1, 2])
+
+    # ================================================================
+    # SHEET 3 — BY MONTHS IN FIELD
+    # ================================================================
+    ws3 = wb.create_sheet("By Months in Field")
+    for i, w in enumerate([16, 12] + [14] * 6, 1):
+        ws3.column_dimensions[get_column_letter(i)].width = w
+    write_title(ws3, "Failure Rate by Months in Field (since first delivery)",
+                f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   Cohorts by age of the unit today", 8)
+    for device in cfg.DEVICE_LINES:
+        write_section_title(ws3, f"  {device}", MAIN_COLOR, 8)
+        write_headers(ws3, ["Months in Field", "Device"] + RATE_HEADERS, MAIN_COLOR)
+        for _, _, label in FIELD_BUCKETS:
+            a = by_bucket.get((label, device))
+            if not a:
+                continue
+            ws3.append([label, device] + rate_cells(a))
+            style_row(ws3, ws3.max_row, 8, rate_fill(a['repair_rate'], fleet_rate), left_cols=[1, 2])
+        ws3.append([])
+
+    # ================================================================
+    # SHEET 4 — FAILED SERIALS
+    # ================================================================
+    ws4 = wb.create_sheet("Failed Serials")
+    for i, w in enumerate([18, 12, 10, 22, 12, 22, 12, 14, 10, 14, 10], 1):
+        ws4.column_dimensions[get_column_letter(i)].width = w
+    failed = [s for s in serials if s['n_tickets'] or s['n_repairs']]
+    write_title(ws4, f"Serials with a Ticket or Repair after Delivery — {len(failed)}",
+                f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC", 11)
+    write_headers(ws4, ["Serial", "Product Ref", "Device", "Batch (MO)", "Produced", "Delivery",
+                        "Delivered", "First Ticket", "# Tickets", "First Repair", "# Repairs"], MAIN_COLOR)
+    ws4.freeze_panes = "A5"
+    for s in sorted(failed, key=lambda x: (-x['n_repairs'], -x['n_tickets'], x['serial'])):
+        ws4.append([s['serial'], s['ref'], s['device'], s['batch'], s['produced'][:10], s['delivery'],
+                    s['delivered'][:10], s['first_ticket'][:10], s['n_tickets'],
+                    s['first_repair'][:10], s['n_repairs']])
+        style_row(ws4, ws4.max_row, 11, make_fill("FFD9B3" if s['n_repairs'] else "FFF2CC"),
+                  left_cols=[1, 2, 4, 6])
+
+    output_file = f"lot_failure_report_{now.strftime('%Y%m%d_%H%M')}.xlsx"
+    wb.save(output_file)
+    print(f"\nExcel report saved: {output_file}")
+    print(f"  Serials: {len(serials)}  |  Fleet repair rate: {fleet_rate}%")
+    print("=== Done ===")
+
+except Exception as e:
+    import traceback
+    print(f"\nERROR: {e}")
+    traceback.print_exc()
+
+input("\nPress Enter to close...")
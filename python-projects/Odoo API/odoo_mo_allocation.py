@@ -0,0 +1,53 @@
+import numpy as np
+import odoo_client as oc
+
+# ================================================================
+# OPEN-MO COMPONENT ALLOCATION — on-hand stock handed to MOs first come, first served
+# ================================================================
+# Every open raw-material move of every open MO (not only the plan products —
+# they all draw on the same stock) comes in one paginated stock.move pull.
+# Stock is allocated per component in planned-date order with one sort and
+# one cumulative sum: a move gets min(need, stock - need of earlier moves).
+OPEN_MO_STATES = ['draft', 'confirmed', 'progress', 'to_close']
+
+
+def fetch_raw_moves(models, uid):
+    """Open raw-material moves of open MOs → {'mo_id', 'product_id', 'need', 'date'} arrays."""
+    moves = oc.search_read_all(models, uid, 'stock.move',
+        [['raw_material_production_id.state', 'in', OPEN_MO_STATES],
+         ['state', 'not in', ['done', 'cancel']]],
+        ['raw_material_production_id', 'product_id', 'product_qty', 'quantity_done', 'date']
+    )
+    return {
+        'mo_id':      np.array([oc.m2o_id(m['raw_material_production_id']) for m in moves], dtype=np.int32),
+        'product_id': np.array([oc.m2o_id(m['product_id']) for m in moves], dtype=np.int32),
+        'need':       np.array([max((m['product_qty'] or 0.0) - (m['quantity_done'] or 0.0), 0.0)
+                                for m in moves], dtype=np.float64),
+        'date':       oc.to_datetime64([m['date'] for m in moves]),
+    }
+
+
+def allocate(moves, stock_by_prod):
+    """
+    Returns (allocated, short) arrays aligned with `moves`. Earlier planned date
+    wins; same date → lower MO id. Moves without a date go last.
+    """
+    n = len(moves['need'])
+    if not n:
+        return np.zeros(0), np.zeros(0)
+    date  = moves['date'].astype(np.int64)
+    date  = np.where(np.isnat(moves['date']), np.iinfo(np.int64).max, date)
+    order = np.lexsort((moves['mo_id'], date, moves['product_id']))
+    pid   = moves['product_id'][order]
+    need  = moves['need'][order]
+
+    start = np.flatnonzero(np.r_[True, pid[1:] != pid[:-1]])                # first move of each component
+    grp   = np.cumsum(np.r_[True, pid[1:] != pid[:-1]]) - 1
+    cum   = np.cumsum(need)
+    before = cum - need - (cum[start] - need[start])[grp]                    # need of earlier moves, same component
+    stock = np.array([stock_by_prod.get(p, 0.0) for p in pid[start].tolist()])[grp]
+
+    alloc_sorted = np.clip(stock - before, 0.0, need)
+    allocated = np.empty(n)
+    allocated[order] = alloc_sorted
+    return allocated, moves['need'] - allocated
@@ -0,0 +1,66 @@
+import numpy as np
+import odoo_client as oc
+import odoo_demand as dm
+
+# ================================================================
+# MPS DEMAND — Master Production Schedule forecast as a products × months matrix
+# ================================================================
+# mrp.production.schedule.forecast holds one row per (schedule, period) with
+# the forecast qty; the schedule carries the product. All rows for all plan
+# products come in one paginated pull and are pivoted per calendar month
+# (weekly MPS periods are summed into their month). A product with no MPS
+# rows in the horizon keeps its static MONTHLY_PRODUCTION_PLAN rate.
+
+
+def fetch_forecast(models, uid, product_ids):
+    """MPS forecast rows of `product_ids` → {'product_id', 'qty', 'date'} arrays."""
+    rows = oc.search_read_all(models, uid, 'mrp.production.schedule.forecast',
+        [['production_schedule_id.product_id', 'in', list(product_ids)]],
+        ['production_schedule_id', 'date', 'forecast_qty'])
+    sched = oc.read_batched(models, uid, 'mrp.production.schedule',
+                            {oc.m2o_id(r['production_schedule_id']) for r in rows}, ['product_id'])
+    return {
+        'product_id': np.array([oc.m2o_id(sched.get(oc.m2o_id(r['production_schedule_id']), {}).get('product_id'))
+                                for r in rows], dtype=np.int32),
+        'qty':        np.array([r['forecast_qty'] or 0.0 for r in rows], dtype=np.float64),
+        'date':       np.array([str(r['date'])[:10] for r in rows], dtype='datetime64[D]'),
+    }
+
+
+def static_matrix(plan, refs, months):
+    """The flat MONTHLY_PRODUCTION_PLAN as the same refs × months matrix."""
+    return np.repeat(np.array([[plan.get(r, 0)] for r in refs], dtype=np.float64), months, axis=1)
+
+
+def demand_matrix(models, uid, plan, start, months):
+    """
+    plan — {ref: static monthly qty}: the products in scope and the fallback rate.
+    Returns (refs, refs × months matrix starting at the month of `start`, {ref: 'MPS' / 'static'}).
+    """
+    refs  = list(plan)
+    prods = oc.execute(models, uid, 'product.product', 'search_read',
+                       [[['default_code', 'in', refs]]], {'fields': ['default_code']})
+    id_of = {p['default_code']: p['id'] for p in prods}
+    print("Loading MPS forecast...")
+    fc = fetch_forecast(models, uid, id_of.values())
+    ids, mat = dm.period_matrix(fc, id_of.values(), start, months, unit='M')
+
+    # Has MPS rows in the horizon (even zero qty) → MPS drives it
+    slot  = (fc['date'].astype('datetime64[M]') - np.datetime64(start, 'M')).astype(np.int64)
+    in_h  = set(fc['product_id'][(slot >= 0) & (slot < months)].tolist())
+    out    = static_matrix(plan, refs, months)
+    source = {}
+    for i, ref in enumerate(refs):
+        pid = id_of.get(ref)
+        if pid in in_h:
+            out[i] = mat[np.searchsorted(ids, pid)]
+        source[ref] = 'MPS' if pid in in_h else 'static'
+    print(f"  → {len(fc['qty'])} forecast rows, {sum(s == 'MPS' for s in source.values())} of {len(refs)} "
+          f"products from MPS")
+    return refs, out, source
+
+
+def monthly_rates(refs, mat, months=None):
+    """{ref: average monthly qty} over the first `months` columns — for plans that use one rate."""
+    m = mat[:, :months] if months else mat
+    return {ref: round(float(m[i].mean()), 2) if m.shape[1] else 0.0 for i, ref in enumerate(refs)}
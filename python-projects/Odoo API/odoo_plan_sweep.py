@@ -0,0 +1,79 @@
+import numpy as np
+from itertools import product
+
+# ================================================================
+# PARAMETER SWEEP — every (plan, coverage, reorder, rounding) combination
+# evaluated on the same fetched data in one broadcast pass:
+#   components × plan scenarios × parameter sets
+# ================================================================
+DAYS_PER_MONTH = 30.44
+
+
+def bom_matrix(comp_ids, refs, bom_per_prod):
+    """Components × finished refs matrix of qty per unit (exploded BOMs)."""
+    row = {c: i for i, c in enumerate(comp_ids)}
+    B   = np.zeros((len(comp_ids), len(refs)))
+    for j, ref in enumerate(refs):
+        for comp_id, qty in bom_per_prod.get(ref, {}).items():
+            if comp_id in row:
+                B[row[comp_id], j] += qty
+    return B
+
+
+def sweep(available, price, lead_days, min_qty, B, refs, plans, coverage, reorder, round_to, rop_months=None):
+    """
+    available / price / lead_days / min_qty — one entry per component
+    B — bom_matrix(); plans — {scenario name: {ref: monthly qty}}
+    coverage / reorder / round_to — lists of values to combine
+    rop_months — optional per-component reorder point in months of demand (service-level policy:
+      lead-time demand + safety stock, both proportional to demand). With it, `coverage` is the
+      order cycle on top of each part's reorder point and `reorder` shifts that point.
+    Returns one dict per (plan, coverage, reorder, round_to) with order value,
+    parts to order, critical parts and coverage after ordering.
+    """
+    names  = list(plans)
+    P      = np.array([[plans[n].get(r, 0) for n in names] for r in refs], dtype=np.float64)
+    M      = (B @ P)[:, :, None]                                   # C × S × 1 monthly demand
+    grid   = np.array(list(product(coverage, reorder, round_to)), dtype=np.float64)
+    cov, rop, rnd = grid[:, 0], grid[:, 1], grid[:, 2]             # K
+
+    avail  = np.asarray(available, dtype=np.float64)[:, None, None]
+    price  = np.asarray(price, dtype=np.float64)[:, None, None]
+    lead   = np.asarray(lead_days, dtype=np.float64)[:, None, None]
+    minq   = np.asarray(min_qty, dtype=np.float64)[:, None, None]
+    base   = 0.0 if rop_months is None else np.asarray(rop_months, dtype=np.float64)[:, None, None]
+
+    raw    = np.maximum(M * (base + cov) - avail, 0.0)             # C × S × K
+    order  = np.where(raw > 0, np.ceil(np.maximum(raw, minq) / rnd) * rnd, 0.0)
+    used   = M > 0
+    safe_M = np.where(used, M, 1.0)
+    days   = np.where(used, avail / safe_M * DAYS_PER_MONTH, np.inf)
+    crit   = (order > 0) & (days < lead)
+    below  = used & (avail <= M * (base + rop))
+    after  = np.where(used, (avail + order) / safe_M, np.nan)
+
+    value    = (order * price).sum(axis=0)                          # S × K
+    n_order  = (order > 0).sum(axis=0)
+    n_crit   = crit.sum(axis=0)
+    n_below  = np.broadcast_to(below, order.shape).sum(axis=0)
+    after_m  = np.where(np.isnan(after), np.inf, after)
+    cov_min  = after_m.min(axis=0)
+    with np.errstate(all='ignore'):
+        cov_med = np.nanmedian(np.broadcast_to(after, order.shape), axis=0)
+
+    rows = []
+    for s, name in enumerate(names):
+        for k in range(len(grid)):
+            rows.append({
+                'plan':      name,
+                'coverage':  float(cov[k]),
+                'reorder':   float(rop[k]),
+                'round_to':  int(rnd[k]),
+                'value':     float(value[s, k]),
+                'n_order':   int(n_order[s, k]),
+                'n_crit':    int(n_crit[s, k]),
+                'n_below':   int(n_below[s, k]),
+                'cov_med':   float(cov_med[s, k]) if np.isfinite(cov_med[s, k]) else None,
+                'cov_min':   float(cov_min[s, k]) if np.isfinite(cov_min[s, k]) else None,
+            })
+    return rows
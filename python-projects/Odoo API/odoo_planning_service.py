@@ -0,0 +1,287 @@
+import io
+import os
+import json
+import time
+import argparse
+import threading
+import numpy as np
+import odoo_config as cfg
+import odoo_client as oc
+import odoo_frames as fr
+import odoo_bom_index as bix
+import odoo_run_delta as dl
+import odoo_fetch_planner as fp
+import odoo_report_datasets as rd
+from collections import defaultdict, Counter
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# ================================================================
+# Planning service — warm Odoo data, answers over a local HTTP API
+#   python odoo_planning_service.py --port 8766 --refresh 10
+#   GET /po_plan            component order plan (?status=urgent|soon|order|ok, ?ref=...)
+#   GET /buildable          units buildable from free stock per plan product (?product=ref)
+#   GET /helpdesk           open tickets per division × stage
+#   GET /repair             active RMAs per division / state / age, top tags
+#   GET /<report>.xlsx      the latest regenerated workbook (po_plan, helpdesk, repair)
+#   GET /health             last refresh, dataset sizes, shared-fetch stats
+#   GET /refresh            refresh now instead of waiting for the schedule
+# One authenticated connection and the report datasets stay in memory. Every
+# --refresh minutes only rows changed since the last sync are pulled, the
+# reports are re-run in-process on the shared data and the answers swapped in,
+# so a request is a dict lookup — never a trip to Odoo.
+# ================================================================
+SERVED = ['po_plan', 'helpdesk', 'repair']
+
+parser = argparse.ArgumentParser(description="Resident planning service")
+parser.add_argument('--port',    type=int, default=8766)
+parser.add_argument('--refresh', type=int, default=10, help="Incremental refresh interval (minutes)")
+parser.add_argument('--workers', type=int, default=fp.WORKERS, help="Parallel fetches")
+args = parser.parse_args()
+
+here = os.path.dirname(os.path.abspath(__file__))
+os.chdir(here)
+dl.RUNNER = 'service'   # the --refresh runs keep their own "What Changed" history, apart from the daily runs
+
+
+# ================================================================
+# SUMMARIES — JSON views of a report run's globals
+# ================================================================
+PO_KEYS = ['ref', 'name', 'supplier', 'status', 'order_qty', 'order_by_date', 'reorder_date', 'stock',
+           'incoming', 'available', 'monthly_req', 'coverage_now', 'coverage_after', 'lead_days',
+           'min_qty', 'price', 'price_curr', 'est_value', 'urgent', 'soon', 'no_order']
+
+
+def summarize_po_plan(g):
+    rows = [{k: r.get(k) for k in PO_KEYS} for r in g['plan_rows']]
+    return {
+        'generated':   g['now'].isoformat(),
+        'urgent':      g['cnt_urgent'],
+        'soon':        g['cnt_soon'],
+        'to_plan':     g['cnt_plan'],
+        'ok':          g['cnt_ok'],
+        'total_value': round(g['total_value'], 2),
+        'rows':        rows,
+    }
+
+
+def summarize_helpdesk(g):
+    now   = g['now']
+    F     = fr.frame(g['all_tickets'], {'team_id': 'm2o', 'stage_id': 'm2o', 'user_id': 'm2o',
+                                        'create_date': 'datetime'})
+    teams = {t['id']: t['name'] for t in g['all_teams']}
+    team_ids, team_code = np.unique(F['team_id_id'], return_inverse=True)
+    divs  = np.array([teams.get(i, '') for i in team_ids.tolist()], dtype=str)
+    stage_code, stages  = fr.recode(F['stage_id'], F['cats']['stage_id'], {fr.EMPTY: 'Unknown'})
+    open_ = ~np.isin(stages[stage_code], list(cfg.CLOSED_STAGES))
+    # One group per (division, stage) pair of the open tickets
+    cells, cell = np.unique((team_code.astype(np.int64) * len(stages) + stage_code)[open_], return_inverse=True)
+    days  = fr.age_days(F['create_date'], now)[open_]
+    n     = np.bincount(cell, minlength=len(cells))
+    most  = np.zeros(len(cells), dtype=np.int64)
+    np.maximum.at(most, cell, days)
+    total = np.bincount(cell, weights=days, minlength=len(cells))
+    old   = np.bincount(cell, weights=days > 30, minlength=len(cells))
+    unass = np.bincount(cell, weights=F['user_id_id'][open_] == 0, minlength=len(cells))
+    rows  = [{'division': str(divs[c // len(stages)]), 'stage': str(stages[c % len(stages)]), 'tickets': int(n[i]),
+              'avg_days_open': round(total[i] / n[i], 1), 'max_days_open': int(most[i]),
+              'over_30_days': int(old[i]), 'unassigned': int(unass[i])}
+             for i, c in enumerate(cells.tolist())]
+    order = g['stage_order']
+    return {
+        'generated': now.isoformat(),
+        'open':      int(open_.sum()),
+        'stages':    sorted(rows, key=lambda r: (r['division'], order.get(r['stage'], 99))),
+    }
+
+
+def summarize_repair(g):
+    F       = g['F']
+    by_cell = Counter(zip(F['_division'].tolist(), F['_state_label'].tolist()))
+    return {
+        'generated':   g['now'].isoformat(),
+        'active':      g['total_active'],
+        'last_30d':    int(g['repairs_30'].sum()),
+        'last_90d':    int(g['repairs_90'].sum()),
+        'by_state':    [{'division': d, 'state': s, 'repairs': n}
+                        for (d, s), n in sorted(by_cell.items())],
+        'by_age':      dict(Counter(F['_bucket'].tolist())),
+        'by_device':   dict(Counter(F['_device'].tolist())),
+        'top_tags':    g['count_tags'](F).most_common(10),
+        'trending':    [{'tag': t, **v} for t, v in g['top_trending']],
+    }
+
+
+SUMMARIES = {'po_plan': summarize_po_plan, 'helpdesk': summarize_helpdesk, 'repair': summarize_repair}
+
+
+def buildable_units(index, quants):
+    """Per plan product: free finished stock and units buildable from free components (one BOM level)."""
+    free = defaultdict(float)
+    for q in quants:
+        free[oc.m2o_id(q['product_id'])] += q['quantity'] - q['reserved_quantity']
+    children = defaultdict(list)
+    for comp, ups in index['used_in'].items():
+        for parent, qty in ups:
+            children[parent].append((comp, qty))
+    pid_of = {p[0]: pid for pid, p in index['products'].items() if p[0]}
+    out = []
+    for ref in cfg.ALL_PLAN_PRODUCTS:
+        pid   = pid_of.get(ref)
+        comps = [(c, q) for c, q in children.get(pid, ()) if q > 0]
+        units = [(max(free.get(c, 0.0), 0.0) // q, c) for c, q in comps]
+        can, limit = min(units) if units else (0, None)
+        out.append({
+            'product':   ref,
+            'name':      index['products'].get(pid, ['', ''])[1],
+            'free':      round(free.get(pid, 0.0), 2),
+            'buildable': int(can),
+            'limited_by': index['products'].get(limit, [''])[0] if limit else '',
+        })
+    return out
+
+
+# ================================================================
+# STATE + REFRESH
+# ================================================================
+print("Connecting to Odoo...")
+models, uid = oc.connect()
+print("Connected!\n")
+planner  = fp.FetchPlanner(models, uid, workers=args.workers)
+lock     = threading.Lock()     # guards `state`
+run_lock = threading.Lock()     # one refresh / report run at a time
+state    = {'refreshed': None, 'reports': {}, 'buildable': [], 'refresh_seconds': None}
+
+
+def regenerate():
+    """Re-run the served reports on the planner's data and swap in their answers."""
+    t0      = time.perf_counter()
+    index   = bix.load(models, uid)
+    reports = {}
+    for name in SERVED:
+        log = io.StringIO()
+        t1  = time.perf_counter()
+        g   = fp.run_report(planner, os.path.join(here, rd.REPORTS[name][0]), log=log)
+        old = state['reports'].get(name, {})
+        try:
+            entry = {'json': SUMMARIES[name](g), 'xlsx': g['output_file'], 'error': None}
+        except (KeyError, TypeError, ValueError) as e:
+            # The script caught its own exception and printed it — keep the last good answer
+            tail  = log.getvalue().strip().splitlines()[-15:]
+            entry = dict(old, error=f"{name} failed ({e!r}): " + ' | '.join(tail))
+        entry['seconds'] = round(time.perf_counter() - t1, 2)
+        if old.get('xlsx') and old['xlsx'] != entry.get('xlsx') and os.path.exists(old['xlsx']):
+            os.remove(old['xlsx'])      # keep only the latest workbook per report
+        reports[name] = entry
+    fresh = {
+        'refreshed':       datetime.now(timezone.utc).isoformat(),
+        'reports':         reports,
+        'buildable':       buildable_units(index, planner.results.get('quants', [])),
+        'refresh_seconds': round(time.perf_counter() - t0, 2),
+    }
+    with lock:
+        state.update(fresh)
+
+
+def refresh():
+    with run_lock:
+        try:
+            planner.refresh()
+            regenerate()
+        except Exception as e:
+            print(f"Refresh failed: {e}")
+
+
+def scheduler():
+    while True:
+        time.sleep(args.refresh * 60)
+        refresh()
+
+
+# ================================================================
+# HTTP
+# ================================================================
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url  = urlparse(self.path)
+        q    = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.strip('/')
+        with lock:
+            s = dict(state)
+        if path.endswith('.xlsx'):
+            return self.send_xlsx(s['reports'].get(path[:-5], {}).get('xlsx'))
+        if path in ('po_plan', 'helpdesk', 'repair'):
+            rep = s['reports'].get(path, {})
+            if not rep.get('json'):
+                return self.reply(503, {'error': rep.get('error') or f"{path} not built yet"})
+            body = rep['json']
+            if path == 'po_plan':
+                rows = body['rows']
+                if q.get('ref'):
+                    rows = [r for r in rows if r['ref'] == q['ref']]
+                status = q.get('status')
+                if status == 'urgent': rows = [r for r in rows if r['urgent']]
+                elif status == 'soon': rows = [r for r in rows if r['soon']]
+                elif status == 'ok':   rows = [r for r in rows if r['no_order']]
+                elif status == 'order': rows = [r for r in rows if not r['no_order']]
+                body = dict(body, rows=rows)
+            return self.reply(200, dict(body, stale_error=rep.get('error')) if rep.get('error') else body)
+        if path == 'buildable':
+            rows = s['buildable']
+            if q.get('product'):
+                rows = [r for r in rows if r['product'] == q['product']]
+                if not rows:
+                    return self.reply(404, {'error': f"{q['product']} is not a plan product"})
+            return self.reply(200, {'refreshed': s['refreshed'], 'products': rows})
+        if path == 'health':
+            return self.reply(200, {
+                'refreshed':       s['refreshed'],
+                'refresh_seconds': s['refresh_seconds'],
+                'reports':         {n: {k: r.get(k) for k in ('xlsx', 'seconds', 'error')}
+                                    for n, r in s['reports'].items()},
+                'datasets':        {f"{d['model']} {sorted(d['names']) or ''}".strip(): len(d['rows'])
+                                    for d in planner.datasets},
+                'fetch':           planner.summary(),
+            })
+        if path == 'refresh':
+            if run_lock.locked():
+                return self.reply(409, {'error': 'a refresh is already running'})
+            threading.Thread(target=refresh, daemon=True).start()
+            return self.reply(202, {'refresh': 'started'})
+        self.reply(404, {'error': 'use /po_plan, /buildable, /helpdesk, /repair, /<report>.xlsx, '
+                                  '/health or /refresh'})
+
+    def reply(self, status, body):
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_xlsx(self, path):
+        if not path or not os.path.exists(path):
+            return self.reply(404, {'error': 'no workbook for that report yet'})
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(path)}"')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *a):
+        pass
+
+
+print(f"Loading datasets for: {', '.join(SERVED)}")
+planner.prefetch([s for n in SERVED for s in rd.REPORTS[n][1]])
+with run_lock:
+    regenerate()
+for n, r in state['reports'].items():
+    print(f"  {n:<10} {r.get('seconds', 0):>6.1f}s  {r.get('error') or r.get('xlsx')}")
+threading.Thread(target=scheduler, daemon=True).start()
+print(f"\nPlanning service on http://127.0.0.1:{args.port}  (refresh every {args.refresh} min)")
+ThreadingHTTPServer(('127.0.0.1', args.port), Handler).serve_forever()
@@ -1,8 +1,24 @@
 import xmlrpc.client
+import time
 import openpyxl
+import numpy as np
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_dataset_export as dx
+import odoo_bom_index as bix
+import odoo_lead_times as lt
+import odoo_demand as dm
+import odoo_stockout_sim as sim
+import odoo_plan_sweep as sweep
+import odoo_vendor_optimizer as vopt
+import odoo_fx as fx
+import odoo_price_history as ph
+import odoo_po_writeback as wbk
+import odoo_mps as mps
+import odoo_run_delta as dl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.comments import Comment
 from collections import defaultdict
 from datetime import datetime, timezone, date, timedelta
 from math import ceil
@@ -14,10 +30,47 @@ PLAN_PRODUCTS           = cfg.ALL_PLAN_PRODUCTS
 KANBAN_SUPPLIERS        = cfg.KANBAN_SUPPLIERS
 
 MONTHLY_PLAN  = cfg.MONTHLY_PRODUCTION_PLAN  # 101336:150, 101711:40, 101769:20, 102237:20
+MPS_RATE_MONTHS = 6   # cfg.DEMAND_SOURCE = 'mps': monthly rate = average MPS forecast over this many months
 
-COVERAGE_TARGET  = 7   # months to have on hand after ordering (6mo + 1mo safety)
-REORDER_POINT    = 3   # order when coverage drops below this (months)
+STOCK_POLICY     = 'service_level'  # 'service_level' = per-part safety stock / reorder point, 'fixed' = months below
+COVERAGE_TARGET  = 7   # months to have on hand after ordering (6mo + 1mo safety)   — 'fixed' policy
+REORDER_POINT    = 3   # order when coverage drops below this (months)               — 'fixed' policy
+SERVICE_LEVEL    = 0.95  # probability of no stockout during a replenishment lead time — 'service_level' policy
+ORDER_CYCLE_MONTHS = 6   # demand each order covers on top of the reorder point        — 'service_level' policy
 ROUND_TO         = 50  # round order qty up to nearest N
+LEAD_TIME_SOURCE = 'p90'  # 'p90' = P90 of actual receipts (lead_time_store.npz), 'configured' = supplierinfo delay
+
+SIMULATION_PATHS      = 10000  # Monte Carlo paths per component (0 = skip the simulation)
+DEMAND_HISTORY_MONTHS = 24     # consumption history used for demand variability
+ROLLING_WEEKS         = 26     # trailing window for weekly demand mean / variance
+DEFAULT_DEMAND_CV     = 0.6    # weekly demand variability when a part has no consumption history
+
+# Sweep mode — evaluate every combination below on the same Odoo data (one run instead of
+# editing the constants and re-running). Adds a "🎛 Scenario Sweep" sheet. Uses STOCK_POLICY:
+# 'fixed' sweeps coverage target × reorder point, 'service_level' keeps each part's safety stock
+# and reorder point and sweeps the order cycle × a shift of the reorder point.
+SWEEP_MODE      = False
+SWEEP_COVERAGE  = [5, 6, 7, 8]     # months — 'fixed'
+SWEEP_REORDER   = [2, 3, 4]        # months — 'fixed'
+SWEEP_CYCLE     = [4, 5, 6, 7, 8]  # months ordered on top of the reorder point — 'service_level'
+SWEEP_ROP_SHIFT = [-1, 0, 1]       # months added to every part's reorder point  — 'service_level'
+SWEEP_ROUND_TO  = [25, 50, 100]
+SWEEP_PLANS    = {                 # multiplier on the monthly plan, or an explicit {ref: qty/mo}
+    'Current plan': 1.0,
+    'Plan -20%':    0.8,
+    'Plan +20%':    1.2,
+}
+
+# Write-back — one draft purchase.order per supplier with every part to order. Re-running in the
+# same month rewrites that month's drafts (matched on Source Document) instead of adding new ones.
+CREATE_DRAFT_POS = False
+WRITE_BACK_DRY_RUN = True   # True = only report what would be created / updated
+
+# Delta — each run saves a snapshot of its plan rows (odoo_run_delta) and a "🔄 What Changed"
+# sheet lists the differences with the previous run: new criticals, resolved parts, qty swings.
+DELTA_SHEET     = True
+DELTA_SWING_PCT = 0.25   # order qty swing = change of at least this share of the previous qty ...
+DELTA_SWING_MIN = 50     # ... and at least this many units
 
 # ================================================================
 # HELPERS
@@ -96,6 +149,14 @@ try:
     now = datetime.now(timezone.utc)
     today = now.date()
 
+    # --- Finished-goods demand: static plan or MPS forecast ---
+    DEMAND_STR = "Static monthly plan"
+    if cfg.DEMAND_SOURCE == 'mps':
+        mps_refs, mps_mat, mps_source = mps.demand_matrix(models, uid, MONTHLY_PLAN, today, MPS_RATE_MONTHS)
+        MONTHLY_PLAN = mps.monthly_rates(mps_refs, mps_mat)
+        DEMAND_STR   = (f"MPS forecast, {MPS_RATE_MONTHS}-month average "
+                        f"({sum(s == 'MPS' for s in mps_source.values())}/{len(mps_refs)} products)")
+
     # --- Resolve finished products & BOMs ---
     fin_prods = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.product', 'search_read',
         [[['default_code', 'in', PLAN_PRODUCTS]]],
@@ -227,8 +288,8 @@ try:
     print("Fetching supplier info for components...")
     suppliers = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.supplierinfo', 'search_read',
         [[['product_tmpl_id', 'in', tmpl_ids]]],
-        {'fields': ['product_tmpl_id', 'name', 'delay', 'min_qty', 'price',
-                    'product_code', 'sequence']}
+        {'fields': ['product_tmpl_id', 'product_id', 'name', 'delay', 'min_qty', 'price',
+                    'product_code', 'sequence', 'currency_id', 'date_start', 'date_end']}
     )
     sup_by_tmpl = {}
     for s in sorted(suppliers, key=lambda x: x.get('sequence', 99)):
@@ -246,66 +307,51 @@ try:
             kanban_comp_ids.add(p['id'])
     print(f"  Kanban components identified: {len(kanban_comp_ids)}")
 
-    # --- Last PO price per component ---
-    print("Fetching last PO prices and currencies...")
-    done_po_lines = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'purchase.order.line', 'search_read',
-        [[['product_id', 'in', all_comp_ids],
-          ['order_id.state', 'in', ['purchase', 'done']]]],
-        {'fields': ['product_id', 'price_unit', 'currency_id', 'order_id']}
-    )
-    po_ids_price = list({l['order_id'][0] for l in done_po_lines if l.get('order_id')})
-    po_dates = {}
-    if po_ids_price:
-        pos = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'purchase.order', 'read',
-            [po_ids_price], {'fields': ['id', 'name', 'date_approve', 'currency_id']}
-        )
-        po_dates = {p['id']: p for p in pos}
+    # --- Currency rates (convert everything to USD, at the rate of the day) ---
+    fx_rates = fx.load(models, uid)
+
+    def to_usd(amount, currency_name, day=None):
+        return round(fx.to_usd(fx_rates, amount, currency_name, day or today), 4)
+
+    # --- PO price history (local store, only newly approved PO lines are fetched) ---
+    price_store = ph.sync(models, uid)
+    # Each line converts at its PO approval date — whole column in one pass
+    price_usd_col = fx.column_to_usd(fx_rates, price_store['price'], price_store['currency'], price_store['date'])
+    price_stats   = ph.stats(price_store, price_usd_col, today)
 
     last_po_price = {}
-    for l in done_po_lines:
-        if not l.get('order_id') or not l.get('price_unit'):
+    comp_set      = set(all_comp_ids)
+    for i, comp_id in enumerate(price_stats['ids'].tolist()):
+        if comp_id not in comp_set:
             continue
-        po       = po_dates.get(l['order_id'][0], {})
-        po_date  = po.get('date_approve', '') or ''
-        comp_id  = l['product_id'][0]
-        currency = po.get('currency_id') or l.get('currency_id')
-        if comp_id not in last_po_price or po_date > last_po_price[comp_id]['date']:
-            last_po_price[comp_id] = {
-                'price':         l['price_unit'],
-                'currency_name': currency[1] if currency else 'USD',
-                'date':          po_date,
-                'po_name':       po.get('name', ''),
-            }
+        j = price_stats['last'][i]
+        last_po_price[comp_id] = {
+            'price':         float(price_store['price'][j]),
+            'price_usd':     round(float(price_usd_col[j]), 4),
+            'currency_name': str(price_store['currency'][j]),
+            'date':          str(price_store['date'][j]).replace('T', ' '),
+            'po_name':       str(price_store['po_name'][j]),
+            'avg_12m':       price_stats['avg_12m'][i],
+            'min':           float(price_stats['min'][i]),
+            'max':           float(price_stats['max'][i]),
+            'slope':         float(price_stats['slope'][i]),
+            'n_12m':         int(price_stats['n_12m'][i]),
+        }
     print(f"  Last PO prices: {len(last_po_price)} components")
 
-    # --- Currency rates (convert everything to USD) ---
-    print("Fetching currency rates...")
-    currencies = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'res.currency', 'search_read',
-        [[['active', '=', True]]], {'fields': ['id', 'name', 'rate']}
-    )
-    rate_map = {c['name']: c['rate'] for c in currencies}
-    usd_rate  = rate_map.get('USD', 1.0)
-
-    def to_usd(amount, currency_name):
-        if not amount: return 0.0
-        if currency_name == 'USD': return amount
-        curr_rate = rate_map.get(currency_name, 1.0)
-        if curr_rate == 0: return amount
-        return round(amount * (usd_rate / curr_rate), 4)
-
     cad_sample = to_usd(1, 'CAD')
-    print(f"  Rates loaded: {len(rate_map)} currencies | 1 CAD = {cad_sample:.4f} USD")
+    print(f"  Rates loaded: {len(fx_rates)} currencies | 1 CAD = {cad_sample:.4f} USD today")
 
     # --- Stock ---
     print("Fetching stock...")
-    quants = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.quant', 'search_read',
-        [[['product_id', 'in', all_comp_ids], ['location_id.usage', '=', 'internal']]],
-        {'fields': ['product_id', 'quantity', 'reserved_quantity']}
-    )
+    quants = oc.search_read_records(models, uid, 'stock.quant',
+        [['product_id', 'in', all_comp_ids], ['location_id.usage', '=', 'internal']],
+        oc.Quant)
+    dx.export('quants', quants)
     _raw = defaultdict(lambda: [0.0, 0.0])
     for q in quants:
-        _raw[q['product_id'][0]][0] += q['quantity']
-        _raw[q['product_id'][0]][1] += q['reserved_quantity']
+        _raw[q.product_id][0] += q.quantity
+        _raw[q.product_id][1] += q.reserved_quantity
     stock_by_comp = {}
     for pid, (qty, res) in _raw.items():
         if pid in manufactured_device_ids:
@@ -315,13 +361,13 @@ try:
 
     # --- Open incoming moves ---
     print("Fetching open incoming...")
-    moves = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.move', 'search_read',
-        [[['product_id', 'in', all_comp_ids],
-          ['state', 'in', ['waiting', 'confirmed', 'assigned', 'partially_available']],
-          ['picking_type_id.code', '=', 'incoming']]],
-        {'fields': ['product_id', 'product_qty', 'quantity_done', 'picking_id']}
-    )
-    pick_ids = list({m['picking_id'][0] for m in moves if m.get('picking_id')})
+    moves = oc.search_read_records(models, uid, 'stock.move',
+        [['product_id', 'in', all_comp_ids],
+         ['state', 'in', ['waiting', 'confirmed', 'assigned', 'partially_available']],
+         ['picking_type_id.code', '=', 'incoming']],
+        oc.IncomingMove)
+    dx.export('moves', moves)
+    pick_ids = list({m.picking_id for m in moves if m.picking_id})
     pick_states = {}
     if pick_ids:
         picks = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'stock.picking', 'read',
@@ -330,12 +376,12 @@ try:
         pick_states = {p['id']: p['state'] for p in picks}
     incoming_by_comp = defaultdict(float)
     for m in moves:
-        comp_id_m  = m['product_id'][0]
+        comp_id_m  = m.product_id
         if comp_id_m in manufactured_device_ids:
             continue  # manufactured device — skip incoming stock moves (those are MOs not POs)
-        pick_state = pick_states.get(m['picking_id'][0] if m.get('picking_id') else None, '')
-        ordered    = m.get('product_qty') or 0
-        done       = m.get('quantity_done') or 0
+        pick_state = pick_states.get(m.picking_id, '')
+        ordered    = m.product_qty
+        done       = m.quantity_done
         remaining  = ordered if pick_state != 'done' else max(0, ordered - done)
         if remaining > 0:
             incoming_by_comp[comp_id_m] += remaining
@@ -354,6 +400,31 @@ try:
             kanban_comp_ids.add(comp_id)
     print(f"  Total kanban/untracked: {len(kanban_comp_ids)} (excluded from PO plan & buildable units)")
 
+    # --- Actual lead times (incremental store, only new receipts are fetched) ---
+    lead_by_prod = lead_by_sup = None
+    if LEAD_TIME_SOURCE == 'p90':
+        lt_store     = lt.refresh(models, uid)
+        lead_by_prod = lt.percentiles(lt_store, 'product_id')
+        lead_by_sup  = lt.percentiles(lt_store, 'supplier_id')
+        print(f"  Lead-time history: {len(lead_by_prod['ids'])} products, {len(lead_by_sup['ids'])} suppliers")
+
+    # --- Demand variability: weekly consumption history, trailing-window mean / variance ---
+    print("Fetching consumption history...")
+    lt_hist      = lt_store if LEAD_TIME_SOURCE == 'p90' else lt.load()
+    plan_comp    = np.array(sorted(c for c in all_comp_ids if c not in kanban_comp_ids), dtype=np.int32)
+    hist_start   = add_months(today, -DEMAND_HISTORY_MONTHS)
+    week0        = np.datetime64(hist_start, 'W') + 1            # first full week
+    n_weeks      = int((np.datetime64(today, 'W') - week0).astype(np.int64))   # up to last full week
+    demand_h     = dm.fetch_consumption(models, uid, plan_comp.tolist(), hist_start)
+    _, week_mat  = dm.period_matrix(demand_h, plan_comp.tolist(), week0, n_weeks, 'W')
+    wk_mean, wk_var = dm.rolling_stats(week_mat, min(ROLLING_WEEKS, n_weeks))
+    wk_mean, wk_var = wk_mean[:, -1], wk_var[:, -1]              # latest window
+    week_cv      = np.where(wk_mean > 0, np.sqrt(wk_var) / np.where(wk_mean > 0, wk_mean, 1), DEFAULT_DEMAND_CV)
+    cv_by_comp   = dict(zip(plan_comp.tolist(), week_cv.tolist()))
+    lead_mom_p   = lt.moments(lt_hist, 'product_id')
+    lead_mom_s   = lt.moments(lt_hist, 'supplier_id')
+    print(f"  → {len(demand_h['qty'])} consumption moves over {n_weeks} weeks")
+
     # ================================================================
     # CALCULATE PO PLAN
     # ================================================================
@@ -369,14 +440,25 @@ try:
 
         monthly      = comp_monthly[comp_id]['monthly']
         uom          = comp_monthly[comp_id]['uom']
-        lead_days    = int(sup.get('delay', 0) or 0)
+        conf_lead    = int(sup.get('delay', 0) or 0)
+        lead_days    = conf_lead
+        lead_source  = 'configured'
+        if lead_by_prod is not None:
+            # Product history first, then the supplier's history across all parts
+            hist = lt.lookup(lead_by_prod, comp_id)
+            if hist:
+                lead_days, lead_source = ceil(hist[2]), f"P90 of {hist[0]} receipts"
+            elif sup.get('name'):
+                hist = lt.lookup(lead_by_sup, sup['name'][0])
+                if hist:
+                    lead_days, lead_source = ceil(hist[2]), f"Supplier P90 ({hist[0]} receipts)"
         min_qty      = sup.get('min_qty', 0) or 0
         sup_name     = sup['name'][1] if sup.get('name') else 'NO SUPPLIER'
         sup_code     = sup.get('product_code', '') or ''
         lpp          = last_po_price.get(comp_id, {})
         raw_price    = lpp.get('price', sup.get('price', 0) or 0)
-        price_curr   = lpp.get('currency_name', 'USD')
-        price_usd    = to_usd(raw_price, price_curr)
+        price_curr   = lpp.get('currency_name', sup['currency_id'][1] if sup.get('currency_id') else 'USD')
+        price_usd    = lpp['price_usd'] if lpp else to_usd(raw_price, price_curr)
         price_source = (lpp['po_name'][:14] + ' (' + price_curr + ')') if lpp else 'pricelist'
         price        = price_usd
 
@@ -390,8 +472,22 @@ try:
         else:
             coverage_now = 99.0  # not consumed
 
-        # Target qty on hand = COVERAGE_TARGET months
-        target_qty   = monthly * COVERAGE_TARGET
+        # Reorder point / target — fixed months of coverage, or service-level safety stock:
+        # daily demand from the plan, its variability from history, lead-time mean/variance from receipts
+        if STOCK_POLICY == 'service_level':
+            d_day  = monthly / 30.44
+            sd_day = cv_by_comp.get(comp_id, DEFAULT_DEMAND_CV) * d_day * 7 ** 0.5
+            l_mom  = lt.lookup(lead_mom_p, comp_id, fields=('mean', 'var'))
+            if not l_mom and sup.get('name'):
+                l_mom = lt.lookup(lead_mom_s, sup['name'][0], fields=('mean', 'var'))
+            l_mean, l_var = (l_mom[1], l_mom[2]) if l_mom else (lead_days, 0.0)
+            safety_stock  = float(dm.safety_stock(SERVICE_LEVEL, d_day, sd_day ** 2, l_mean, l_var))
+            reorder_qty   = d_day * l_mean + safety_stock
+            target_qty    = reorder_qty + monthly * ORDER_CYCLE_MONTHS
+        else:
+            safety_stock  = 0.0
+            reorder_qty   = monthly * REORDER_POINT
+            target_qty    = monthly * COVERAGE_TARGET
 
         # Net to order = target - available, rounded up to nearest 50
         # (only if coverage < reorder point OR coverage < target)
@@ -407,7 +503,6 @@ try:
         # When does stock hit reorder point (3 months)?
         # reorder_point_qty = monthly * REORDER_POINT
         # If available > reorder_point_qty, we have time before we need to order
-        reorder_qty  = monthly * REORDER_POINT
         if available > reorder_qty and monthly > 0:
             # months until we hit reorder point
             months_until_reorder = (available - reorder_qty) / monthly
@@ -418,7 +513,7 @@ try:
         # Latest SAFE order date = today + buffer days (when buffer hits 0 = must order)
         # Buffer = days of stock remaining - lead time
         # Latest safe order date = today + buffer (if buffer > 0), else today
-        _buffer_preview = (available / monthly * 30.44) - lead_days if monthly > 0 else 9999
+        _buffer_preview = ((available - safety_stock) / monthly * 30.44) - lead_days if monthly > 0 else 9999
         if _buffer_preview > 0:
             order_by_date = today + timedelta(days=int(_buffer_preview))
         else:
@@ -427,7 +522,7 @@ try:
 
         # Flags
         no_sup    = not sup or sup_name == 'NO SUPPLIER'
-        zero_lead = bool(sup) and lead_days == 0
+        zero_lead = bool(sup) and conf_lead == 0 and lead_days == 0
         no_order  = order_qty == 0
 
         # Real risk: will stock run out before order arrives if placed TODAY?
@@ -479,8 +574,11 @@ try:
             'name':           comp_monthly[comp_id]['name'],
             'uom':            uom,
             'supplier':       sup_name,
+            'sup_id':         sup['name'][0] if sup.get('name') else None,
             'sup_code':       sup_code,
             'lead_days':      lead_days,
+            'conf_lead':      conf_lead,
+            'lead_source':    lead_source,
             'min_qty':        int(min_qty) if min_qty else 0,
             'price':          price,
             'stock':          round(stock, 1),
@@ -489,6 +587,8 @@ try:
             'monthly_req':    round(monthly, 2),
             'coverage_now':   round(coverage_now, 1) if coverage_now < 99 else '∞',
             'reorder_point':  round(reorder_qty, 1),
+            'rop_months':     reorder_qty / monthly if monthly > 0 else 0.0,
+            'safety_stock':   round(safety_stock, 1),
             'target_qty':     round(target_qty, 1),
             'order_qty':      order_qty,
             'coverage_after': round(coverage_after, 1) if coverage_after < 99 else '∞',
@@ -498,6 +598,7 @@ try:
             'est_value':      round(est_value, 2),
             'price_usd':      round(price_usd, 4),
             'price_curr':     price_curr,
+            'price_raw':      raw_price,
             'price_source':   price_source,
             'status':         status,
             'status_col':     status_col,
@@ -509,6 +610,91 @@ try:
             'days_buffer':    days_buffer_val,
         })
 
+    # ================================================================
+    # SIMULATION — stockout probability if the order is placed today
+    # ================================================================
+    if SIMULATION_PATHS and plan_rows:
+        print(f"Simulating {SIMULATION_PATHS:,} demand / lead-time paths per component...")
+        comp_arr = np.array([r['comp_id'] for r in plan_rows], dtype=np.int32)
+        # weekly CV → monthly CV (independent weeks)
+        month_cv = np.array([cv_by_comp.get(c, DEFAULT_DEMAND_CV) for c in comp_arr.tolist()]) * (7 / 30.44) ** 0.5
+        t0 = time.perf_counter()
+        p_out, exp_short = sim.simulate(
+            [r['available'] for r in plan_rows], [r['monthly_req'] for r in plan_rows], month_cv,
+            [r['lead_days'] for r in plan_rows], *lt.samples(lt_hist, 'product_id', comp_arr),
+            paths=SIMULATION_PATHS, seed=0,
+        )
+        print(f"  → {len(plan_rows)} components × {SIMULATION_PATHS:,} paths in {time.perf_counter() - t0:.2f}s")
+        for r, p, e in zip(plan_rows, p_out, exp_short):
+            r['stockout_prob'] = round(float(p) * 100, 1)
+            r['exp_short']     = round(float(e), 1)
+
+    # ================================================================
+    # VENDOR OPTIMIZER — cheapest vendor / price break per component
+    # ================================================================
+    # Every supplierinfo row already fetched above is a tier — no extra query.
+    print("Optimizing vendor and price-break choice...")
+    row_of   = {r['comp_id']: i for i, r in enumerate(plan_rows)}
+    comps_of = defaultdict(list)
+    for p in comp_prods:
+        if p['id'] in row_of:
+            comps_of[p['product_tmpl_id'][0]].append(p['id'])
+    today_s = today.strftime('%Y-%m-%d')
+    tiers   = []
+    for s in suppliers:
+        if (s.get('date_end') and s['date_end'] < today_s) or (s.get('date_start') and s['date_start'] > today_s):
+            continue
+        for comp_id in comps_of.get(s['product_tmpl_id'][0], []):
+            if s.get('product_id') and s['product_id'][0] != comp_id:
+                continue   # variant-specific price
+            tiers.append((row_of[comp_id], s))
+
+    need     = [max(0.0, r['target_qty'] - r['available']) for r in plan_rows]
+    tier_usd = [to_usd(s['price'] or 0, s['currency_id'][1] if s.get('currency_id') else 'USD') for _, s in tiers]
+    if tiers:
+        best, t_qty, t_cost = vopt.optimize(
+            [i for i, _ in tiers],
+            tier_usd,
+            [s['min_qty'] or 0 for _, s in tiers],
+            [s['delay'] or 0 for _, s in tiers],
+            need, [r['monthly_req'] for r in plan_rows], [r['available'] for r in plan_rows], ROUND_TO,
+        )
+    else:
+        best = np.full(len(plan_rows), -1)
+    # Baseline = the current supplier at today's pricelist (its highest tier the order qty reaches),
+    # the same source as the optimizer's tiers — so savings are the vendor / tier choice only, and
+    # the gap between the last PO price and today's pricelist is reported separately as drift.
+    list_price = np.array([r['price'] for r in plan_rows], dtype=np.float64)   # no tier → last PO price
+    list_moq   = np.full(len(plan_rows), -1.0)
+    for k, (i, s) in enumerate(tiers):
+        r, moq = plan_rows[i], s['min_qty'] or 0
+        if s.get('name') and s['name'][0] == r['sup_id'] and moq <= r['order_qty'] and moq > list_moq[i]:
+            list_moq[i], list_price[i] = moq, tier_usd[k]
+    cur_cost = vopt.landed_cost([r['order_qty'] for r in plan_rows], list_price,
+                                need, [r['monthly_req'] for r in plan_rows])
+    n_tiers = np.bincount([i for i, _ in tiers], minlength=len(plan_rows))
+    for i, r in enumerate(plan_rows):
+        r['savings'] = 0.0
+        if best[i] < 0 or not r['order_qty']:
+            continue
+        _, s = tiers[best[i]]
+        r.update({
+            'opt_supplier': s['name'][1] if s.get('name') else '',
+            'opt_moq':      s['min_qty'] or 0,
+            'opt_price':    round(to_usd(s['price'] or 0, s['currency_id'][1] if s.get('currency_id') else 'USD'), 4),
+            'opt_qty':      int(t_qty[best[i]]),
+            'opt_lead':     int(s['delay'] or 0),
+            'opt_cost':     round(float(t_cost[best[i]]), 2),
+            'cur_price':    round(float(list_price[i]), 4),
+            'cur_cost':     round(float(cur_cost[i]), 2),
+            'price_drift':  round((r['price'] - float(list_price[i])) * r['order_qty'], 2) if list_moq[i] >= 0 else '',
+            'opt_options':  int(n_tiers[i]),
+        })
+        r['savings'] = round(r['cur_cost'] - r['opt_cost'], 2)
+    total_savings = sum(r['savings'] for r in plan_rows if r['savings'] > 0)
+    print(f"  → {sum(1 for r in plan_rows if r['savings'] > 0)} parts cheaper with another vendor/tier, "
+          f"${total_savings:,.0f} landed-cost savings\n")
+
     # Sort: urgent → soon → by days_to_order → sufficient
     plan_rows.sort(key=lambda x: (
         0 if x['urgent'] else 1 if x['soon'] else 2 if not x['no_order'] else 3,
@@ -528,6 +714,78 @@ try:
     print(f"  ✅ Sufficient:  {cnt_ok}")
     print(f"  💰 Est. value:  ${total_value:,.0f}\n")
 
+    # ================================================================
+    # SWEEP — all parameter sets / plan scenarios on the same data
+    # ================================================================
+    sweep_rows = []
+    if SWEEP_MODE and plan_rows:
+        sweep_comps = [r['comp_id'] for r in plan_rows]
+        sweep_plans = {name: p if isinstance(p, dict) else {ref: qty * p for ref, qty in MONTHLY_PLAN.items()}
+                       for name, p in SWEEP_PLANS.items()}
+        sweep_refs  = sorted({ref for p in sweep_plans.values() for ref in p})
+        sweep_sl    = STOCK_POLICY == 'service_level'
+        t0 = time.perf_counter()
+        sweep_rows = sweep.sweep(
+            [r['available'] for r in plan_rows], [r['price'] for r in plan_rows],
+            [r['lead_days'] for r in plan_rows], [r['min_qty'] for r in plan_rows],
+            sweep.bom_matrix(sweep_comps, sweep_refs, bom_per_prod), sweep_refs, sweep_plans,
+            SWEEP_CYCLE if sweep_sl else SWEEP_COVERAGE, SWEEP_ROP_SHIFT if sweep_sl else SWEEP_REORDER,
+            SWEEP_ROUND_TO, rop_months=[r['rop_months'] for r in plan_rows] if sweep_sl else None,
+        )
+        print(f"Sweep: {len(sweep_rows)} scenarios evaluated in {time.perf_counter() - t0:.3f}s\n")
+
+    # ================================================================
+    # SHORTAGE IMPACT — short components → finished goods, kits, open SOs
+    # ================================================================
+    print("Propagating shortages through the reverse BOM index...")
+    bom_index     = bix.load(models, uid)
+    plan_prod_ids = {p['id'] for p in fin_prods}
+    short_rows    = [r for r in plan_rows if r['urgent'] or r['soon']]
+    impact        = {r['comp_id']: bix.where_used(bom_index, r['comp_id']) for r in short_rows}
+
+    affected_ids = set(impact) | {pid for up in impact.values() for pid in up}
+    open_so      = defaultdict(lambda: {'qty': 0.0, 'orders': set()})
+    if affected_ids:
+        so_lines = oc.search_read_all(models, uid, 'sale.order.line',
+            [['product_id', 'in', list(affected_ids)], ['state', '=', 'sale']],
+            ['order_id', 'product_id', 'product_uom_qty', 'qty_delivered']
+        )
+        for l in so_lines:
+            open_qty = (l['product_uom_qty'] or 0) - (l['qty_delivered'] or 0)
+            if open_qty > 0:
+                open_so[l['product_id'][0]]['qty'] += open_qty
+                open_so[l['product_id'][0]]['orders'].add(l['order_id'][1])
+
+    def impact_type(pid):
+        if pid in plan_prod_ids:           return "Finished good"
+        if bix.is_kit(bom_index, pid):     return "Kit"
+        if bom_index['used_in'].get(pid):  return "Sub-assembly"
+        return "Product"
+
+    blocked_fg   = {pid for up in impact.values() for pid in up if pid in plan_prod_ids}
+    blocked_kits = {pid for up in impact.values() for pid in up if bix.is_kit(bom_index, pid)}
+    blocked_sos  = {o for pid in affected_ids for o in open_so.get(pid, {}).get('orders', ())}
+    print(f"  ⛔ {len(short_rows)} short components block {len(blocked_fg)} finished goods, "
+          f"{len(blocked_kits)} kits, {len(blocked_sos)} open SOs\n")
+
+    # ================================================================
+    # WRITE-BACK — draft POs per supplier
+    # ================================================================
+    po_actions = []
+    if CREATE_DRAFT_POS:
+        print(f"Writing draft POs{' (dry run)' if WRITE_BACK_DRY_RUN else ''}...")
+        po_actions = wbk.write_drafts(models, uid, [{
+            'supplier_id':  r['sup_id'],
+            'supplier':     r['supplier'],
+            'product_id':   r['comp_id'],
+            'qty':          r['order_qty'],
+            'price':        r['price_raw'],
+            'currency':     r['price_curr'],
+            'date_planned': (today + timedelta(days=r['lead_days'])).strftime('%Y-%m-%d'),
+        } for r in plan_rows if r['order_qty'] and not r['no_sup']],
+            key=f"PO Plan {today.strftime('%Y-%m')}", dry_run=WRITE_BACK_DRY_RUN)
+        print()
+
     # ================================================================
     # EXCEL
     # ================================================================
@@ -539,12 +797,17 @@ try:
         ("Sup Code",         12), ("Lead\nDays",        9), ("Min\nQty",          9),
         ("Stock\nAvail",     10), ("Open\nIncoming",   10), ("Total\nAvail",      10),
         ("Monthly\nReq",     10), ("Coverage\nNow(mo)",11), ("Reorder\nPoint",   10),
-        ("Target\nQty(7mo)", 11), ("ORDER\nQTY",       11), ("Coverage\nAfter",  11),
+        ("Target\nQty",      11), ("ORDER\nQTY",       11), ("Coverage\nAfter",  11),
         ("Latest Safe\nOrder Date", 13), ("Buffer\n(days)",   10),
         ("Price Source",     16), ("Est Value\n(USD)",  13),
+        ("Stockout\nProb %", 10), ("Exp. Short\nQty",  10), ("Safety\nStock",     10),
+        ("Savings vs\nCurrent Rule", 12),
         ("Status",           32),
     ]
     NCOLS = len(COLS)
+    POLICY_STR = (f"Reorder: {SERVICE_LEVEL:.0%} service level  |  Target: ROP + {ORDER_CYCLE_MONTHS}mo"
+                  if STOCK_POLICY == 'service_level' else
+                  f"Target: {COVERAGE_TARGET}mo  |  Reorder at: {REORDER_POINT}mo")
 
     def make_sheet(ws, title, subtitle=""):
         for i, (_, w) in enumerate(COLS, 1):
@@ -558,7 +821,8 @@ try:
         ws.row_dimensions[1].height = 24
         plan_str = '  '.join(f"{ref}×{qty}" for ref, qty in MONTHLY_PLAN.items())
         sub = (f"Rate: {plan_str} /mo  |  "
-               f"Target: {COVERAGE_TARGET}mo  |  Reorder at: {REORDER_POINT}mo  |  "
+               f"{POLICY_STR}  |  "
+               f"Lead: {'P90 actual' if LEAD_TIME_SOURCE == 'p90' else 'configured'}  |  "
                f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC"
                + (f"  |  {subtitle}" if subtitle else ""))
         ws.cell(row=2, column=1, value=sub)
@@ -600,6 +864,9 @@ try:
             r['order_by_date'], r['days_buffer'] if not r['no_order'] else '',
             r.get('price_source', ''),
             r['est_value'] if r['est_value'] else '',
+            r.get('stockout_prob', ''), r['exp_short'] if r.get('exp_short') else '',
+            r['safety_stock'] if r['safety_stock'] else '',
+            r['savings'] if r['savings'] > 0 else '',
             r['status'],
         ]
         ws.append(vals)
@@ -612,8 +879,14 @@ try:
                 horizontal="left" if col in [1,2,3,4,19] else "center",
                 vertical="center"
             )
+            if col == 5 and r.get('lead_source', 'configured') != 'configured':
+                c.comment = Comment(f"{r['lead_source']} — configured {r['conf_lead']}d", "PO Plan")
             if col == 14 and r['order_qty']:  # ORDER QTY bold
                 c.font = Font(bold=True)
+            if col == 23 and r['savings'] > 0:
+                c.number_format = '$#,##0.00'
+            if col == 20 and r.get('stockout_prob', 0) >= 20:
+                c.font = Font(bold=True, color=COLORS['urgent'])
             if col == 18 and r['est_value']:
                 c.number_format = '$#,##0.00'
         ws.row_dimensions[rn].height = 14
@@ -649,7 +922,7 @@ try:
         section_hdr(ws1, f"  🟡  PLAN AHEAD — {len(plan_ahead)} components (order date upcoming)", COLORS['warn'])
         for r in plan_ahead: write_row(ws1, r)
     if ok_rows:
-        section_hdr(ws1, f"  ✅  SUFFICIENT STOCK — {len(ok_rows)} components (coverage > {COVERAGE_TARGET} months)", COLORS['ok'])
+        section_hdr(ws1, f"  ✅  SUFFICIENT STOCK — {len(ok_rows)} components (at or above target qty)", COLORS['ok'])
         for r in ok_rows: write_row(ws1, r)
 
     # ================================================================
@@ -834,7 +1107,354 @@ try:
         ws3.append([])
 
     # ================================================================
-    # SHEET 4 — SUMMARY (move to front)
+    # SHEET 4 — SHORTAGE IMPACT
+    # ================================================================
+    ws5 = wb.create_sheet("⛔ Shortage Impact")
+    SI_COLS = [
+        ("Level", 8), ("Affected Ref", 12), ("Affected Product", 42), ("Type", 14),
+        ("Qty per\nUnit", 10), ("Open SO\nQty", 10), ("Open Sales Orders", 45),
+    ]
+    for i, (_, w) in enumerate(SI_COLS, 1):
+        ws5.column_dimensions[get_column_letter(i)].width = w
+
+    ws5.cell(row=1, column=1, value="Shortage Impact — What Each Short Component Blocks")
+    ws5.merge_cells(f"A1:{get_column_letter(len(SI_COLS))}1")
+    ws5["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws5["A1"].fill      = make_fill(COLORS['main'])
+    ws5["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws5.row_dimensions[1].height = 24
+
+    ws5.cell(row=2, column=1,
+             value=f"Short = 🔴 order now or 🟠 within 14 days  |  {len(short_rows)} components  |  "
+                   f"{len(blocked_fg)} finished goods, {len(blocked_kits)} kits, {len(blocked_sos)} open SOs affected  |  "
+                   f"BOM index built {bom_index['built'][:16]}")
+    ws5.merge_cells(f"A2:{get_column_letter(len(SI_COLS))}2")
+    ws5["A2"].font      = Font(italic=True, size=9)
+    ws5["A2"].alignment = Alignment(horizontal="center")
+    ws5.freeze_panes = "A3"
+
+    type_fill = {"Finished good": COLORS['red'], "Kit": COLORS['amber'],
+                 "Sub-assembly": COLORS['yellow'], "Product": COLORS['blue']}
+    for r in short_rows:
+        up = impact[r['comp_id']]
+        ws5.append([f"{r['ref']} — {r['name'][:40]}  |  {r['available']:g} avail  |  "
+                    f"{r['days_buffer']}d buffer  |  used in {len(up)} products"])
+        rn = ws5.max_row
+        ws5.merge_cells(f"A{rn}:{get_column_letter(len(SI_COLS))}{rn}")
+        c = ws5.cell(rn, 1)
+        c.font      = Font(bold=True, color="FFFFFF", size=10)
+        c.fill      = make_fill(COLORS['urgent'] if r['urgent'] else "CC5500")
+        c.alignment = Alignment(horizontal="left", vertical="center", indent=1)
+        ws5.row_dimensions[rn].height = 15
+
+        for i, (h, _) in enumerate(SI_COLS, 1):
+            c = ws5.cell(rn + 1, column=i, value=h)
+            c.font      = Font(color="FFFFFF", bold=True, size=9)
+            c.fill      = make_fill(COLORS['sup'])
+            c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+            c.border    = tb()
+        ws5.row_dimensions[rn + 1].height = 26
+
+        # Level 0 = the component itself, when it is also sold directly
+        entries = [(0, r['comp_id'], 1.0)] if r['comp_id'] in open_so else []
+        entries += sorted(((u['level'], pid, u['qty']) for pid, u in up.items()),
+                          key=lambda x: (x[1] not in plan_prod_ids, x[0],
+                                         bom_index['products'].get(x[1], [''])[0]))
+        for level, pid, qpu in entries:
+            ref_, name_, _ = bom_index['products'].get(pid, ['', '', ''])
+            so   = open_so.get(pid, {'qty': 0.0, 'orders': set()})
+            kind = impact_type(pid) if level else "Spare part"
+            ws5.append([level, ref_, name_[:40], kind, round(qpu, 4),
+                        round(so['qty'], 1) if so['qty'] else '', ", ".join(sorted(so['orders']))])
+            rn = ws5.max_row
+            for col in range(1, len(SI_COLS) + 1):
+                c = ws5.cell(rn, col)
+                c.fill      = make_fill(type_fill.get(kind, COLORS['blue']))
+                c.border    = tb()
+                c.alignment = Alignment(
+                    horizontal="left" if col in [2, 3, 7] else "center",
+                    vertical="center", wrap_text=col == 7)
+            ws5.row_dimensions[rn].height = 14
+        ws5.append([])
+
+    # ================================================================
+    # SHEET 5 — SCENARIO SWEEP
+    # ================================================================
+    if sweep_rows:
+        ws6 = wb.create_sheet("🎛 Scenario Sweep")
+        SW_COLS = [
+            ("Plan Scenario", 18),
+            ("Order\nCycle (mo)", 11) if sweep_sl else ("Coverage\nTarget (mo)", 11),
+            ("Reorder Pt\nShift (mo)", 11) if sweep_sl else ("Reorder\nPoint (mo)", 11),
+            ("Round\nTo", 9), ("Parts to\nOrder", 10), ("Total Order\nValue (USD)", 15),
+            ("# Critical", 10), ("# At/Below\nReorder Pt", 12),
+            ("Median Coverage\nAfter (mo)", 15), ("Min Coverage\nAfter (mo)", 14),
+        ]
+        for i, (_, w) in enumerate(SW_COLS, 1):
+            ws6.column_dimensions[get_column_letter(i)].width = w
+        ws6.cell(row=1, column=1, value=f"Scenario Sweep — {len(sweep_rows)} parameter sets on one data pull")
+        ws6.merge_cells(f"A1:{get_column_letter(len(SW_COLS))}1")
+        ws6["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+        ws6["A1"].fill      = make_fill(COLORS['main'])
+        ws6["A1"].alignment = Alignment(horizontal="center", vertical="center")
+        ws6.row_dimensions[1].height = 24
+        ws6.cell(row=2, column=1, value=(f"Service-level policy ({SERVICE_LEVEL:.0%}) — each part's own reorder point"
+                                         if sweep_sl else "Fixed months policy") +
+                                        "  |  Bold = current CONFIG  |  Critical = stock runs out before the supplier "
+                                        "lead time if ordered today  |  Coverage after = (available + order) / monthly")
+        ws6.merge_cells(f"A2:{get_column_letter(len(SW_COLS))}2")
+        ws6["A2"].font      = Font(italic=True, size=9)
+        ws6["A2"].alignment = Alignment(horizontal="center")
+        for i, (h, _) in enumerate(SW_COLS, 1):
+            c = ws6.cell(row=3, column=i, value=h)
+            c.font      = Font(color="FFFFFF", bold=True, size=9)
+            c.fill      = make_fill(COLORS['main'])
+            c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+            c.border    = tb()
+        ws6.row_dimensions[3].height = 32
+        ws6.freeze_panes = "A4"
+
+        for sr in sweep_rows:
+            current = (sr['plan'] == 'Current plan' and sr['round_to'] == ROUND_TO
+                       and (sr['coverage'], sr['reorder']) == ((ORDER_CYCLE_MONTHS, 0) if sweep_sl
+                                                               else (COVERAGE_TARGET, REORDER_POINT)))
+            ws6.append([sr['plan'], sr['coverage'], sr['reorder'], sr['round_to'], sr['n_order'],
+                        round(sr['value'], 2), sr['n_crit'], sr['n_below'],
+                        round(sr['cov_med'], 1) if sr['cov_med'] is not None else '∞',
+                        round(sr['cov_min'], 1) if sr['cov_min'] is not None else '∞'])
+            rn   = ws6.max_row
+            fhex = COLORS['red'] if sr['n_crit'] else COLORS['green']
+            for col in range(1, len(SW_COLS) + 1):
+                c = ws6.cell(rn, col)
+                c.fill      = make_fill(fhex)
+                c.border    = tb()
+                c.font      = Font(bold=current)
+                c.alignment = Alignment(horizontal="left" if col == 1 else "center", vertical="center")
+                if col == 6:
+                    c.number_format = '$#,##0'
+            ws6.row_dimensions[rn].height = 14
+
+    # ================================================================
+    # SHEET 6 — VENDOR OPTIMIZER
+    # ================================================================
+    opt_rows = sorted((r for r in plan_rows if r.get('opt_supplier')), key=lambda x: -x['savings'])
+    ws7 = wb.create_sheet("💡 Vendor Optimizer")
+    VO_COLS = [
+        ("Ref", 11), ("Component Name", 36), ("Current\nSupplier", 20), ("Current\nQty", 9),
+        ("Current\nList $", 10), ("Current\nLanded $", 12), ("Best\nSupplier", 20), ("Tier\nMin Qty", 9),
+        ("Best\nQty", 9), ("Best\nUnit $", 10), ("Best Lead\n(days)", 10), ("Best\nLanded $", 12),
+        ("Savings vs\nCurrent Rule", 13), ("Last PO vs\nPricelist $", 12), ("Tiers\nCompared", 9),
+    ]
+    for i, (_, w) in enumerate(VO_COLS, 1):
+        ws7.column_dimensions[get_column_letter(i)].width = w
+    ws7.cell(row=1, column=1, value=f"Vendor & Price-Break Optimizer — ${total_savings:,.0f} potential savings")
+    ws7.merge_cells(f"A1:{get_column_letter(len(VO_COLS))}1")
+    ws7["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws7["A1"].fill      = make_fill(COLORS['main'])
+    ws7["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws7.row_dimensions[1].height = 24
+    ws7.cell(row=2, column=1,
+             value=f"Landed $ = qty × unit × (1 + {vopt.LANDED_COST_PCT:.0%}) + carrying {vopt.CARRYING_RATE:.0%}/yr on "
+                   f"qty above need  |  Vendor must deliver before stockout  |  Coverage cap {vopt.MAX_COVERAGE_MONTHS}mo  |  "
+                   f"Current rule = first supplier by sequence at its pricelist tier, round to {ROUND_TO}  |  "
+                   f"Last PO vs Pricelist = extra cost of the order at the last PO price (not in savings)")
+    ws7.merge_cells(f"A2:{get_column_letter(len(VO_COLS))}2")
+    ws7["A2"].font      = Font(italic=True, size=9)
+    ws7["A2"].alignment = Alignment(horizontal="center")
+    for i, (h, _) in enumerate(VO_COLS, 1):
+        c = ws7.cell(row=3, column=i, value=h)
+        c.font      = Font(color="FFFFFF", bold=True, size=9)
+        c.fill      = make_fill(COLORS['main'])
+        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        c.border    = tb()
+    ws7.row_dimensions[3].height = 32
+    ws7.freeze_panes = "A4"
+    for r in opt_rows:
+        ws7.append([r['ref'], r['name'][:34], r['supplier'][:20], r['order_qty'], r['cur_price'], r['cur_cost'],
+                    r['opt_supplier'][:20], r['opt_moq'], r['opt_qty'], r['opt_price'], r['opt_lead'],
+                    r['opt_cost'], r['savings'], r['price_drift'], r['opt_options']])
+        rn   = ws7.max_row
+        fhex = COLORS['green'] if r['savings'] > 0 else COLORS['grey']
+        for col in range(1, len(VO_COLS) + 1):
+            c = ws7.cell(rn, col)
+            c.fill      = make_fill(fhex)
+            c.border    = tb()
+            c.alignment = Alignment(horizontal="left" if col in [1, 2, 3, 7] else "center", vertical="center")
+            if col in [5, 6, 10, 12, 13, 14]:
+                c.number_format = '$#,##0.00'
+        ws7.row_dimensions[rn].height = 14
+
+    # ================================================================
+    # SHEET 7 — PRICE HISTORY
+    # ================================================================
+    ws8 = wb.create_sheet("💲 Price History")
+    PH_COLS = [
+        ("Ref", 11), ("Component Name", 36), ("Last PO", 14), ("Last PO\nDate", 11), ("Last Price\n(USD)", 11),
+        ("12-mo Avg\n(USD)", 11), ("Min\n(USD)", 10), ("Max\n(USD)", 10), ("Trend\n(USD / yr)", 11),
+        ("Trend\n(% / yr)", 10), ("PO Lines\n(12 mo)", 10),
+    ]
+    for i, (_, w) in enumerate(PH_COLS, 1):
+        ws8.column_dimensions[get_column_letter(i)].width = w
+    ws8.cell(row=1, column=1, value="Purchase Price History — Plan Components")
+    ws8.merge_cells(f"A1:{get_column_letter(len(PH_COLS))}1")
+    ws8["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws8["A1"].fill      = make_fill(COLORS['main'])
+    ws8["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws8.row_dimensions[1].height = 24
+    ws8.cell(row=2, column=1, value=f"All prices in USD at each PO's approval-date rate  |  Avg is qty-weighted  |  "
+                                    f"Trend = least-squares slope over the last 12 months  |  "
+                                    f"{len(price_store['line_id']):,} PO lines in local history")
+    ws8.merge_cells(f"A2:{get_column_letter(len(PH_COLS))}2")
+    ws8["A2"].font      = Font(italic=True, size=9)
+    ws8["A2"].alignment = Alignment(horizontal="center")
+    for i, (h, _) in enumerate(PH_COLS, 1):
+        c = ws8.cell(row=3, column=i, value=h)
+        c.font      = Font(color="FFFFFF", bold=True, size=9)
+        c.fill      = make_fill(COLORS['main'])
+        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        c.border    = tb()
+    ws8.row_dimensions[3].height = 32
+    ws8.freeze_panes = "A4"
+    for r in sorted(plan_rows, key=lambda x: x['ref']):
+        lpp = last_po_price.get(r['comp_id'])
+        if not lpp:
+            continue
+        avg   = lpp['avg_12m'] if lpp['avg_12m'] == lpp['avg_12m'] else None   # NaN → no lines in 12 mo
+        trend = round(lpp['slope'] / avg * 100, 1) if avg and lpp['n_12m'] >= 2 else ''
+        ws8.append([r['ref'], r['name'][:34], lpp['po_name'], lpp['date'][:10], lpp['price_usd'],
+                    round(avg, 4) if avg else '', round(lpp['min'], 4), round(lpp['max'], 4),
+                    round(lpp['slope'], 4) if lpp['n_12m'] >= 2 else '', trend, lpp['n_12m']])
+        rn   = ws8.max_row
+        fhex = COLORS['red'] if trend != '' and trend > 10 else COLORS['green'] if trend != '' and trend < -10 \
+               else COLORS['blue']
+        for col in range(1, len(PH_COLS) + 1):
+            c = ws8.cell(rn, col)
+            c.fill      = make_fill(fhex)
+            c.border    = tb()
+            c.alignment = Alignment(horizontal="left" if col in [1, 2, 3] else "center", vertical="center")
+            if col in [5, 6, 7, 8, 9]:
+                c.number_format = '$#,##0.00##'
+        ws8.row_dimensions[rn].height = 14
+
+    # ================================================================
+    # SHEET 8 — WHAT CHANGED (against the previous run's snapshot)
+    # ================================================================
+    delta, delta_prev, delta_counts = None, None, {}
+    if DELTA_SHEET:
+        plan_snap = dl.snapshot(
+            [r['comp_id'] for r in plan_rows],
+            {'tier':      [3 if r['urgent'] else 2 if r['soon'] else 0 if r['no_order'] else 1 for r in plan_rows],
+             'order_qty': [float(r['order_qty']) for r in plan_rows],
+             'coverage':  [np.inf if r['coverage_now'] == '∞' else r['coverage_now'] for r in plan_rows]},
+            {'ref':      [r['ref'] for r in plan_rows],
+             'name':     [r['name'] for r in plan_rows],
+             'supplier': [r['supplier'] for r in plan_rows],
+             'status':   [r['status'] for r in plan_rows]},
+        )
+        delta_prev, delta = dl.compare('po_plan', plan_snap, now)
+
+    if delta:
+        P, C     = delta_prev, plan_snap
+        new, gone = delta['new'], delta['gone']
+        pc, cc   = delta['prev'], delta['cur']
+        p_tier, c_tier = P['tier'][pc], C['tier'][cc]
+        dq       = C['order_qty'][cc] - P['order_qty'][pc]
+        is_swing = np.abs(dq) >= np.maximum(DELTA_SWING_MIN, DELTA_SWING_PCT * P['order_qty'][pc])
+        crit_up  = (c_tier == 3) & (p_tier < 3)
+        resolved = (p_tier >= 2) & (c_tier <= 1)
+        moved    = (p_tier != c_tier) & ~crit_up & ~resolved
+        new_crit = C['tier'][new] == 3
+        gone_hot = P['tier'][gone] >= 2
+
+        def pairs(mask):
+            return list(zip(pc[mask].tolist(), cc[mask].tolist()))
+
+        def by_ref(pair):
+            p, c = pair
+            return str(C['ref'][c]) if c is not None else str(P['ref'][p])
+
+        swings = pairs(is_swing)
+        delta_sections = [
+            ("🔴  NEW CRITICAL — order now, was not critical last run", COLORS['urgent'], COLORS['red'],
+             sorted([(None, c) for c in new[new_crit].tolist()] + pairs(crit_up), key=by_ref)),
+            ("✅  RESOLVED — no longer needs an order within 14 days", COLORS['ok'], COLORS['green'],
+             sorted(pairs(resolved) + [(p, None) for p in gone[gone_hot].tolist()], key=by_ref)),
+            (f"↕  ORDER QTY SWINGS — ≥ {DELTA_SWING_PCT:.0%} and ≥ {DELTA_SWING_MIN} units", "CC5500", COLORS['amber'],
+             [swings[i] for i in np.argsort(-np.abs(dq[is_swing]), kind='stable').tolist()]),
+            ("🔀  OTHER STATUS CHANGES", COLORS['sup'], COLORS['blue'], sorted(pairs(moved), key=by_ref)),
+            ("➕  NEW IN PLAN", COLORS['main'], COLORS['grey'], sorted(((None, c) for c in new[~new_crit].tolist()), key=by_ref)),
+            ("➖  NO LONGER IN PLAN", COLORS['main'], COLORS['grey'], sorted(((p, None) for p in gone[~gone_hot].tolist()), key=by_ref)),
+        ]
+        delta_counts = {'critical': len(delta_sections[0][3]), 'resolved': len(delta_sections[1][3]),
+                        'swings': len(delta_sections[2][3])}
+        print(f"  🔄 Since {P['run']}: {delta_counts['critical']} new critical, {delta_counts['resolved']} resolved, "
+              f"{delta_counts['swings']} qty swings ({delta['same']} components unchanged)")
+
+        ws9 = wb.create_sheet("🔄 What Changed")
+        WC_COLS = [
+            ("Ref", 11), ("Component Name", 36), ("Supplier", 20), ("Status Last Run", 44), ("Status Now", 44),
+            ("Order Qty\nLast Run", 10), ("Order Qty\nNow", 10), ("Δ Qty", 9),
+            ("Coverage\nLast Run (mo)", 11), ("Coverage\nNow (mo)", 11),
+        ]
+        for i, (_, w) in enumerate(WC_COLS, 1):
+            ws9.column_dimensions[get_column_letter(i)].width = w
+        ws9.cell(row=1, column=1, value=f"What Changed Since the Last Run — {P['run']} UTC")
+        ws9.merge_cells(f"A1:{get_column_letter(len(WC_COLS))}1")
+        ws9["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+        ws9["A1"].fill      = make_fill(COLORS['main'])
+        ws9["A1"].alignment = Alignment(horizontal="center", vertical="center")
+        ws9.row_dimensions[1].height = 24
+        ws9.cell(row=2, column=1,
+                 value=f"{len(P['id'])} components last run → {len(C['id'])} now  |  "
+                       f"{delta['same']} unchanged  |  Snapshots kept in {dl.DELTA_DIR}/")
+        ws9.merge_cells(f"A2:{get_column_letter(len(WC_COLS))}2")
+        ws9["A2"].font      = Font(italic=True, size=9)
+        ws9["A2"].alignment = Alignment(horizontal="center")
+        for i, (h, _) in enumerate(WC_COLS, 1):
+            c = ws9.cell(row=3, column=i, value=h)
+            c.font      = Font(color="FFFFFF", bold=True, size=9)
+            c.fill      = make_fill(COLORS['main'])
+            c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+            c.border    = tb()
+        ws9.row_dimensions[3].height = 32
+        ws9.freeze_panes = "A4"
+
+        def cov_str(v):
+            return '∞' if v == np.inf else float(v)
+
+        for title, hdr_hex, fhex, rows in delta_sections:
+            if not rows:
+                continue
+            ws9.append([f"  {title} ({len(rows)})"])
+            rn = ws9.max_row
+            ws9.merge_cells(start_row=rn, start_column=1, end_row=rn, end_column=len(WC_COLS))
+            c = ws9.cell(rn, 1)
+            c.font      = Font(bold=True, color="FFFFFF", size=10)
+            c.fill      = make_fill(hdr_hex)
+            c.alignment = Alignment(horizontal="left", vertical="center", indent=1)
+            ws9.row_dimensions[rn].height = 15
+            for pi, ci in rows:
+                src, i = (C, ci) if ci is not None else (P, pi)
+                q_old  = float(P['order_qty'][pi]) if pi is not None else ''
+                q_new  = float(C['order_qty'][ci]) if ci is not None else ''
+                ws9.append([
+                    str(src['ref'][i]), str(src['name'][i])[:34], str(src['supplier'][i])[:20],
+                    str(P['status'][pi]) if pi is not None else 'Not in plan',
+                    str(C['status'][ci]) if ci is not None else 'Not in plan',
+                    q_old, q_new, q_new - q_old if pi is not None and ci is not None else '',
+                    cov_str(P['coverage'][pi]) if pi is not None else '',
+                    cov_str(C['coverage'][ci]) if ci is not None else '',
+                ])
+                rn = ws9.max_row
+                for col in range(1, len(WC_COLS) + 1):
+                    c = ws9.cell(rn, col)
+                    c.fill      = make_fill(fhex)
+                    c.border    = tb()
+                    c.alignment = Alignment(horizontal="left" if col in [1, 2, 3, 4, 5] else "center", vertical="center")
+                ws9.row_dimensions[rn].height = 14
+
+    # ================================================================
+    # SHEET 9 — SUMMARY (move to front)
     # ================================================================
     ws4 = wb.create_sheet("📊 Summary")
     ws4.column_dimensions["A"].width = 38
@@ -867,9 +1487,18 @@ try:
 
     plan_summary = '   '.join(f"{ref}: {qty}/mo" for ref, qty in MONTHLY_PLAN.items())
     srow(ws4, "Production rate (monthly)", plan_summary, COLORS['blue'], True)
-    srow(ws4, "Coverage target", f"{COVERAGE_TARGET} months", COLORS['blue'])
-    srow(ws4, "Reorder point", f"{REORDER_POINT} months coverage remaining", COLORS['blue'])
+    srow(ws4, "Demand source", DEMAND_STR, COLORS['blue'])
+    if STOCK_POLICY == 'service_level':
+        srow(ws4, "Coverage target", f"Reorder point + {ORDER_CYCLE_MONTHS} months", COLORS['blue'])
+        srow(ws4, "Reorder point", f"Lead-time demand + safety stock at {SERVICE_LEVEL:.0%} service level", COLORS['blue'])
+    else:
+        srow(ws4, "Coverage target", f"{COVERAGE_TARGET} months", COLORS['blue'])
+        srow(ws4, "Reorder point", f"{REORDER_POINT} months coverage remaining", COLORS['blue'])
     srow(ws4, "Order qty rounding", f"Round up to nearest {ROUND_TO}", COLORS['blue'])
+    if SIMULATION_PATHS:
+        srow(ws4, "Stockout simulation", f"{SIMULATION_PATHS:,} Monte Carlo paths — risk if ordered today", COLORS['blue'])
+    srow(ws4, "Lead times", "P90 of actual receipts (fallback: supplier, then configured)"
+         if LEAD_TIME_SOURCE == 'p90' else "Configured supplier delay", COLORS['blue'])
     srow(ws4, "Generated", now.strftime('%Y-%m-%d %H:%M UTC'), COLORS['blue'])
     ws4.append([])
     srow(ws4, "Total components in scope", len(plan_rows), COLORS['blue'], True)
@@ -879,8 +1508,22 @@ try:
     srow(ws4, "✅ Sufficient stock", cnt_ok, COLORS['green'])
     srow(ws4, "⚠ No supplier configured", sum(1 for r in plan_rows if r['no_sup']), COLORS['yellow'])
     srow(ws4, "⚠ Lead time = 0 (needs review)", sum(1 for r in plan_rows if r['zero_lead'] and not r['no_sup']), COLORS['yellow'])
+    if SIMULATION_PATHS:
+        srow(ws4, "🎲 Parts with ≥ 20% stockout risk", sum(1 for r in plan_rows if r.get('stockout_prob', 0) >= 20), COLORS['red'])
+    srow(ws4, "⛔ Finished goods blocked by short parts", len(blocked_fg), COLORS['red'] if blocked_fg else COLORS['green'])
+    srow(ws4, "⛔ Open SOs affected by short parts", len(blocked_sos), COLORS['red'] if blocked_sos else COLORS['green'])
+    if DELTA_SHEET:
+        srow(ws4, f"🔄 Since last run ({delta_prev['run']})" if delta else "🔄 Since last run",
+             f"{delta_counts['critical']} new critical / {delta_counts['resolved']} resolved / "
+             f"{delta_counts['swings']} qty swings" if delta else "First run — no earlier snapshot", COLORS['blue'])
     ws4.append([])
     srow(ws4, "💰 Estimated total PO value", f"${total_value:,.0f}", COLORS['blue'], True)
+    srow(ws4, "💡 Savings with best vendor / price break", f"${total_savings:,.0f}", COLORS['green'])
+    if po_actions:
+        verb = "to create / update" if WRITE_BACK_DRY_RUN else "created / updated"
+        srow(ws4, f"📝 Draft POs {verb}" + (" (dry run)" if WRITE_BACK_DRY_RUN else ""),
+             ' / '.join(f"{sum(1 for a in po_actions if a['action'] == act)} {act}"
+                        for act in ('create', 'update', 'skip')), COLORS['blue'])
     ws4.append([])
 
     # Supplier summary
@@ -913,6 +1556,8 @@ try:
     output_file = f"po_plan_{now.strftime('%Y%m%d_%H%M')}.xlsx"
     wb.save(output_file)
     print(f"✅ Saved: {output_file}")
+    if DELTA_SHEET:
+        dl.save('po_plan', plan_snap, now)
     print("=== Done ===")
 
 except Exception as e:
@@ -0,0 +1,93 @@
+import odoo_client as oc
+from collections import defaultdict
+
+# ================================================================
+# DRAFT PO WRITE-BACK — plan rows → one draft purchase.order per supplier and currency
+# ================================================================
+# A PO has a single currency and each line's price is in its own currency, so
+# a supplier whose parts were last bought in different currencies gets one
+# draft per currency. Idempotency: every PO created here carries `key` in its
+# Source Document (origin). A re-run with the same key rewrites the lines of
+# the matching (supplier, currency) draft instead of creating a second one; POs
+# with that key that are already confirmed are left alone. New POs go out in
+# multi-record create calls.
+CREATE_CHUNK = 50   # purchase orders per create() call
+
+
+def write_drafts(models, uid, lines, key, dry_run=True):
+    """
+    lines — dicts with supplier_id, supplier, product_id, qty, price (in `currency`),
+            currency, date_planned ('YYYY-MM-DD')
+    Returns one action dict per (supplier, currency): supplier, currency, action (create / update / skip),
+    po, lines, value (in that currency).
+    """
+    by_sup = defaultdict(list)
+    for l in lines:
+        if l['supplier_id'] and l['qty'] > 0:
+            by_sup[(l['supplier_id'], l.get('currency') or '')].append(l)
+    if not by_sup:
+        return []
+
+    existing = oc.search_read_all(models, uid, 'purchase.order',
+        [['origin', '=', key], ['partner_id', 'in', list({sid for sid, _ in by_sup})], ['state', '!=', 'cancel']],
+        ['name', 'partner_id', 'state', 'currency_id']
+    )
+    draft_of, locked = {}, {}
+    for po in existing:
+        k = (oc.m2o_id(po['partner_id']), po['currency_id'][1] if po.get('currency_id') else '')
+        if po['state'] == 'draft':
+            draft_of.setdefault(k, po)
+        else:
+            locked[k] = po
+
+    prods = oc.read_batched(models, uid, 'product.product',
+                            {l['product_id'] for ls in by_sup.values() for l in ls},
+                            ['display_name', 'uom_id'])
+    curr_ids = {c['name']: c['id'] for c in oc.execute(models, uid, 'res.currency', 'search_read',
+        [[['name', 'in', list({l['currency'] for l in lines if l.get('currency')})]]], {'fields': ['name']}
+    )}
+
+    def line_vals(l):
+        p = prods.get(l['product_id'], {})
+        return (0, 0, {
+            'product_id':   l['product_id'],
+            'name':         p.get('display_name', ''),
+            'product_qty':  l['qty'],
+            'product_uom':  oc.m2o_id(p.get('uom_id')),
+            'price_unit':   l['price'],
+            'date_planned': l['date_planned'] + ' 12:00:00',
+        })
+
+    actions, to_create = [], []
+    for k, ls in by_sup.items():
+        sid, curr = k
+        act = {'supplier': ls[0]['supplier'], 'lines': len(ls),
+               'value': round(sum(l['qty'] * l['price'] for l in ls), 2), 'currency': curr}
+        if k in locked:
+            act.update(action='skip', po=f"{locked[k]['name']} ({locked[k]['state']})")
+        elif k in draft_of:
+            act.update(action='update', po=draft_of[k]['name'])
+            if not dry_run:
+                oc.execute(models, uid, 'purchase.order', 'write',
+                    [[draft_of[k]['id']], {'order_line': [(5, 0, 0)] + [line_vals(l) for l in ls]}])
+        else:
+            act.update(action='create', po='')
+            vals = {'partner_id': sid, 'origin': key, 'order_line': [line_vals(l) for l in ls]}
+            if curr_ids.get(curr):
+                vals['currency_id'] = curr_ids[curr]
+            to_create.append((act, vals))
+        actions.append(act)
+
+    if not dry_run:
+        for i in range(0, len(to_create), CREATE_CHUNK):
+            chunk   = to_create[i:i + CREATE_CHUNK]
+            new_ids = oc.execute(models, uid, 'purchase.order', 'create', [[v for _, v in chunk]])
+            names   = oc.read_batched(models, uid, 'purchase.order', new_ids, ['name'])
+            for (act, _), po_id in zip(chunk, new_ids):
+                act['po'] = names.get(po_id, {}).get('name', '')
+
+    verb = "Would" if dry_run else "Did"
+    print(f"  {verb} create {sum(1 for a in actions if a['action'] == 'create')}, "
+          f"update {sum(1 for a in actions if a['action'] == 'update')}, "
+          f"skip {sum(1 for a in actions if a['action'] == 'skip')} draft POs  (key '{key}')")
+    return actions
@@ -0,0 +1,108 @@
+import os
+import numpy as np
+import odoo_client as oc
+
+# ================================================================
+# PURCHASE PRICE HISTORY — append-only local store of confirmed PO lines
+# ================================================================
+# One entry per purchase.order.line of a confirmed/done PO, as numpy columns
+# in STORE_FILE. sync() only pulls lines of POs approved since the newest
+# approval already stored (same-second duplicates are dropped by line id).
+STORE_FILE = 'price_history_store.npz'
+
+COLUMNS = {
+    'line_id':    np.int32,
+    'product_id': np.int32,
+    'date':       'datetime64[s]',
+    'price':      np.float64,      # unit price in the PO currency
+    'qty':        np.float64,
+    'currency':   '<U3',
+    'po_name':    '<U24',
+}
+
+
+def load(path=STORE_FILE):
+    if not os.path.exists(path):
+        return {k: np.zeros(0, dtype=t) for k, t in COLUMNS.items()}
+    with np.load(path) as f:
+        return {k: f[k].astype(t) for k, t in COLUMNS.items()}
+
+
+def sync(models, uid, path=STORE_FILE):
+    """Append PO lines approved since the last sync and save. Returns the full store."""
+    store  = load(path)
+    domain = [['order_id.state', 'in', ['purchase', 'done']], ['date_approve', '!=', False],
+              ['product_id', '!=', False]]
+    if len(store['date']):
+        domain.append(['date_approve', '>=', str(store['date'].max()).replace('T', ' ')])
+    print(f"Syncing purchase price history ({len(store['line_id'])} lines on file)...")
+
+    lines = oc.search_read_all(models, uid, 'purchase.order.line', domain,
+                               ['product_id', 'price_unit', 'product_qty', 'currency_id',
+                                'order_id', 'date_approve'])
+    known = set(store['line_id'].tolist())
+    lines = [l for l in lines if l['id'] not in known and l.get('price_unit')]
+    if not lines:
+        print("  → up to date")
+        return store
+
+    new = {
+        'line_id':    np.array([l['id'] for l in lines], dtype=np.int32),
+        'product_id': np.array([oc.m2o_id(l['product_id']) for l in lines], dtype=np.int32),
+        'date':       oc.to_datetime64([l['date_approve'] for l in lines]),
+        'price':      np.array([l['price_unit'] for l in lines], dtype=np.float64),
+        'qty':        np.array([l['product_qty'] or 0.0 for l in lines], dtype=np.float64),
+        'currency':   np.array([l['currency_id'][1] if l.get('currency_id') else 'USD' for l in lines], dtype='<U3'),
+        'po_name':    np.array([l['order_id'][1] if l.get('order_id') else '' for l in lines], dtype='<U24'),
+    }
+    store = {k: np.concatenate([store[k], new[k]]) for k in COLUMNS}
+    np.savez_compressed(path, **store)
+    print(f"  → {len(lines)} new lines, {len(store['line_id'])} total")
+    return store
+
+
+def stats(store, price_usd, today, months=12):
+    """
+    Per product, from the whole store in one grouped pass:
+      last (store row index of the most recent line), avg_12m (qty-weighted),
+      min / max (all history), slope (USD per year over the trailing window, least squares).
+    price_usd — the store's price column already converted to USD (odoo_fx.column_to_usd).
+    Returns {'ids', 'last', 'avg_12m', 'min', 'max', 'slope', 'n_12m'} arrays sorted by id.
+    """
+    pid   = store['product_id']
+    if not len(pid):
+        empty = np.zeros(0, dtype=np.float64)
+        return {'ids': np.zeros(0, dtype=pid.dtype), 'last': np.zeros(0, dtype=np.int64), 'avg_12m': empty,
+                'min': empty, 'max': empty, 'slope': empty, 'n_12m': np.zeros(0, dtype=np.int64)}
+    order = np.lexsort((store['date'], pid))
+    ids, inv = np.unique(pid, return_inverse=True)
+    n     = len(ids)
+    grp   = inv.ravel()
+    usd   = np.asarray(price_usd, dtype=np.float64)
+
+    by_pid  = pid[order]
+    last    = order[np.append(by_pid[1:] != by_pid[:-1], True)]   # most recent row per product
+
+    mn = np.full(n, np.inf)
+    mx = np.full(n, -np.inf)
+    np.minimum.at(mn, grp, usd)
+    np.maximum.at(mx, grp, usd)
+
+    since = np.datetime64(today, 's') - np.timedelta64(int(months * 30.44 * 86400), 's')
+    win   = store['date'] >= since
+    w     = np.where(win, store['qty'], 0.0)
+    sw    = np.bincount(grp, weights=w, minlength=n)
+    avg   = np.where(sw > 0, np.bincount(grp, weights=w * usd, minlength=n) / np.where(sw > 0, sw, 1), np.nan)
+
+    # Trend: slope of usd on years since window start, per product (unweighted)
+    t     = (store['date'] - since).astype(np.float64) / (365.25 * 86400)
+    c     = np.bincount(grp, weights=win.astype(np.float64), minlength=n)
+    st    = np.bincount(grp, weights=np.where(win, t, 0.0), minlength=n)
+    sp    = np.bincount(grp, weights=np.where(win, usd, 0.0), minlength=n)
+    stt   = np.bincount(grp, weights=np.where(win, t * t, 0.0), minlength=n)
+    stp   = np.bincount(grp, weights=np.where(win, t * usd, 0.0), minlength=n)
+    den   = c * stt - st * st
+    slope = np.where((c >= 2) & (den > 1e-12), (c * stp - st * sp) / np.where(den > 1e-12, den, 1), 0.0)
+
+    return {'ids': ids, 'last': last, 'avg_12m': avg, 'min': mn, 'max': mx, 'slope': slope,
+            'n_12m': c.astype(np.int64)}
@@ -1,6 +1,8 @@
 import xmlrpc.client
 import openpyxl
 import odoo_config as cfg
+import odoo_dataset_export as dx
+import odoo_mps as mps
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from collections import defaultdict
@@ -143,17 +145,26 @@ try:
     # Also track which finished product each component comes from
     comp_by_finished = defaultdict(lambda: defaultdict(float))  # comp_id -> ref -> qty_per_unit
 
+    # Finished-goods demand per month — flat plan, or the MPS forecast (cfg.DEMAND_SOURCE)
+    if cfg.DEMAND_SOURCE == 'mps':
+        demand_refs, demand, demand_src = mps.demand_matrix(models, uid, MONTHLY_PLAN, now.date(), PLANNING_MONTHS)
+    else:
+        demand_refs = list(MONTHLY_PLAN)
+        demand      = mps.static_matrix(MONTHLY_PLAN, demand_refs, PLANNING_MONTHS)
+    demand_by_ref = dict(zip(demand_refs, demand))
+
     for ref, plan_qty in MONTHLY_PLAN.items():
         if ref not in bom_by_ref:
             continue
         bom_id = bom_by_ref[ref]['id']
         comp_totals = {}
-        explode_bom(models, uid, bom_id, plan_qty, bom_cache, comp_totals)
+        # Per finished unit — the monthly demand (flat plan or MPS, possibly with a 0 static rate) scales it
+        explode_bom(models, uid, bom_id, 1, bom_cache, comp_totals)
         print(f"  {ref} ({plan_qty}/mo): {len(comp_totals)} components")
         for comp_id, info in comp_totals.items():
-            for m in months:
-                monthly_req[m][comp_id] += info['qty']
-            comp_by_finished[comp_id][ref] = info['qty'] / plan_qty  # qty per unit
+            for i, m in enumerate(months):
+                monthly_req[m][comp_id] += info['qty'] * demand_by_ref[ref][i]
+            comp_by_finished[comp_id][ref] = info['qty']  # qty per unit
 
     # All component IDs
     all_comp_ids = set()
@@ -192,6 +203,7 @@ try:
           ['location_id.usage', '=', 'internal']]],
         {'fields': ['product_id', 'quantity', 'reserved_quantity']}
     )
+    dx.export('quants', quants)
     stock_by_comp = defaultdict(float)
     for q in quants:
         stock_by_comp[q['product_id'][0]] += max(0, q['quantity'] - q['reserved_quantity'])
@@ -205,6 +217,7 @@ try:
         {'fields': ['product_id', 'product_qty', 'qty_received', 'qty_invoiced',
                     'date_planned', 'order_id']}
     )
+    dx.export('po_lines', po_lines)
     po_by_comp = defaultdict(float)
     po_detail_by_comp = defaultdict(list)  # for debugging
     for l in po_lines:
@@ -368,8 +381,9 @@ try:
         # Row 2 - subtitle
         ws.cell(row=2, column=1,
                 value=(f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
-                       f"Plan: C-100×150, C2 clearflo×40, C2 Bird×20, C2 Yellow×20 per month   |   "
-                       f"Horizon: {months[0]} → {months[-1]}"))
+                       + (f"Plan: C-100×150, C2 clearflo×40, C2 Bird×20, C2 Yellow×20 per month   |   "
+                          if cfg.DEMAND_SOURCE != 'mps' else "Demand: MPS forecast by month   |   ")
+                       + f"Horizon: {months[0]} → {months[-1]}"))
         try:
             ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=NUM_COLS)
         except Exception:
@@ -1,6 +1,13 @@
 import xmlrpc.client
+import time
 import openpyxl
+import numpy as np
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_frames as fr
+import odoo_dataset_export as dx
+import odoo_mo_allocation as moa
+import odoo_capacity as cap
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from openpyxl.chart import BarChart, Reference
@@ -21,6 +28,12 @@ MO_STATE_MAP = {
 }
 ACTIVE_STATES = ['draft', 'confirmed', 'progress']
 
+# Capacity — load of all open MOs + the part of MONTHLY_PRODUCTION_PLAN not yet
+# covered by MOs, against each work center's calendar
+MONTHLY_PLAN      = cfg.MONTHLY_PRODUCTION_PLAN
+CAPACITY_WARN     = 0.85   # utilization shaded amber from here
+CAPACITY_OVERLOAD = 1.00   # and red above this
+
 # ================================================================
 # HELPERS
 # ================================================================
@@ -107,19 +120,22 @@ try:
     )
     print(f"  → {len(mos)} open MOs found\n")
 
-    # Annotate MOs
-    for mo in mos:
-        dp = mo.get('date_planned_start', '')
-        mo['_dt']     = datetime.strptime(dp[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc) if dp else None
-        mo['_month']  = f"{mo['_dt'].year}-{mo['_dt'].month:02d}" if mo['_dt'] else 'Unknown'
-        mo['_device'] = device_line(mo['product_id'][0])
-        mo['_state']  = MO_STATE_MAP.get(mo['state'], mo['state'])
-        mo['_overdue'] = mo['_dt'] and mo['_dt'] < now and mo['state'] in ['draft', 'confirmed']
-        mo['_age_days'] = (now - mo['_dt']).days if mo['_dt'] else 0
+    # Columnar view of the MOs: dates parsed once, every attribute an array over the MOs
+    today = np.datetime64(now.replace(tzinfo=None), 'us')
+    M = fr.frame(mos, {'product_id': 'm2o', 'state': 'cat', 'date_planned_start': 'datetime'})
+    mo_dt      = M['date_planned_start']
+    mo_prod    = M['product_id_id']
+    mo_ym      = fr.month_strings(mo_dt)
+    mo_day     = fr.day_strings(mo_dt)
+    mo_device  = np.where(np.isin(mo_prod, list(c2_ids)), 'C2', 'C-100')
+    codes, cats = fr.recode(M['state'], M['cats']['state'], MO_STATE_MAP)
+    mo_state   = cats[codes]
+    mo_overdue = ~np.isnat(mo_dt) & (mo_dt < today) & np.isin(fr.labels(M, 'state'), ['draft', 'confirmed'])
+    mo_age     = fr.age_days(mo_dt, now)
+    mo_by_date = np.argsort(mo_dt, kind='stable').tolist()   # undated MOs last
 
     # Categorize
-    overdue_mos  = [m for m in mos if m['_overdue']]
-    future_mos   = [m for m in mos if not m['_overdue']]
+    overdue_mos  = np.flatnonzero(mo_overdue)
 
     # --- Fetch open POs ---
     print("Fetching open purchase orders...")
@@ -130,17 +146,18 @@ try:
         {'fields': ['product_id', 'product_qty', 'qty_received',
                     'date_planned', 'order_id', 'price_unit']}
     )
+    dx.export('po_lines', po_lines)
     # Filter to actually outstanding
     po_lines = [l for l in po_lines if l['product_qty'] - l['qty_received'] > 0]
     print(f"  → {len(po_lines)} outstanding PO lines\n")
 
-    for l in po_lines:
-        dp = l.get('date_planned', '')
-        l['_dt']      = datetime.strptime(dp[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc) if dp else None
-        l['_month']   = f"{l['_dt'].year}-{l['_dt'].month:02d}" if l['_dt'] else 'Unknown'
-        l['_remaining'] = l['product_qty'] - l['qty_received']
-        l['_device']  = device_line(l['product_id'][0])
-        l['_overdue'] = l['_dt'] and l['_dt'] < now
+    P = fr.frame(po_lines, {'product_id': 'm2o', 'date_planned': 'datetime',
+                            'product_qty': 'float', 'qty_received': 'float'})
+    po_dt        = P['date_planned']
+    po_remaining = P['product_qty'] - P['qty_received']
+    po_device    = np.where(np.isin(P['product_id_id'], list(c2_ids)), 'C2', 'C-100')
+    po_overdue   = ~np.isnat(po_dt) & (po_dt < today)
+    po_day       = fr.day_strings(po_dt)
 
     # --- Fetch current stock (all internal locations) ---
     print("Fetching current stock...")
@@ -149,6 +166,7 @@ try:
           ['location_id.usage', '=', 'internal']]],
         {'fields': ['product_id', 'quantity', 'reserved_quantity', 'location_id']}
     )
+    dx.export('quants', quants)
     stock_by_prod = defaultdict(float)
     for q in quants:
         avail = q['quantity'] - q['reserved_quantity']
@@ -172,6 +190,80 @@ try:
     for l in so_lines:
         so_by_prod[l['product_id'][0]] += l['product_uom_qty'] - l['qty_delivered']
 
+    # --- Component shortages: on-hand stock allocated to open MOs in planned order ---
+    print("Checking components of open MOs...")
+    raw = moa.fetch_raw_moves(models, uid)
+    comp_ids = np.unique(raw['product_id']).tolist()
+    comp_quants = oc.search_read_all(models, uid, 'stock.quant',
+        [['product_id', 'in', comp_ids], ['location_id.usage', '=', 'internal']],
+        ['product_id', 'quantity']
+    ) if comp_ids else []
+    comp_stock = defaultdict(float)
+    for q in comp_quants:
+        comp_stock[q['product_id'][0]] += q['quantity']
+    t0 = time.perf_counter()
+    raw_alloc, raw_short = moa.allocate(raw, comp_stock)
+    print(f"  → {len(raw['need'])} component moves on {len(np.unique(raw['mo_id']))} MOs "
+          f"allocated in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    short_idx  = np.flatnonzero(raw_short > 1e-6)
+    comp_info  = oc.read_batched(models, uid, 'product.product',
+                                 np.unique(raw['product_id'][short_idx]).tolist(), ['default_code', 'name'])
+    comps_by_mo = defaultdict(int)
+    for m in raw['mo_id'].tolist():
+        comps_by_mo[m] += 1
+    short_by_mo = defaultdict(list)   # mo id → [(component id, need, allocated, short)]
+    for i in short_idx.tolist():
+        short_by_mo[int(raw['mo_id'][i])].append(
+            (int(raw['product_id'][i]), float(raw['need'][i]), float(raw_alloc[i]), float(raw_short[i])))
+    short_mos = [i for i in mo_by_date if mos[i]['id'] in short_by_mo]
+    print(f"  → {len(short_mos)} of {len(mos)} plan MOs short on at least one component\n")
+
+    # --- Capacity: work centers × weeks over the planning horizon ---
+    print("Loading routings and work-center calendars...")
+    cap_start = now.date() - timedelta(days=now.weekday())
+    last_y, last_m = months[-1]
+    cap_weeks = ((datetime(last_y, last_m, monthrange(last_y, last_m)[1]).date() - cap_start).days // 7) + 1
+    all_mos = oc.search_read_all(models, uid, 'mrp.production', [['state', 'in', ACTIVE_STATES]],
+                                 ['product_id', 'product_qty', 'qty_produced', 'date_planned_start'])
+    plan_prods = oc.execute(models, uid, 'product.product', 'search_read',
+        [[['default_code', 'in', list(MONTHLY_PLAN)]]], {'fields': ['default_code']})
+    cap_model = cap.build(models, uid, {m['product_id'][0] for m in all_mos} | {p['id'] for p in plan_prods},
+                          cap_start, cap_weeks)
+
+    mo_pid  = [m['product_id'][0] for m in all_mos]
+    mo_date = oc.to_datetime64([m['date_planned_start'] for m in all_mos])
+    mo_qty  = np.array([max(m['product_qty'] - (m['qty_produced'] or 0), 0.0) for m in all_mos])
+    Q_mo, N_mo = cap.qty_matrix(cap_model, mo_pid, cap.week_index(cap_model, mo_date), mo_qty)
+
+    # Plan not yet covered by MOs, spread evenly over the remaining days of each month
+    mo_month = mo_date.astype('datetime64[M]')
+    plan_pid, plan_day, plan_qty = [], [], []
+    for p in plan_prods:
+        for y, m in months:
+            month   = np.datetime64(f"{y}-{m:02d}", 'M')
+            covered = mo_qty[(np.array(mo_pid) == p['id']) & (mo_month == month)].sum() if all_mos else 0.0
+            net     = MONTHLY_PLAN[p['default_code']] - covered
+            if net <= 0:
+                continue
+            first = max(month.astype('datetime64[D]'), np.datetime64(now.date(), 'D'))
+            days  = np.arange(first, (month + 1).astype('datetime64[D]'))
+            plan_pid += [p['id']] * len(days)
+            plan_day.append(days)
+            plan_qty.append(np.full(len(days), net / len(days)))
+    plan_day = np.concatenate(plan_day) if plan_day else np.zeros(0, dtype='datetime64[D]')
+    plan_qty = np.concatenate(plan_qty) if plan_qty else np.zeros(0)
+
+    t0 = time.perf_counter()
+    Q_plan, _ = cap.qty_matrix(cap_model, plan_pid, cap.week_index(cap_model, plan_day), plan_qty)
+    cap_load  = cap.load(cap_model, Q_mo, N_mo) + cap.load(cap_model, Q_plan)
+    cap_hours = cap_model['capacity']
+    cap_util  = np.where(cap_hours > 0, cap_load / np.where(cap_hours > 0, cap_hours, 1.0),
+                         np.where(cap_load > 0, np.inf, 0.0))
+    overloaded = cap_util > CAPACITY_OVERLOAD
+    print(f"  → {len(cap_model['wc_ids'])} work centers × {cap_weeks} weeks, load recomputed in "
+          f"{(time.perf_counter() - t0) * 1000:.1f} ms — {int(overloaded.sum())} overloaded week(s)\n")
+
     # ================================================================
     # BUILD EXCEL
     # ================================================================
@@ -196,7 +288,8 @@ try:
     ws.merge_cells("A2:K2")
     ws["A2"] = (f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
                 f"Planning Horizon: {month_labels[0]} → {month_labels[-1]}   |   "
-                f"Open MOs: {len(mos)}   |   Overdue MOs: {len(overdue_mos)}")
+                f"Open MOs: {len(mos)}   |   Overdue MOs: {len(overdue_mos)}   |   "
+                f"Short on components: {len(short_mos)}   |   Overloaded WC-weeks: {int(overloaded.sum())}")
     ws["A2"].font      = Font(italic=True)
     ws["A2"].alignment = Alignment(horizontal="center")
     ws.append([])
@@ -209,8 +302,8 @@ try:
         pid    = p['id']
         stock  = stock_by_prod.get(pid, 0)
         demand = so_by_prod.get(pid, 0)
-        open_mo_cnt   = sum(1 for m in mos if m['product_id'][0] == pid)
-        overdue_cnt   = sum(1 for m in overdue_mos if m['product_id'][0] == pid)
+        open_mo_cnt   = int((mo_prod == pid).sum())
+        overdue_cnt   = int(((mo_prod == pid) & mo_overdue).sum())
         net    = stock + open_mo_cnt - demand
         short_name = p['name'][:42]
 
@@ -230,12 +323,10 @@ try:
     write_headers(ws, ["Product", "Ref", "Device"] + month_labels + ["Overdue", "Total Open"], MAIN_COLOR)
     for p in sorted(products, key=lambda x: x['default_code']):
         pid = p['id']
-        month_counts = []
-        for ym in month_labels:
-            cnt = sum(1 for m in mos if m['product_id'][0] == pid and m['_month'] == ym)
-            month_counts.append(cnt)
-        overdue_cnt = sum(1 for m in overdue_mos if m['product_id'][0] == pid)
-        total       = sum(1 for m in mos if m['product_id'][0] == pid)
+        of_p        = mo_prod == pid
+        month_counts = [int((of_p & (mo_ym == ym)).sum()) for ym in month_labels]
+        overdue_cnt = int((of_p & mo_overdue).sum())
+        total       = int(of_p.sum())
         row_fill = make_fill("FFD9B3") if overdue_cnt > 0 else make_fill("DDEBF7")
         ws.append([p['name'][:42], p['default_code'], device_line(pid)]
                   + month_counts + [overdue_cnt, total])
@@ -245,17 +336,16 @@ try:
     # --- TABLE 3: Outstanding PO Commitments ---
     write_section_title(ws, "  🚚  Outstanding Purchase Order Commitments", "375623", 7)
     write_headers(ws, ["Product", "Ref", "Device", "Remaining Qty", "Expected Date", "Overdue?", "PO #"], "375623")
-    po_sorted = sorted(po_lines, key=lambda x: x['_dt'] or datetime.max.replace(tzinfo=timezone.utc))
-    for l in po_sorted:
-        overdue_str = "⚠ OVERDUE" if l['_overdue'] else "On Track"
-        row_fill = make_fill("FFB3B3") if l['_overdue'] else make_fill("E2EFDA")
-        date_str = l['_dt'].strftime('%Y-%m-%d') if l['_dt'] else 'Unknown'
+    for i in np.argsort(po_dt, kind='stable').tolist():
+        l = po_lines[i]
+        overdue_str = "⚠ OVERDUE" if po_overdue[i] else "On Track"
+        row_fill = make_fill("FFB3B3") if po_overdue[i] else make_fill("E2EFDA")
         ws.append([
             l['product_id'][1][:42],
             prod_map.get(l['product_id'][0], {}).get('default_code', ''),
-            l['_device'],
-            l['_remaining'],
-            date_str,
+            str(po_device[i]),
+            float(po_remaining[i]),
+            str(po_day[i]) or 'Unknown',
             overdue_str,
             l['order_id'][1] if l.get('order_id') else ''
         ])
@@ -285,15 +375,16 @@ try:
 
     write_headers(ws2, ["MO #", "Product", "Device", "State", "Planned Date", "Days Overdue", "Origin"], OVERDUE_COLOR)
     ws2.freeze_panes = "A4"
-    for mo in sorted(overdue_mos, key=lambda x: x['_age_days'], reverse=True):
-        days = mo['_age_days']
+    for i in overdue_mos[np.argsort(-mo_age[overdue_mos], kind='stable')].tolist():
+        mo   = mos[i]
+        days = int(mo_age[i])
         row_fill = make_fill("FFB3B3") if days > 60 else make_fill("FFD9B3") if days > 30 else make_fill("FFF2CC")
         ws2.append([
             mo['name'],
             mo['product_id'][1][:42],
-            mo['_device'],
-            mo['_state'],
-            mo['_dt'].strftime('%Y-%m-%d') if mo['_dt'] else '',
+            str(mo_device[i]),
+            str(mo_state[i]),
+            str(mo_day[i]),
             days,
             mo.get('origin', '') or ''
         ])
@@ -323,13 +414,13 @@ try:
     write_headers(ws3, ["MO #", "Product", "Device", "Ref", "State", "Planned Date", "Month", "Origin"], MAIN_COLOR)
     ws3.freeze_panes = "A4"
 
-    for mo in sorted(mos, key=lambda x: x['_dt'] or datetime.max.replace(tzinfo=timezone.utc)):
-        days = mo['_age_days']
-        if mo['_overdue']:
+    for i in mo_by_date:
+        mo = mos[i]
+        if mo_overdue[i]:
             row_fill = make_fill("FFD9B3")
-        elif mo['_month'] == month_labels[0]:
+        elif mo_ym[i] == month_labels[0]:
             row_fill = make_fill("E2EFDA")
-        elif mo['_month'] == month_labels[1] if len(month_labels) > 1 else '':
+        elif mo_ym[i] == month_labels[1] if len(month_labels) > 1 else '':
             row_fill = make_fill("DDEBF7")
         else:
             row_fill = make_fill("F2F2F2")
@@ -338,15 +429,139 @@ try:
         ws3.append([
             mo['name'],
             mo['product_id'][1][:42],
-            mo['_device'],
+            str(mo_device[i]),
             ref,
-            mo['_state'],
-            mo['_dt'].strftime('%Y-%m-%d') if mo['_dt'] else '',
-            mo['_month'],
+            str(mo_state[i]),
+            str(mo_day[i]),
+            str(mo_ym[i]),
             mo.get('origin', '') or ''
         ])
         style_row(ws3, ws3.max_row, 8, row_fill, left_cols=[1, 2, 3, 4, 5, 7, 8])
 
+    # ================================================================
+    # SHEET 4 — COMPONENT SHORTAGES
+    # ================================================================
+    ws4 = wb.create_sheet("🧩 MO Shortages")
+    ws4.column_dimensions["A"].width = 14
+    ws4.column_dimensions["B"].width = 45
+    ws4.column_dimensions["C"].width = 14
+    ws4.column_dimensions["D"].width = 40
+    for i in range(5, 10):
+        ws4.column_dimensions[get_column_letter(i)].width = 14
+
+    ws4.append(["Open MOs — Component Availability"])
+    ws4.merge_cells("A1:I1")
+    ws4["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws4["A1"].fill      = make_fill(MAIN_COLOR)
+    ws4["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws4.row_dimensions[1].height = 22
+    ws4.append([f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   On-hand stock allocated to all open MOs "
+                f"in planned-date order   |   {len(short_mos)} of {len(mos)} MOs short"])
+    ws4.merge_cells("A2:I2")
+    ws4["A2"].font = Font(italic=True)
+    ws4["A2"].alignment = Alignment(horizontal="center")
+    ws4.append([])
+
+    write_headers(ws4, ["MO #", "Product", "Planned Date", "Most Short Component", "Short Qty",
+                        "Components", "Short\nComponents", "State", "Status"], MAIN_COLOR)
+    ws4.freeze_panes = "A4"
+    for i in mo_by_date:
+        mo    = mos[i]
+        lines = short_by_mo.get(mo['id'], [])
+        if lines:
+            worst = max(lines, key=lambda l: l[3])
+            ci    = comp_info.get(worst[0], {})
+            comp  = f"[{ci.get('default_code') or ''}] {ci.get('name', '')}"[:40]
+            row_fill = make_fill("FFB3B3") if any(l[2] == 0 for l in lines) else make_fill("FFD9B3")
+            status   = "⛔ SHORT"
+        else:
+            worst, comp = None, ''
+            row_fill = make_fill("E2EFDA")
+            status   = "✅ Covered" if comps_by_mo.get(mo['id']) else "No components"
+        ws4.append([
+            mo['name'],
+            mo['product_id'][1][:42],
+            str(mo_day[i]),
+            comp,
+            round(worst[3], 2) if worst else '',
+            comps_by_mo.get(mo['id'], 0),
+            len(lines) or '',
+            str(mo_state[i]),
+            status,
+        ])
+        style_row(ws4, ws4.max_row, 9, row_fill, left_cols=[1, 2, 4])
+
+    if short_mos:
+        ws4.append([])
+        write_section_title(ws4, "  🧩  Short Component Lines", OVERDUE_COLOR, 8)
+        write_headers(ws4, ["MO #", "Product", "Planned Date", "Component", "Short Qty",
+                            "Needed", "Allocated", "Component Ref"], OVERDUE_COLOR)
+        for i in short_mos:
+            mo = mos[i]
+            for comp_id, need, alloc, short in sorted(short_by_mo[mo['id']], key=lambda l: -l[3]):
+                ci = comp_info.get(comp_id, {})
+                ws4.append([
+                    mo['name'],
+                    mo['product_id'][1][:42],
+                    str(mo_day[i]),
+                    ci.get('name', '')[:40],
+                    round(short, 2),
+                    round(need, 2),
+                    round(alloc, 2),
+                    ci.get('default_code') or '',
+                ])
+                style_row(ws4, ws4.max_row, 8, make_fill("FFB3B3") if alloc == 0 else make_fill("FFF2CC"),
+                          left_cols=[1, 2, 4, 8])
+
+    # ================================================================
+    # SHEET 5 — CAPACITY LOAD
+    # ================================================================
+    ws5 = wb.create_sheet("🏭 Capacity")
+    ncol = cap_weeks + 2
+    ws5.column_dimensions["A"].width = 30
+    for i in range(2, ncol + 1):
+        ws5.column_dimensions[get_column_letter(i)].width = 11
+    week_labels = [(cap_start + timedelta(weeks=w)).strftime('%m-%d') for w in range(cap_weeks)]
+
+    ws5.append(["Work-Center Load vs Capacity — by Week"])
+    ws5.merge_cells(f"A1:{get_column_letter(ncol)}1")
+    ws5["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws5["A1"].fill      = make_fill(MAIN_COLOR)
+    ws5["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws5.row_dimensions[1].height = 22
+    ws5.append([f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   All open MOs + monthly plan not yet on MOs   |   "
+                f"Red > {CAPACITY_OVERLOAD:.0%}, amber > {CAPACITY_WARN:.0%} of calendar hours"])
+    ws5.merge_cells(f"A2:{get_column_letter(ncol)}2")
+    ws5["A2"].font = Font(italic=True)
+    ws5["A2"].alignment = Alignment(horizontal="center")
+    ws5.append([])
+
+    def util_fill(u):
+        return make_fill("FFB3B3") if u > CAPACITY_OVERLOAD else make_fill("FFD9B3") if u > CAPACITY_WARN \
+               else make_fill("E2EFDA") if u > 0 else make_fill("F2F2F2")
+
+    write_section_title(ws5, "  📈  Utilization (% of available hours)", MAIN_COLOR, ncol)
+    write_headers(ws5, ["Work Center"] + [f"Wk {l}" for l in week_labels] + ["Overloaded\nWeeks"], MAIN_COLOR)
+    for j, name in enumerate(cap_model['wc_names']):
+        ws5.append([name[:30]] + [("∞" if np.isinf(u) else f"{u:.0%}") if u else '' for u in cap_util[j]]
+                   + [int(overloaded[j].sum())])
+        rn = ws5.max_row
+        style_row(ws5, rn, ncol, make_fill("FFB3B3") if overloaded[j].any() else make_fill("DDEBF7"), left_cols=[1])
+        for w, u in enumerate(cap_util[j]):
+            ws5.cell(rn, w + 2).fill = util_fill(u)
+    ws5.append([])
+
+    write_section_title(ws5, "  ⏱  Load / Available Hours", MAIN_COLOR, ncol)
+    write_headers(ws5, ["Work Center"] + [f"Wk {l}" for l in week_labels] + ["Total\nLoad (h)"], MAIN_COLOR)
+    for j, name in enumerate(cap_model['wc_names']):
+        ws5.append([name[:30]] + [f"{l:.0f} / {c:.0f}" for l, c in zip(cap_load[j], cap_hours[j])]
+                   + [round(float(cap_load[j].sum()), 1)])
+        rn = ws5.max_row
+        style_row(ws5, rn, ncol, make_fill("F2F2F2"), left_cols=[1])
+        for w, u in enumerate(cap_util[j]):
+            ws5.cell(rn, w + 2).fill = util_fill(u)
+    ws5.freeze_panes = "B4"
+
     # Save
     output_file = f"production_plan_{now.strftime('%Y%m%d_%H%M')}.xlsx"
     wb.save(output_file)
@@ -358,10 +573,14 @@ try:
         pid = p['id']
         stock = stock_by_prod.get(pid, 0)
         demand = so_by_prod.get(pid, 0)
-        mo_cnt = sum(1 for m in mos if m['product_id'][0] == pid)
-        ov_cnt = sum(1 for m in overdue_mos if m['product_id'][0] == pid)
+        mo_cnt = int((mo_prod == pid).sum())
+        ov_cnt = int(((mo_prod == pid) & mo_overdue).sum())
         print(f"  {p['default_code']:<10} | Stock: {stock:>4.0f} | Demand: {demand:>4.0f} | "
               f"Open MOs: {mo_cnt:>3} | Overdue: {ov_cnt:>3}")
+    print(f"  MOs short on components: {len(short_mos)}")
+    for j in np.flatnonzero(overloaded.any(axis=1)):
+        print(f"  Overloaded: {cap_model['wc_names'][j]} — weeks of "
+              f"{', '.join(week_labels[w] for w in np.flatnonzero(overloaded[j]))}")
     print("=== Done ===")
 
 except Exception as e:
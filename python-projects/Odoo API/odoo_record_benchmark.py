@@ -0,0 +1,92 @@
+import gc
+import time
+import tracemalloc
+import odoo_client as oc
+from collections import defaultdict
+
+# ================================================================
+# Benchmark — memory of search_read dicts vs compact __slots__ records
+# Synthetic rows shaped like the XML-RPC results (a fresh string object per
+# value, as the parser creates them) so it runs without Odoo. Each variant is
+# built page by page like search_read_all, and only what the loop keeps is
+# measured: the dicts themselves, or the records decoded from each page.
+# ================================================================
+MOVES   = 200_000
+TICKETS = 100_000
+PAGE    = oc.PAGE_SIZE
+
+STAGES = ['New', 'Initial Contact', 'In Progress', 'Waiting on Customer', 'Solved', 'Cancelled']
+TEAMS  = ['Support - Americas', 'Support - EMEA', 'Support - APAC']
+
+
+def move_row(i):
+    return {'id': i, 'product_id': [1000 + i % 3000, f"[{100000 + i % 3000}] Component {i % 3000}"],
+            'product_qty': float(i % 50 + 1), 'quantity_done': float(i % 7),
+            'picking_id': [50000 + i // 4, f"WH/IN/{50000 + i // 4:05d}"] if i % 9 else False}
+
+
+def ticket_row(i):
+    # The helpdesk report's FIELDS — what all_tickets used to keep for every ticket
+    return {'id': i, 'name': f"Device not powering on after update #{i}",
+            'stage_id': [1 + i % 6, f"{STAGES[i % 6]}"], 'team_id': [1 + i % 3, f"{TEAMS[i % 3]}"],
+            'partner_id': [9000 + i % 4000, f"Clinic {i % 4000}"], 'partner_email': f"contact{i % 4000}@clinic.example",
+            'ticket_type_id': [1 + i % 4, f"Type {i % 4}"], 'x_studio_customer_type': 'Distributor' if i % 5 else 'End user',
+            'tag_ids_char': f"Battery, Firmware {i % 11}", 'product_id': [200 + i % 40, f"[1017{i % 40:02d}] Device {i % 40}"],
+            'lot_id': [70000 + i, f"SN{700000 + i}"] if i % 3 else False, 'x_studio_age_of_device': f"{i % 9} years",
+            'x_studio_other_related_products': [], 'create_date': f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 10:{i % 60:02d}:00",
+            'create_uid': [2 + i % 30, f"User {i % 30}"], 'user_id': [2 + i % 30, f"User {i % 30}"] if i % 4 else False,
+            'division_id': [1 + i % 3, f"Division {i % 3}"], 'priority': str(i % 4), 'x_studio_under_warranty': bool(i % 2),
+            'date_last_stage_update': f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 11:00:00"}
+
+
+def measure(n, make, keep):
+    """Build n rows page by page; `keep(page)` returns what survives the page. Returns (kept, MB, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    t0   = time.perf_counter()
+    kept = []
+    for start in range(0, n, PAGE):
+        kept.extend(keep([make(i) for i in range(start + 1, min(start + PAGE, n) + 1)]))
+    secs = time.perf_counter() - t0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, size / 2**20, secs
+
+
+def report(label, n, variants):
+    print(f"{label} — {n:,} rows")
+    base = variants[0][1]
+    for name, mb, secs in variants:
+        print(f"  {name:<34} {mb:8.1f} MB  {mb * 2**20 / n:7.0f} B/row  {base / mb:5.1f}×   built in {secs:5.2f}s")
+    print()
+
+
+# --- 200k incoming moves (PO plan fields) ---
+moves_d, mb_d, s_d = measure(MOVES, move_row, lambda page: page)
+moves_r, mb_r, s_r = measure(MOVES, move_row, lambda page: oc.records(page, oc.IncomingMove))
+report("stock.move (open incoming)", MOVES, [("dicts (search_read)", mb_d, s_d),
+                                            ("IncomingMove records", mb_r, s_r)])
+
+t0 = time.perf_counter()
+inc_d = defaultdict(float)
+for m in moves_d:
+    ordered = m.get('product_qty') or 0
+    done    = m.get('quantity_done') or 0
+    inc_d[m['product_id'][0]] += ordered - done if m.get('picking_id') else ordered
+t1 = time.perf_counter()
+inc_r = defaultdict(float)
+for m in moves_r:
+    inc_r[m.product_id] += m.product_qty - m.quantity_done if m.picking_id else m.product_qty
+t2 = time.perf_counter()
+assert inc_d == inc_r
+print(f"  incoming-per-component loop       dicts {(t1 - t0) * 1000:6.1f} ms   records {(t2 - t1) * 1000:6.1f} ms\n")
+del moves_d, moves_r
+
+# --- 100k helpdesk tickets kept for the dwell-time sheet ---
+_, mb_full, s_full = measure(TICKETS, ticket_row, lambda page: page)
+slim = oc.TicketState.fields
+_, mb_slim, s_slim = measure(TICKETS, ticket_row, lambda page: [{f: t[f] for f in slim} for t in page])
+_, mb_rec, s_rec   = measure(TICKETS, ticket_row, lambda page: oc.records(page, oc.TicketState))
+report("helpdesk.ticket", TICKETS, [("dicts, report FIELDS", mb_full, s_full),
+                                     ("dicts, only the fields used", mb_slim, s_slim),
+                                     ("TicketState records", mb_rec, s_rec)])
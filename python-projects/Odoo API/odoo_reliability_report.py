@@ -0,0 +1,218 @@
+import openpyxl
+import numpy as np
+import odoo_config as cfg
+import odoo_client as oc
+import odoo_serials
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.chart import ScatterChart, Reference, Series
+from datetime import datetime, timezone
+
+# ================================================================
+# CONFIG
+# ================================================================
+HORIZON_MONTHS = [3, 6, 12, 18, 24, 36]   # survival read-outs
+ENDPOINTS = [
+    ('first_ticket', 'Time to First Ticket'),
+    ('first_repair', 'Time to First Repair'),
+]
+MIN_GROUP_UNITS = 10   # product refs with fewer shipped units are not listed
+DAYS_PER_MONTH  = 30.44
+
+# ================================================================
+# HELPERS
+# ================================================================
+def make_fill(hex):    return PatternFill("solid", fgColor=hex)
+def thin_border():
+    s = Side(style='thin')
+    return Border(left=s, right=s, top=s, bottom=s)
+
+def style_row(ws, row_num, num_cols, fill, left_cols=None):
+    for col in range(1, num_cols + 1):
+        c = ws.cell(row=row_num, column=col)
+        c.fill   = fill
+        c.border = thin_border()
+        c.alignment = Alignment(
+            horizontal="left" if left_cols and col in left_cols else "center",
+            vertical="center"
+        )
+
+def write_section_title(ws, title, color, num_cols):
+    ws.append([title])
+    r = ws.max_row
+    ws.merge_cells(f"A{r}:{get_column_letter(num_cols)}{r}")
+    ws.cell(row=r, column=1).font      = Font(bold=True, size=12, color="FFFFFF")
+    ws.cell(row=r, column=1).fill      = make_fill(color)
+    ws.cell(row=r, column=1).alignment = Alignment(horizontal="left", vertical="center")
+    ws.row_dimensions[r].height = 18
+
+def write_headers(ws, headers, color):
+    ws.append(headers)
+    r = ws.max_row
+    for col, h in enumerate(headers, 1):
+        c = ws.cell(row=r, column=col)
+        c.font      = Font(color="FFFFFF", bold=True, size=10)
+        c.fill      = make_fill(color)
+        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        c.border    = thin_border()
+    ws.row_dimensions[r].height = 30
+
+def kaplan_meier(days, observed):
+    """
+    Vectorized Kaplan-Meier estimator with right-censoring.
+      days     — time on test per unit (event time, or censoring time if no event)
+      observed — True where the event happened, False where the unit is censored
+    Returns (event_times, at_risk, events, survival) at each distinct event time.
+    """
+    order = np.argsort(days, kind='stable')
+    t, e  = days[order], observed[order].astype(np.int64)
+    times, first = np.unique(t, return_index=True)
+    events  = np.add.reduceat(e, first) if len(t) else np.zeros(0, np.int64)
+    at_risk = len(t) - first
+    surv    = np.cumprod(1.0 - events / at_risk)
+    has_ev  = events > 0
+    return times[has_ev], at_risk[has_ev], events[has_ev], surv[has_ev]
+
+def survival_at(times, surv, day):
+    """S(day) from the KM step function (1.0 before the first event)."""
+    i = np.searchsorted(times, day, side='right')
+    return float(surv[i - 1]) if i else 1.0
+
+def median_survival(times, surv):
+    below = np.nonzero(surv <= 0.5)[0]
+    return round(float(times[below[0]]) / DAYS_PER_MONTH, 1) if len(below) else None
+
+MAIN_COLOR    = "2E4057"
+DEVICE_COLORS = {"C2": "4A235A", "C-100": "1A5276"}
+
+try:
+    print("Connecting to Odoo...")
+    models, uid = oc.connect()
+    print("Connected!\n")
+
+    now = datetime.now(timezone.utc)
+    now64 = np.datetime64(now.replace(tzinfo=None), 's')
+
+    serials = odoo_serials.load_installed_base(models, uid)
+    print(f"  → {len(serials)} shipped serials\n")
+
+    # --- Columnar arrays for the whole installed base ---
+    delivered = oc.to_datetime64([s['delivered'] for s in serials])
+    device    = np.array([s['device'] for s in serials])
+    ref       = np.array([s['ref'] for s in serials])
+    censor_d  = (now64 - delivered).astype('timedelta64[s]').astype(np.float64) / 86400.0
+
+    endpoint_data = {}
+    for key, _ in ENDPOINTS:
+        event_at = oc.to_datetime64([s[key] for s in serials])
+        observed = ~np.isnat(event_at)
+        days     = np.where(observed,
+                            (event_at - delivered).astype('timedelta64[s]').astype(np.float64) / 86400.0,
+                            censor_d)
+        endpoint_data[key] = (np.maximum(days, 0.0), observed)
+
+    groups = [(f"{d} (all)", device == d, d) for d in cfg.DEVICE_LINES]
+    for r in sorted(set(ref.tolist())):
+        mask = ref == r
+        if mask.sum() >= MIN_GROUP_UNITS:
+            groups.append((f"{r}", mask, device[mask][0]))
+
+    # ================================================================
+    # BUILD EXCEL
+    # ================================================================
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    # ================================================================
+    # SHEET 1 — SURVIVAL SUMMARY
+    # ================================================================
+    ncols = 6 + len(HORIZON_MONTHS)
+    ws = wb.create_sheet("Survival Summary")
+    ws.column_dimensions["A"].width = 18
+    for i in range(2, ncols + 1):
+        ws.column_dimensions[get_column_letter(i)].width = 12
+
+    ws.append(["Device Reliability — Kaplan-Meier Survival from Delivery"])
+    ws.merge_cells(f"A1:{get_column_letter(ncols)}1")
+    ws["A1"].font      = Font(bold=True, size=16, color="FFFFFF")
+    ws["A1"].fill      = make_fill(MAIN_COLOR)
+    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws.row_dimensions[1].height = 26
+    ws.append([f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   Installed base: {len(serials)} serials   |   "
+               f"% still without the event at each horizon (units without an event are right-censored today)"])
+    ws.merge_cells(f"A2:{get_column_letter(ncols)}2")
+    ws["A2"].font      = Font(italic=True)
+    ws["A2"].alignment = Alignment(horizontal="center")
+    ws.append([])
+
+    curves = {}
+    for key, label in ENDPOINTS:
+        days, observed = endpoint_data[key]
+        write_section_title(ws, f"  ⏱  {label}", MAIN_COLOR, ncols)
+        write_headers(ws, ["Group", "Device", "Units", "Events", "Censored", "Median\n(months)"]
+                          + [f"S({m} mo)" for m in HORIZON_MONTHS], MAIN_COLOR)
+        for name, mask, dev in groups:
+            times, at_risk, events, surv = kaplan_meier(days[mask], observed[mask])
+            if name.endswith("(all)"):
+                curves[(key, dev)] = (times, surv)
+            med   = median_survival(times, surv)
+            s_at  = [round(survival_at(times, surv, m * DAYS_PER_MONTH) * 100, 1) for m in HORIZON_MONTHS]
+            n_ev  = int(observed[mask].sum())
+            ws.append([name, dev, int(mask.sum()), n_ev, int(mask.sum()) - n_ev,
+                       med if med is not None else "> follow-up"] + [f"{v}%" for v in s_at])
+            worst = s_at[HORIZON_MONTHS.index(12)] if 12 in HORIZON_MONTHS else s_at[-1]
+            fill  = "FFB3B3" if worst < 80 else "FFD9B3" if worst < 90 else "E2EFDA"
+            style_row(ws, ws.max_row, ncols, make_fill(fill), left_cols=[1])
+        ws.append([])
+
+    # ================================================================
+    # SHEET 2 — CURVES (step data + chart per endpoint)
+    # ================================================================
+    ws2 = wb.create_sheet("Survival Curves")
+    ws2.append(["Kaplan-Meier Curves by Device Line"])
+    ws2["A1"].font = Font(bold=True, size=14)
+
+    col = 1
+    chart_row = 3
+    chart_col = get_column_letter(2 * len(cfg.DEVICE_LINES) * len(ENDPOINTS) + 2)   # right of the step data
+    for key, label in ENDPOINTS:
+        chart = ScatterChart()
+        chart.title        = label
+        chart.style        = 13
+        chart.x_axis.title = "Months since delivery"
+        chart.y_axis.title = "Survival %"
+        chart.width  = 20
+        chart.height = 11
+        for dev in cfg.DEVICE_LINES:
+            times, surv = curves.get((key, dev), (np.zeros(0), np.zeros(0)))
+            # Step curve starts at 100% on day 0; each event time gets two points (survival
+            # before and after the drop) so the scatter draws steps instead of slopes
+            before = np.concatenate([[1.0], surv])[:-1]
+            xs = [0.0] + np.round(np.repeat(times / DAYS_PER_MONTH, 2), 2).tolist()
+            ys = [100.0] + np.round(np.column_stack([before, surv]).ravel() * 100, 2).tolist()
+            ws2.cell(row=2, column=col,     value=f"{dev} months")
+            ws2.cell(row=2, column=col + 1, value=f"{dev} {label}")
+            for i, (x, y) in enumerate(zip(xs, ys), start=3):
+                ws2.cell(row=i, column=col,     value=x)
+                ws2.cell(row=i, column=col + 1, value=y)
+            xref = Reference(ws2, min_col=col,     min_row=3, max_row=2 + len(xs))
+            yref = Reference(ws2, min_col=col + 1, min_row=2, max_row=2 + len(ys))
+            series = Series(yref, xref, title_from_data=True)
+            series.graphicalProperties.line.solidFill = DEVICE_COLORS.get(dev, MAIN_COLOR)
+            series.marker.symbol = "none"
+            chart.series.append(series)
+            col += 2
+        ws2.add_chart(chart, f"{chart_col}{chart_row}")
+        chart_row += 24
+
+    output_file = f"reliability_report_{now.strftime('%Y%m%d_%H%M')}.xlsx"
+    wb.save(output_file)
+    print(f"\nExcel report saved: {output_file}")
+    print("=== Done ===")
+
+except Exception as e:
+    import traceback
+    print(f"\nERROR: {e}")
+    traceback.print_exc()
+
+input("\nPress Enter to close...")
@@ -1,6 +1,11 @@
 import xmlrpc.client
 import openpyxl
+import numpy as np
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_stage_history as sh
+import odoo_frames as fr
+import odoo_dataset_export as dx
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from openpyxl.chart import PieChart, Reference
@@ -68,19 +73,17 @@ def make_bar(pct, width=20):
     filled = round(pct / 100 * width)
     return "█" * filled + "░" * (width - filled)
 
-def count_tags(repair_list):
-    c = Counter()
-    for r in repair_list:
-        for tid in r.get('_tag_names', []):
-            c[tid] += 1
-    return c
+def count_tags(F, mask=None):
+    codes, counts = fr.m2m_counts(F, 'tags', mask)
+    return Counter(dict(zip(F['cats']['tags'][codes].tolist(), counts.tolist())))
 
-def sl(repairs, division=None, device=None, state=None):
-    r = repairs
-    if division: r = [x for x in r if x['_division'] == division]
-    if device:   r = [x for x in r if x['_device']   == device]
-    if state:    r = [x for x in r if x['_state_label'] == state]
-    return r
+def sl(F, mask=None, division=None, device=None, state=None):
+    """Row mask of the repairs frame — `mask` narrowed by division / device / state."""
+    m = np.ones(F['n'], dtype=bool) if mask is None else mask.copy()
+    if division: m &= F['_division']    == division
+    if device:   m &= F['_device']      == device
+    if state:    m &= F['_state_label'] == state
+    return m
 
 rank_fills = ["FFD700", "C0C0C0", "CD7F32", "DDEBF7", "EBF3FB"]
 
@@ -158,20 +161,20 @@ try:
     d90 = now - timedelta(days=90)
 
     # --- Teams ---
-    all_teams = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'helpdesk.team', 'search_read',
+    all_teams = oc.cached_execute(models, uid, 'helpdesk.team', 'search_read',
         [[]], {'fields': ['id', 'name']}
     )
     team_map = {t['name']: t['id'] for t in all_teams}
 
     # --- C2 product IDs ---
-    c2_products = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.product', 'search_read',
+    c2_products = oc.cached_execute(models, uid, 'product.product', 'search_read',
         [[['default_code', 'in', cfg.C2_PRODUCT_REFS]]],
         {'fields': ['id']}
     )
     c2_product_ids = {p['id'] for p in c2_products}
 
     # --- Repair tags ---
-    repair_tags = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'repair.tags', 'search_read',
+    repair_tags = oc.cached_execute(models, uid, 'repair.tags', 'search_read',
         [[]], {'fields': ['id', 'name']}
     )
     repair_tag_map = {t['id']: t['name'] for t in repair_tags}
@@ -183,17 +186,15 @@ try:
     )
     print(f"Sample action tags field: {[r['x_studio_repair_action_tags'] for r in action_tags[:2]]}")
 
-    # --- Resolve excluded customer ID ---
-    # Search each excluded customer name with ilike for flexible matching
+    # --- Resolve excluded customer IDs (one cached lookup for all names) ---
     excluded_customer_ids = []
-    for cust_name in cfg.REPAIR_EXCLUDED_CUSTOMERS:
-        matches = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'res.partner', 'search_read',
-            [[['name', '=', cust_name]]],
-            {'fields': ['id', 'name']}
-        )
-        for m in matches:
-            print(f"  Excluding customer: {m['name']} (ID: {m['id']})")
-            excluded_customer_ids.append(m['id'])
+    matches = oc.cached_execute(models, uid, 'res.partner', 'search_read',
+        [[['name', 'in', cfg.REPAIR_EXCLUDED_CUSTOMERS]]],
+        {'fields': ['id', 'name']}
+    )
+    for m in matches:
+        print(f"  Excluding customer: {m['name']} (ID: {m['id']})")
+        excluded_customer_ids.append(m['id'])
     excluded_partner_ids = excluded_customer_ids
     print(f"  Total excluded partner IDs: {excluded_partner_ids}")
 
@@ -213,9 +214,10 @@ try:
         ]}
     )
     print(f"  → {len(repairs_raw)} active repairs found\n")
+    dx.export('repairs', repairs_raw)
 
     # --- Resolve excluded tag IDs ---
-    excluded_tags = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'repair.tags', 'search_read',
+    excluded_tags = oc.cached_execute(models, uid, 'repair.tags', 'search_read',
         [[['name', 'ilike', 'Refurbishment']]],
         {'fields': ['id', 'name']}
     )
@@ -227,46 +229,37 @@ try:
                    if not any(tid in excluded_tag_ids for tid in r.get('tag_ids', []))]
     print(f"  → {len(repairs_raw)} repairs after tag exclusion\n")
 
-    # --- Annotate repairs ---
-    for r in repairs_raw:
-        cd = r.get('create_date', '')
-        r['_created']     = datetime.strptime(cd, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc) if cd else None
-        r['_state_label'] = STATE_MAP.get(r['state'], r['state'])
-        r['_division']    = r['division_id'][1] if r.get('division_id') else 'No Division'
-        prod_id           = r['product_id'][0] if r.get('product_id') else None
-        r['_device']      = 'C2' if prod_id in c2_product_ids else 'C-100'
-
-        # Combine both tag fields
-        tag_names = []
-        for tid in r.get('tag_ids', []):
-            name = repair_tag_map.get(tid, f'Tag({tid})')
-            tag_names.append(name)
-        # Also parse action tags char field as fallback
-        action_char = r.get('x_studio_repair_action_tags_char', '') or ''
-        if action_char and not tag_names:
-            tag_names = [t.strip() for t in action_char.split(',') if t.strip()]
-        r['_tag_names'] = tag_names
-
-        # Age bucket
-        if r['_created']:
-            age = (now - r['_created']).days
-            r['_age'] = age
-            if age <= 30:   r['_bucket'] = '0-30 days'
-            elif age <= 60: r['_bucket'] = '31-60 days'
-            elif age <= 90: r['_bucket'] = '61-90 days'
-            else:           r['_bucket'] = '90+ days'
-        else:
-            r['_age']    = 0
-            r['_bucket'] = 'Unknown'
-
-    total_active = len(repairs_raw)
-    repairs_30   = [r for r in repairs_raw if r['_created'] and r['_created'] >= d30]
-    repairs_90   = [r for r in repairs_raw if r['_created'] and r['_created'] >= d90]
-    repairs_p30  = [r for r in repairs_raw if r['_created'] and d60 <= r['_created'] < d30]
+    # --- Columnar view of the active repairs: one array per attribute, parsed once ---
+    F = fr.frame(repairs_raw, {'state': 'cat', 'division_id': 'm2o', 'product_id': 'm2o',
+                               'create_date': 'datetime'})
+    # Tag names: the tags, or the action-tags char field when a repair has none
+    fr.add_lists(F, 'tags', [
+        [repair_tag_map.get(tid, f'Tag({tid})') for tid in r.get('tag_ids', [])]
+        or [t.strip() for t in (r.get('x_studio_repair_action_tags_char') or '').split(',') if t.strip()]
+        for r in repairs_raw
+    ])
+    codes, cats      = fr.recode(F['state'], F['cats']['state'], STATE_MAP)
+    F['_state_label'] = cats[codes]
+    codes, cats      = fr.recode(F['division_id'], F['cats']['division_id'], {fr.EMPTY: 'No Division'})
+    F['_division']   = cats[codes]
+    F['_device']     = np.where(np.isin(F['product_id_id'], list(c2_product_ids)), 'C2', 'C-100')
+    created          = F['create_date']
+    F['_age']        = fr.age_days(created, now)
+    F['_bucket']     = np.where(np.isnat(created), 'Unknown',
+                                np.array(bucket_order)[np.minimum(fr.bucket(F['_age'], [30, 60, 90]), 3)])
+    F['_created']    = fr.day_strings(created)
+
+    def since(d):
+        return np.datetime64(d.replace(tzinfo=None), 's')
+    has_date   = ~np.isnat(created)
+    total_active = F['n']
+    repairs_30   = has_date & (created >= since(d30))
+    repairs_90   = has_date & (created >= since(d90))
+    repairs_p30  = has_date & (created >= since(d60)) & (created < since(d30))
 
     # --- Trending ---
-    tags_30d    = count_tags(repairs_30)
-    tags_prev30 = count_tags(repairs_p30)
+    tags_30d    = count_tags(F, repairs_30)
+    tags_prev30 = count_tags(F, repairs_p30)
     trending = {}
     for tag, cnt_now in tags_30d.items():
         if cnt_now < MIN_TREND: continue
@@ -277,6 +270,27 @@ try:
             trending[tag] = {'now': cnt_now, 'prev': cnt_prev, 'change': cnt_now - cnt_prev, 'pct_change': pct}
     top_trending = sorted(trending.items(), key=lambda x: x[1]['pct_change'], reverse=True)[:TOP_N]
 
+    # --- State history (all repairs, any state) for dwell times ---
+    print("Fetching repair state history...")
+    all_repairs = oc.search_read_all(models, uid, 'repair.order',
+        [['partner_id', 'not in', excluded_partner_ids]],
+        ['create_date', 'state', 'division_id']
+    )
+    state_hist = sh.fetch_tracking(models, uid, 'repair.order', 'state', selection=True)
+    code_by_key = {key: code for code, key in state_hist['names'].items()}
+    print(f"  → {len(state_hist['res_id'])} state changes across {len(all_repairs)} repairs\n")
+
+    state_seg = sh.dwell_segments(
+        state_hist,
+        [r['id'] for r in all_repairs],
+        oc.to_datetime64([r.get('create_date') for r in all_repairs]),
+        [code_by_key.get(r['state'], -1) for r in all_repairs],
+        now,
+    )
+    div_by_repair = {r['id']: r['division_id'][1] if r.get('division_id') else 'No Division'
+                     for r in all_repairs}
+    seg_div = np.array([div_by_repair.get(int(rid), '') for rid in state_seg['res_id']])
+
     # ================================================================
     # BUILD EXCEL
     # ================================================================
@@ -301,7 +315,7 @@ try:
     ws.merge_cells("A2:H2")
     ws["A2"] = (f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
                 f"Active RMAs: {total_active}   |   "
-                f"Last 90d: {len(repairs_90)}   |   Last 30d: {len(repairs_30)}")
+                f"Last 90d: {int(repairs_90.sum())}   |   Last 30d: {int(repairs_30.sum())}")
     ws["A2"].font      = Font(italic=True)
     ws["A2"].alignment = Alignment(horizontal="center")
     ws.append([])
@@ -310,11 +324,11 @@ try:
     write_section_title(ws, "  📊  Active RMAs by State", MAIN_COLOR, 5)
     write_headers(ws, ["State", "Count", "% of Active", "C2", "C-100"], MAIN_COLOR)
     for state in STATE_ORDER:
-        st = sl(repairs_raw, state=state)
-        cnt = len(st)
+        st = sl(F, state=state)
+        cnt = int(st.sum())
         pct = round(cnt / total_active * 100, 1) if total_active else 0
-        c2_cnt  = len(sl(st, device='C2'))
-        c100_cnt = len(sl(st, device='C-100'))
+        c2_cnt   = int(sl(F, st, device='C2').sum())
+        c100_cnt = int(sl(F, st, device='C-100').sum())
         ws.append([state, cnt, f"{pct}%", c2_cnt, c100_cnt])
         style_row(ws, ws.max_row, 5, make_fill(STATE_COLORS[state]), left_cols=[1])
     ws.append([])
@@ -325,16 +339,14 @@ try:
     for div in cfg.REPAIR_DIVISIONS:
         short = cfg.REPAIR_DIVISION_LABELS.get(div, div)
         for device in cfg.DEVICE_LINES:
-            d_active = sl(repairs_raw, division=div, device=device)
-            d_90     = sl(repairs_90,  division=div, device=device)
-            d_30     = sl(repairs_30,  division=div, device=device)
+            d_active = sl(F, division=div, device=device)
             row_fill = make_fill("EBF3FB") if device == "C2" else make_fill("FFF9E6")
             ws.append([
                 short, device,
-                len(d_active), len(d_90), len(d_30),
-                len(sl(d_active, state='RMA Created')),
-                len(sl(d_active, state='Device Received')),
-                len(sl(d_active, state='Under Repair')),
+                int(d_active.sum()), int((d_active & repairs_90).sum()), int((d_active & repairs_30).sum()),
+                int(sl(F, d_active, state='RMA Created').sum()),
+                int(sl(F, d_active, state='Device Received').sum()),
+                int(sl(F, d_active, state='Under Repair').sum()),
             ])
             style_row(ws, ws.max_row, 8, row_fill, left_cols=[1, 2])
     ws.append([])
@@ -343,17 +355,17 @@ try:
     write_section_title(ws, "  ⏱  Age Distribution — Active RMAs", "4A4A4A", 8)
     write_headers(ws, ["Age Bracket", "Total", "% of Active", "Americas", "EMEA", "APAC", "C2", "C-100"], "4A4A4A")
     for bucket in bucket_order:
-        bt   = [r for r in repairs_raw if r['_bucket'] == bucket]
-        cnt  = len(bt)
+        bt   = F['_bucket'] == bucket
+        cnt  = int(bt.sum())
         pct  = round(cnt / total_active * 100, 1) if total_active else 0
-        divs = [len(sl(bt, division=d)) for d in cfg.REPAIR_DIVISIONS]
-        devs = [len(sl(bt, device=dv)) for dv in cfg.DEVICE_LINES]
+        divs = [int(sl(F, bt, division=d).sum()) for d in cfg.REPAIR_DIVISIONS]
+        devs = [int(sl(F, bt, device=dv).sum()) for dv in cfg.DEVICE_LINES]
         ws.append([bucket, cnt, f"{pct}%"] + divs + devs)
         style_row(ws, ws.max_row, 8, make_fill(bucket_colors[bucket]), left_cols=[1])
     ws.append([])
 
     # --- TABLE 4: Top 5 Tags All Time ---
-    tags_all = count_tags(repairs_raw)
+    tags_all = count_tags(F)
     write_section_title(ws, "  🏷  Top 5 Repair Tags — Active RMAs", MAIN_COLOR, 5)
     write_headers(ws, ["Rank", "Tag", "# Repairs", "% of Active", "Visual Bar"], MAIN_COLOR)
     if tags_all:
@@ -368,7 +380,7 @@ try:
     # --- TABLE 5: Top 5 Tags Last 30d ---
     write_section_title(ws, "  🏷  Top 5 Repair Tags — Last 30 Days", "7B2C2C", 5)
     write_headers(ws, ["Rank", "Tag", "# Repairs (30d)", "% of 30d", "Visual Bar"], "7B2C2C")
-    total_30 = len(repairs_30)
+    total_30 = int(repairs_30.sum())
     if tags_30d:
         for rank, (tag, cnt) in enumerate(tags_30d.most_common(TOP_N), 1):
             pct = round(cnt / total_30 * 100, 1) if total_30 else 0
@@ -415,19 +427,17 @@ try:
         div_color = division_colors.get(div, MAIN_COLOR)
         for device in cfg.DEVICE_LINES:
             dev_color = device_colors.get(device, MAIN_COLOR)
-            seg       = sl(repairs_raw, division=div, device=device)
-            seg_30    = sl(repairs_30,  division=div, device=device)
-            seg_90    = sl(repairs_90,  division=div, device=device)
+            seg       = sl(F, division=div, device=device)
+            n_seg     = int(seg.sum())
 
-            write_section_title(ws2, f"  {short}  ▸  {device}  ({len(seg)} active RMAs)", dev_color, 6)
+            write_section_title(ws2, f"  {short}  ▸  {device}  ({n_seg} active RMAs)", dev_color, 6)
 
             # State breakdown
             write_section_title(ws2, "    By State", div_color, 4)
             write_headers(ws2, ["State", "Count", "% of Segment", "Visual Bar"], div_color)
             for state in STATE_ORDER:
-                st_seg = sl(seg, state=state)
-                cnt    = len(st_seg)
-                pct    = round(cnt / len(seg) * 100, 1) if seg else 0
+                cnt    = int(sl(F, seg, state=state).sum())
+                pct    = round(cnt / n_seg * 100, 1) if n_seg else 0
                 ws2.append([state, cnt, f"{pct}%", make_bar(pct)])
                 style_row(ws2, ws2.max_row, 4, make_fill(STATE_COLORS[state]), left_cols=[1])
             ws2.append([])
@@ -436,20 +446,19 @@ try:
             write_section_title(ws2, "    Age Distribution", div_color, 4)
             write_headers(ws2, ["Age Bracket", "Count", "% of Segment", "Visual Bar"], div_color)
             for bucket in bucket_order:
-                bt  = [r for r in seg if r['_bucket'] == bucket]
-                cnt = len(bt)
-                pct = round(cnt / len(seg) * 100, 1) if seg else 0
+                cnt = int((seg & (F['_bucket'] == bucket)).sum())
+                pct = round(cnt / n_seg * 100, 1) if n_seg else 0
                 ws2.append([bucket, cnt, f"{pct}%", make_bar(pct)])
                 style_row(ws2, ws2.max_row, 4, make_fill(bucket_colors[bucket]), left_cols=[1])
             ws2.append([])
 
             # Top tags
-            seg_tags = count_tags(seg)
+            seg_tags = count_tags(F, seg)
             write_section_title(ws2, f"    Top {TOP_N} Tags", div_color, 5)
             write_headers(ws2, ["Rank", "Tag", "# Repairs", "% of Segment", "Visual Bar"], div_color)
             if seg_tags:
                 for rank, (tag, cnt) in enumerate(seg_tags.most_common(TOP_N), 1):
-                    pct = round(cnt / len(seg) * 100, 1) if seg else 0
+                    pct = round(cnt / n_seg * 100, 1) if n_seg else 0
                     ws2.append([rank, tag, cnt, f"{pct}%", make_bar(pct)])
                     style_row(ws2, ws2.max_row, 5, make_fill(rank_fills[rank-1]), left_cols=[2])
             else:
@@ -494,13 +503,13 @@ try:
     for div in cfg.REPAIR_DIVISIONS:
         short     = cfg.REPAIR_DIVISION_LABELS.get(div, div)
         div_color = division_colors.get(div, MAIN_COLOR)
-        div_reps  = sl(repairs_raw, division=div)
-        if not div_reps:
+        div_reps  = sl(F, division=div)
+        if not div_reps.any():
             continue
 
         # Division header
         ws3.merge_cells(f"A{row_num}:P{row_num}")
-        ws3.cell(row=row_num, column=1).value     = f"  ▶  {short}  ({len(div_reps)} active RMAs)"
+        ws3.cell(row=row_num, column=1).value     = f"  ▶  {short}  ({int(div_reps.sum())} active RMAs)"
         ws3.cell(row=row_num, column=1).font      = Font(bold=True, size=12, color="FFFFFF")
         ws3.cell(row=row_num, column=1).fill      = make_fill(div_color)
         ws3.cell(row=row_num, column=1).alignment = Alignment(horizontal="left", vertical="center")
@@ -508,8 +517,8 @@ try:
         row_num += 1
 
         for state in STATE_ORDER:
-            state_reps = sl(div_reps, state=state)
-            if not state_reps:
+            state_reps = np.flatnonzero(sl(F, div_reps, state=state))
+            if not len(state_reps):
                 continue
 
             # State sub-header
@@ -520,31 +529,33 @@ try:
             ws3.cell(row=row_num, column=1).alignment = Alignment(horizontal="left", vertical="center")
             row_num += 1
 
-            for idx, r in enumerate(sorted(state_reps, key=lambda x: x.get('_age', 0), reverse=True)):
+            for idx, i in enumerate(state_reps[np.argsort(-F['_age'][state_reps], kind='stable')]):
+                r   = repairs_raw[i]
+                age = int(F['_age'][i])
                 row_fill = make_fill("EBF3FB") if idx % 2 == 0 else make_fill("FFFFFF")
 
                 # Flag old open repairs
-                if r['_age'] > 60:   row_fill = make_fill("FFB3B3")
-                elif r['_age'] > 30: row_fill = make_fill("FFD9B3")
+                if age > 60:   row_fill = make_fill("FFB3B3")
+                elif age > 30: row_fill = make_fill("FFD9B3")
 
                 ticket_name = r['ticket_id'][1] if r.get('ticket_id') else '—'
                 row_data = [
                     r.get('name', ''),
                     r['product_id'][1] if r.get('product_id') else '',
-                    r['_device'],
+                    str(F['_device'][i]),
                     r['lot_id'][1]     if r.get('lot_id')     else '',
-                    r['_state_label'],
+                    str(F['_state_label'][i]),
                     r['partner_id'][1] if r.get('partner_id') else '',
                     r['division_id'][1] if r.get('division_id') else '',
                     r['user_id'][1]    if r.get('user_id')    else 'Unassigned',
-                    r['_age'],
+                    age,
                     'Yes' if r.get('x_studio_under_warranty_ts_case') else 'No',
                     r.get('x_studio_issue_reproduced', '') or '',
                     r.get('x_studio_reason_for_return', '') or '',
                     ticket_name,
                     r.get('x_studio_incoming_tracking_', '') or '',
                     r.get('x_studio_outgoing_tracking', '') or '',
-                    r['_created'].strftime('%Y-%m-%d') if r['_created'] else '',
+                    str(F['_created'][i]),
                 ]
                 ws3.append(row_data)
                 for col in range(1, len(col_headers) + 1):
@@ -559,7 +570,46 @@ try:
         row_num += 1
 
     # ================================================================
-    # SHEET 4 — PIE CHARTS
+    # SHEET 4 — STATE DWELL TIMES
+    # ================================================================
+    ws_dw = wb.create_sheet("State Dwell Times")
+    ws_dw.column_dimensions["A"].width = 24
+    for i in range(2, 9):
+        ws_dw.column_dimensions[get_column_letter(i)].width = 15
+
+    ws_dw.append(["Repair / RMA — Time Spent per State (days)"])
+    ws_dw.merge_cells("A1:H1")
+    ws_dw["A1"].font      = Font(bold=True, size=16, color="FFFFFF")
+    ws_dw["A1"].fill      = make_fill(MAIN_COLOR)
+    ws_dw["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws_dw.row_dimensions[1].height = 26
+    ws_dw.append([f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
+                  f"All repairs (any state) from state change history   |   "
+                  f"Completed = repair has left the state"])
+    ws_dw.merge_cells("A2:H2")
+    ws_dw["A2"].font      = Font(italic=True)
+    ws_dw["A2"].alignment = Alignment(horizontal="center")
+    ws_dw.append([])
+
+    key_rank = {k: i for i, k in enumerate(STATE_MAP)}
+    for div in [None] + cfg.REPAIR_DIVISIONS:
+        short     = cfg.REPAIR_DIVISION_LABELS.get(div, div) if div else "All Divisions"
+        div_color = division_colors.get(div, MAIN_COLOR)
+        stats     = sh.dwell_stats(state_seg, None if div is None else seg_div == div)
+        write_section_title(ws_dw, f"  ⏱  {short}", div_color, 8)
+        write_headers(ws_dw, ["State", "# Completed", "Median Days", "P75 Days", "P90 Days",
+                              "Avg Days", "# In State Now", "Median Days So Far"], div_color)
+        for code in sorted(stats, key=lambda c: (key_rank.get(state_hist['names'].get(c), 99), c)):
+            st    = stats[code]
+            key   = state_hist['names'].get(code, '')
+            label = STATE_MAP.get(key, key or 'Unknown')
+            ws_dw.append([label, st['done'], st['p50'], st['p75'], st['p90'],
+                          st['mean'], st['open'], st['open_p50']])
+            style_row(ws_dw, ws_dw.max_row, 8, make_fill(STATE_COLORS.get(label, "F2F2F2")), left_cols=[1])
+        ws_dw.append([])
+
+    # ================================================================
+    # SHEET 5 — PIE CHARTS
     # ================================================================
     ws_charts = wb.create_sheet("Charts")
     ws_charts.column_dimensions["A"].width = 3
@@ -581,13 +631,13 @@ try:
 
     # --- Chart 1: Repairs by Division ---
     print("\n=== Chart division debug ===")
-    print(f"Total repairs_raw at chart time: {len(repairs_raw)}")
-    div_sample = set(r['_division'] for r in repairs_raw)
+    print(f"Total repairs_raw at chart time: {total_active}")
+    div_sample = set(F['_division'].tolist())
     print(f"Distinct _division values: {div_sample}")
     div_rows = []
     for div in cfg.REPAIR_DIVISIONS:
         short = cfg.REPAIR_DIVISION_LABELS.get(div, div)
-        cnt   = len(sl(repairs_raw, division=div))
+        cnt   = int(sl(F, division=div).sum())
         print(f"  {div} -> {cnt} repairs")
         if cnt > 0:
             div_rows.append((short, cnt))
@@ -600,7 +650,7 @@ try:
         ws_charts.add_chart(chart1, "B4")
 
     # --- Chart 2: Repairs by Device (C2 vs C-100) ---
-    dev_rows = [(dv, len(sl(repairs_raw, device=dv))) for dv in cfg.DEVICE_LINES if len(sl(repairs_raw, device=dv)) > 0]
+    dev_rows = [(dv, int(sl(F, device=dv).sum())) for dv in cfg.DEVICE_LINES if sl(F, device=dv).any()]
     if dev_rows:
         chart2, _ = add_pie_chart(ws_data, wb,
             f"Active RMAs by Device Line",
@@ -610,7 +660,7 @@ try:
         ws_charts.add_chart(chart2, "K4")
 
     # --- Chart 3: Repairs by State ---
-    state_rows = [(s, len(sl(repairs_raw, state=s))) for s in STATE_ORDER if len(sl(repairs_raw, state=s)) > 0]
+    state_rows = [(s, int(sl(F, state=s).sum())) for s in STATE_ORDER if sl(F, state=s).any()]
     if state_rows:
         chart3, _ = add_pie_chart(ws_data, wb,
             f"Active RMAs by State",
@@ -623,7 +673,7 @@ try:
     c2_div_rows = []
     for div in cfg.REPAIR_DIVISIONS:
         short = cfg.REPAIR_DIVISION_LABELS.get(div, div)
-        cnt   = len(sl(repairs_raw, division=div, device='C2'))
+        cnt   = int(sl(F, division=div, device='C2').sum())
         if cnt > 0:
             c2_div_rows.append((short, cnt))
     if c2_div_rows:
@@ -638,7 +688,7 @@ try:
     c100_div_rows = []
     for div in cfg.REPAIR_DIVISIONS:
         short = cfg.REPAIR_DIVISION_LABELS.get(div, div)
-        cnt   = len(sl(repairs_raw, division=div, device='C-100'))
+        cnt   = int(sl(F, division=div, device='C-100').sum())
         if cnt > 0:
             c100_div_rows.append((short, cnt))
     if c100_div_rows:
@@ -656,6 +706,7 @@ try:
     output_file = f"repair_report_{now.strftime('%Y%m%d_%H%M')}.xlsx"
     wb.save(output_file)
     print(f"\nExcel report saved: {output_file}")
+    print(oc.cache_summary())
     print("=== Done ===")
 
 except Exception as e:
@@ -0,0 +1,115 @@
+import odoo_fetch_planner as fp
+from odoo_fetch_planner import dataset
+
+# ================================================================
+# REPORT DATASETS — what each report reads, for the shared fetch planner
+# ================================================================
+# Broad versions of the queries each script issues: the script's own,
+# narrower calls (product_id in [...], bom_id = ..., team_id = ...) are then
+# answered by filtering these in memory. Field lists are the script's own.
+OPEN_IN    = [['state', 'in', ['waiting', 'confirmed', 'assigned', 'partially_available']],
+              ['picking_type_id.code', '=', 'incoming']]
+DONE_IN    = [['picking_type_id.code', '=', 'incoming'], ['state', '=', 'done']]
+INTERNAL   = [['location_id.usage', '=', 'internal']]
+PROD_FLDS  = ['id', 'name', 'default_code', 'product_tmpl_id']
+LINE_FLDS  = ['bom_id', 'product_id', 'product_qty', 'product_uom_id', 'child_bom_id']
+QUANT_FLDS = ['product_id', 'quantity', 'reserved_quantity']
+
+OPEN_PICKINGS = dataset('stock.picking',
+                        lambda d: [['id', 'in', fp.m2o_ids(d['open_incoming'], 'picking_id')]],
+                        ['id', 'state'], needs=['open_incoming'])
+
+PO_PLAN = [
+    dataset('product.product', [], PROD_FLDS),
+    dataset('mrp.bom', [], ['product_qty']),
+    dataset('mrp.bom.line', [], LINE_FLDS),
+    dataset('product.supplierinfo', [], ['product_tmpl_id', 'product_id', 'name', 'delay', 'min_qty', 'price',
+                                         'product_code', 'sequence', 'currency_id', 'date_start', 'date_end']),
+    dataset('stock.quant', INTERNAL, QUANT_FLDS, name='quants'),
+    dataset('stock.move', OPEN_IN, ['product_id', 'product_qty', 'quantity_done', 'picking_id'],
+            name='open_incoming'),
+    OPEN_PICKINGS,
+]
+
+BLANKET = [
+    dataset('product.product', [], PROD_FLDS),
+    dataset('mrp.bom', [], ['product_qty']),
+    dataset('mrp.bom.line', [], LINE_FLDS),
+    dataset('product.supplierinfo', [], ['product_tmpl_id', 'name', 'delay', 'min_qty', 'price',
+                                         'product_code', 'sequence', 'currency_id']),
+    dataset('stock.quant', INTERNAL, QUANT_FLDS, name='quants'),
+    dataset('stock.move', OPEN_IN, ['product_id', 'product_qty', 'quantity_done', 'date', 'picking_id'],
+            name='open_incoming'),
+    OPEN_PICKINGS,
+]
+
+PROCUREMENT = [
+    dataset('product.product', [], PROD_FLDS),
+    dataset('mrp.bom', [], ['product_qty', 'product_tmpl_id']),
+    dataset('mrp.bom.line', [], LINE_FLDS),
+    dataset('product.supplierinfo', [], ['product_tmpl_id', 'product_id', 'name', 'delay', 'min_qty',
+                                         'price', 'product_code']),
+    dataset('stock.quant', INTERNAL, QUANT_FLDS, name='quants'),
+    dataset('purchase.order.line', [['order_id.state', 'in', ['purchase', 'draft', 'done']]],
+            ['product_id', 'product_qty', 'qty_received', 'qty_invoiced', 'date_planned', 'order_id']),
+]
+
+LEAD_TIME_CHECK = [
+    dataset('product.product', [], PROD_FLDS),
+    dataset('mrp.bom.line', [], ['bom_id', 'product_id', 'child_bom_id']),
+    dataset('product.supplierinfo', [], ['product_tmpl_id', 'product_id', 'name', 'delay', 'min_qty',
+                                         'price', 'product_code']),
+    dataset('stock.picking', DONE_IN, ['id', 'name', 'date_done', 'origin', 'purchase_id']),
+    dataset('stock.move', DONE_IN + [['purchase_line_id', '!=', False]],
+            ['product_id', 'product_qty', 'quantity_done', 'picking_id', 'purchase_line_id', 'date'],
+            name='receipt_moves'),
+    dataset('purchase.order.line', lambda d: [['id', 'in', fp.m2o_ids(d['receipt_moves'], 'purchase_line_id')]],
+            ['id', 'order_id', 'product_id', 'product_qty'], name='receipt_po_lines', needs=['receipt_moves']),
+    dataset('purchase.order', lambda d: [['id', 'in', fp.m2o_ids(d['receipt_po_lines'], 'order_id')]],
+            ['id', 'name', 'date_approve', 'partner_id'], needs=['receipt_po_lines']),
+]
+
+ZERO_STOCK = [
+    dataset('product.product', [], PROD_FLDS),
+    dataset('mrp.bom.line', [], ['bom_id', 'product_id', 'child_bom_id']),
+    dataset('stock.quant', INTERNAL, QUANT_FLDS, name='quants'),
+    dataset('stock.move', OPEN_IN, ['product_id', 'product_qty', 'quantity_done', 'picking_id'],
+            name='open_incoming'),
+    OPEN_PICKINGS,
+    dataset('product.supplierinfo', [], ['product_tmpl_id', 'name', 'delay', 'sequence']),
+]
+
+HELPDESK = [
+    dataset('helpdesk.team', [], ['id', 'name']),
+    dataset('helpdesk.stage', [], ['id', 'name', 'sequence']),
+    dataset('helpdesk.ticket', [], ['id', 'name', 'stage_id', 'team_id', 'partner_id', 'partner_email',
+                                    'ticket_type_id', 'x_studio_customer_type', 'tag_ids_char',
+                                    'product_id', 'lot_id', 'x_studio_age_of_device',
+                                    'x_studio_other_related_products', 'create_date', 'create_uid',
+                                    'user_id', 'division_id', 'priority', 'x_studio_under_warranty',
+                                    'date_last_stage_update'], name='tickets'),
+]
+
+REPAIR = [
+    dataset('helpdesk.team', [], ['id', 'name']),
+    dataset('repair.tags', [], ['id', 'name']),
+    dataset('repair.order', [], ['id', 'name', 'state', 'product_id', 'lot_id', 'partner_id',
+                                 'create_date', 'user_id', 'division_id', 'ticket_id',
+                                 'tag_ids', 'x_studio_repair_action_tags', 'x_studio_repair_action_tags_char',
+                                 'x_studio_repair_tags_char', 'x_studio_reason_for_return',
+                                 'x_studio_issue_reproduced', 'x_studio_under_warranty_ts_case',
+                                 'guarantee_limit', 'x_studio_incoming_tracking_',
+                                 'x_studio_outgoing_tracking', 'location_id'], name='repairs'),
+]
+
+# name → (script, datasets)
+REPORTS = {
+    'po_plan':         ('odoo_po_plan.py',            PO_PLAN),
+    'blanket':         ('odoo_blanket_po_plan.py',    BLANKET),
+    'procurement':     ('odoo_procurement_plan.py',   PROCUREMENT),
+    'lead_time_check': ('odoo_lead_time_check.py',    LEAD_TIME_CHECK),
+    'zero_stock':      ('odoo_analyze_zero_stock.py', ZERO_STOCK),
+    'helpdesk':        ('odoo_helpdesk_report.py',    HELPDESK),
+    'repair':          ('odoo_repair_report.py',      REPAIR),
+}
+BATCH = ['po_plan', 'blanket', 'procurement', 'lead_time_check', 'zero_stock']
@@ -0,0 +1,149 @@
+import os
+import zlib
+import numpy as np
+
+# ================================================================
+# RUN DELTA — what changed since the previous run of a report
+# ================================================================
+# Each run saves a snapshot of its result rows in DELTA_DIR as
+# <report>_<UTC timestamp>.npz: the row ids (sorted), the tracked columns,
+# a 64-bit hash of the tracked columns per row and display-only columns.
+# The next run loads only the newest earlier snapshot and joins on id with one
+# searchsorted; matched rows whose hash is equal are unchanged and are never
+# compared column by column. The cost depends on the size of the two runs,
+# not on how many runs are kept on disk.
+# A report calls compare() while building its output and save() only once the
+# output is written, so a run that fails half way never becomes the baseline.
+DELTA_DIR = 'run_snapshots'
+KEEP_RUNS = 90           # snapshots kept per report, oldest pruned
+SAVE      = True         # False = compare against the saved runs but keep none (odoo_batch.py --no-snapshot)
+RUNNER    = ''           # set → snapshots kept apart as <report>.<RUNNER> (the planning service's refreshes)
+
+_U64 = np.uint64
+
+
+def _mix(x):
+    """splitmix64 finalizer — spreads every input bit over the whole word."""
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> _U64(27))) * _U64(0x94D049BB133111EB)
+        return x ^ (x >> _U64(31))
+
+
+def _column_hash(a):
+    """uint64 per value, stable across runs (text hashed by content, once per distinct value)."""
+    a = np.asarray(a)
+    if a.dtype.kind in 'USO':
+        u, inv = np.unique(a.astype(str), return_inverse=True)
+        h = np.array([zlib.crc32(s.encode('utf-8')) for s in u.tolist()], dtype=_U64)
+        return h[inv.ravel()] if len(u) else np.zeros(0, dtype=_U64)
+    if a.dtype.kind == 'f':
+        a = np.where(np.isnan(a), 0.0, a).astype(np.float64) + 0.0   # -0.0 → 0.0
+        return a.view(_U64)
+    return a.astype(np.int64).view(_U64)
+
+
+def row_hash(columns):
+    """One 64-bit hash per row over the given parallel columns."""
+    n = len(columns[0]) if columns else 0
+    h = np.full(n, 0x9E3779B97F4A7C15, dtype=_U64)
+    for col in columns:
+        h = _mix(h ^ _mix(_column_hash(col)))
+    return h
+
+
+def snapshot(ids, tracked, info=None):
+    """
+    ids — one id per result row; tracked — {column: values} compared between runs;
+    info — {column: values} kept for display only (names, status text, ...).
+    Returns the snapshot: every column sorted by id, plus '_hash' and '_tracked'.
+    """
+    ids   = np.asarray(ids, dtype=np.int64)
+    order = np.argsort(ids, kind='stable')
+    snap  = {'id': ids[order]}
+    for k, v in {**(info or {}), **tracked}.items():
+        snap[k] = np.asarray(v)[order] if len(ids) else np.asarray(v)
+    snap['_hash']    = row_hash([snap[k] for k in tracked])
+    snap['_tracked'] = np.array(list(tracked), dtype=str)
+    return snap
+
+
+def _key(report):
+    return f"{report}.{RUNNER}" if RUNNER else report
+
+
+def _runs(report, root):
+    prefix = report + '_'
+    if not os.path.isdir(root):
+        return []
+    return sorted(f[len(prefix):-4] for f in os.listdir(root) if f.startswith(prefix) and f.endswith('.npz'))
+
+
+def previous(report, before=None, root=DELTA_DIR):
+    """
+    Newest snapshot of `report` taken before `before` (a datetime, default: any), or None.
+    The snapshot's 'run' entry is its timestamp as 'YYYY-MM-DD HH:MM'.
+    """
+    report = _key(report)
+    stamps = _runs(report, root)
+    if before is not None:
+        stamps = stamps[:np.searchsorted(stamps, before.strftime('%Y%m%dT%H%M%SZ'))]
+    if not stamps:
+        return None
+    with np.load(os.path.join(root, f"{report}_{stamps[-1]}.npz")) as f:
+        snap = {k: f[k] for k in f.files}
+    s = stamps[-1]
+    snap['run'] = f"{s[:4]}-{s[4:6]}-{s[6:8]} {s[9:11]}:{s[11:13]}"
+    return snap
+
+
+def save(report, snap, now, root=DELTA_DIR):
+    """Write the snapshot for the run at `now` and prune to the newest KEEP_RUNS (no-op unless SAVE)."""
+    if not SAVE:
+        return None
+    report = _key(report)
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{report}_{now.strftime('%Y%m%dT%H%M%SZ')}.npz")
+    np.savez_compressed(path, **{k: v for k, v in snap.items() if k != 'run'})
+    for stamp in _runs(report, root)[:-KEEP_RUNS]:
+        os.remove(os.path.join(root, f"{report}_{stamp}.npz"))
+    return path
+
+
+def diff(prev, cur):
+    """
+    Hash join of two snapshots on id. Returns
+      'new'           cur rows whose id is not in prev
+      'gone'          prev rows whose id is not in cur
+      'cur', 'prev'   matched rows whose tracked columns differ (parallel index arrays)
+      'same'          number of matched rows with nothing changed
+    """
+    pid, cid = prev['id'], cur['id']
+    if not len(pid):
+        return {'new': np.arange(len(cid)), 'gone': np.zeros(0, dtype=np.int64),
+                'cur': np.zeros(0, dtype=np.int64), 'prev': np.zeros(0, dtype=np.int64), 'same': 0}
+    pos  = np.minimum(np.searchsorted(pid, cid), len(pid) - 1)
+    hit  = pid[pos] == cid
+    c_m  = np.flatnonzero(hit)
+    p_m  = pos[hit]
+    seen = np.zeros(len(pid), dtype=bool)
+    seen[p_m] = True
+    chg  = prev['_hash'][p_m] != cur['_hash'][c_m]
+    if not np.array_equal(prev['_tracked'], cur['_tracked']):
+        chg[:] = True
+    return {'new': np.flatnonzero(~hit), 'gone': np.flatnonzero(~seen),
+            'cur': c_m[chg], 'prev': p_m[chg], 'same': int((~chg).sum())}
+
+
+def changed(d, prev, cur, column):
+    """Mask over the changed pairs of diff() where `column` differs."""
+    return prev[column][d['prev']] != cur[column][d['cur']]
+
+
+def compare(report, snap, now, root=DELTA_DIR):
+    """
+    Diff this run's snapshot against the previous run — save() it once the report is written.
+    Returns (previous snapshot, diff), or (None, None) on the first run.
+    """
+    prev = previous(report, now, root)
+    return (prev, diff(prev, snap)) if prev is not None else (None, None)
@@ -0,0 +1,213 @@
+import time
+import openpyxl
+import numpy as np
+import odoo_config as cfg
+import odoo_client as oc
+import odoo_bom_index as bix
+import odoo_demand as dm
+import odoo_forecast as fc
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from datetime import datetime, timezone
+
+# ================================================================
+# CONFIG
+# ================================================================
+HISTORY_MONTHS = 36    # complete months of sales history fitted
+MONTHLY_PLAN   = cfg.MONTHLY_PRODUCTION_PLAN
+GAP_PCT        = 25    # plan more than this % above / below the forecast is flagged
+
+# ================================================================
+# HELPERS
+# ================================================================
+def make_fill(hex):    return PatternFill("solid", fgColor=hex)
+def thin_border():
+    s = Side(style='thin')
+    return Border(left=s, right=s, top=s, bottom=s)
+
+def style_row(ws, row_num, num_cols, fill, left_cols=None):
+    for col in range(1, num_cols + 1):
+        c = ws.cell(row=row_num, column=col)
+        c.fill   = fill
+        c.border = thin_border()
+        c.alignment = Alignment(
+            horizontal="left" if left_cols and col in left_cols else "center",
+            vertical="center"
+        )
+
+def write_section_title(ws, title, color, num_cols):
+    ws.append([title])
+    r = ws.max_row
+    ws.merge_cells(f"A{r}:{get_column_letter(num_cols)}{r}")
+    ws.cell(row=r, column=1).font      = Font(bold=True, size=12, color="FFFFFF")
+    ws.cell(row=r, column=1).fill      = make_fill(color)
+    ws.cell(row=r, column=1).alignment = Alignment(horizontal="left", vertical="center")
+    ws.row_dimensions[r].height = 18
+
+def write_headers(ws, headers, color):
+    ws.append(headers)
+    r = ws.max_row
+    for col, h in enumerate(headers, 1):
+        c = ws.cell(row=r, column=col)
+        c.font      = Font(color="FFFFFF", bold=True, size=10)
+        c.fill      = make_fill(color)
+        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        c.border    = thin_border()
+    ws.row_dimensions[r].height = 30
+
+MAIN_COLOR = "2E4057"
+PLAN_COLOR = "1A5276"
+
+try:
+    print("Connecting to Odoo...")
+    models, uid = oc.connect()
+    print("Connected!\n")
+
+    now   = datetime.now(timezone.utc)
+    start = np.datetime64(now.strftime('%Y-%m'), 'M') - HISTORY_MONTHS   # current month is partial — left out
+    month_labels = [str(start + i) for i in range(HISTORY_MONTHS)]
+
+    # --- Finished goods: everything with a manufacturing BOM + the plan products ---
+    index = bix.load(models, uid)
+    names = {pid: (p[0], p[1]) for pid, p in index['products'].items()}
+    plan_prods = oc.execute(models, uid, 'product.product', 'search_read',
+        [[['default_code', 'in', list(MONTHLY_PLAN)]]], {'fields': ['default_code', 'name']})
+    for p in plan_prods:
+        names[p['id']] = (p['default_code'], p['name'])
+    fin = {pid for pid, p in index['products'].items() if p[2] == 'normal'} | {p['id'] for p in plan_prods}
+    plan_ids = {p['id'] for p in plan_prods}
+    print(f"Finished goods in scope: {len(fin)}\n")
+
+    print(f"Fetching confirmed sales since {month_labels[0]}...")
+    hist = fc.fetch_sales(models, uid, fin, start.astype(datetime))
+    print(f"  → {len(hist['qty'])} SO lines")
+    ids, Y = dm.period_matrix(hist, fin, start, HISTORY_MONTHS, unit='M')
+
+    t0  = time.perf_counter()
+    res = fc.forecast(Y)
+    print(f"  → {len(ids)} products × {HISTORY_MONTHS} months fitted in {(time.perf_counter() - t0) * 1000:.1f} ms\n")
+
+    avg12 = Y[:, -12:].mean(axis=1)
+    avg3  = Y[:, -3:].mean(axis=1)
+    rows  = []
+    for i, pid in enumerate(ids.tolist()):
+        ref, name = names.get(pid, ('', ''))
+        plan  = MONTHLY_PLAN.get(ref) if pid in plan_ids else None
+        f     = float(res['forecast'][i])
+        if plan is None and f <= 0:
+            continue
+        has_hist = bool((Y[i] > 0).any())
+        gap      = (plan - f) / f * 100 if plan is not None and f > 0 else None
+        if plan is None:            status = ''
+        elif not has_hist:          status = "No sales history"
+        elif gap > GAP_PCT:         status = "▲ Plan above forecast"
+        elif gap < -GAP_PCT:        status = "▼ Plan below forecast"
+        else:                       status = "✅ In line"
+        rows.append({
+            'i': i, 'ref': ref, 'name': name, 'plan': plan, 'forecast': f, 'gap': gap, 'status': status,
+            'method': str(res['method'][i]) if has_hist else '', 'alpha': float(res['alpha'][i]),
+            'adi': float(res['adi'][i]), 'cv2': float(res['cv2'][i]),
+            'avg12': float(avg12[i]), 'avg3': float(avg3[i]), 'has_hist': has_hist,
+        })
+
+    # ================================================================
+    # BUILD EXCEL
+    # ================================================================
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    # ================================================================
+    # SHEET 1 — FORECAST VS PLAN
+    # ================================================================
+    HEAD = ["Ref", "Product", "Method", "α", "ADI\n(months)", "CV²", "Avg / mo\n(12 mo)", "Avg / mo\n(3 mo)",
+            "Forecast\n/ mo", "Plan\n/ mo", "Plan −\nForecast", "Gap %", "Status"]
+    ncols = len(HEAD)
+    ws = wb.create_sheet("📈 Forecast vs Plan")
+    ws.column_dimensions["A"].width = 11
+    ws.column_dimensions["B"].width = 48
+    for i in range(3, ncols):
+        ws.column_dimensions[get_column_letter(i)].width = 11
+    ws.column_dimensions[get_column_letter(ncols)].width = 22
+
+    ws.append(["Sales Forecast vs Monthly Production Plan"])
+    ws.merge_cells(f"A1:{get_column_letter(ncols)}1")
+    ws["A1"].font      = Font(bold=True, size=16, color="FFFFFF")
+    ws["A1"].fill      = make_fill(MAIN_COLOR)
+    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws.row_dimensions[1].height = 26
+    ws.append([f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   Confirmed SO lines {month_labels[0]} → "
+               f"{month_labels[-1]}   |   SES for regular demand, Croston (SBA) when ADI > {fc.ADI_CUTOFF}   |   "
+               f"Flag at ±{GAP_PCT}%"])
+    ws.merge_cells(f"A2:{get_column_letter(ncols)}2")
+    ws["A2"].font      = Font(italic=True)
+    ws["A2"].alignment = Alignment(horizontal="center")
+    ws.append([])
+
+    def write_fc_row(r):
+        ws.append([
+            r['ref'], r['name'][:46], r['method'], r['alpha'] if r['method'] else '',
+            round(r['adi'], 2) if np.isfinite(r['adi']) else '', round(r['cv2'], 2) if r['method'] else '',
+            round(r['avg12'], 1), round(r['avg3'], 1), round(r['forecast'], 1),
+            r['plan'] if r['plan'] is not None else '',
+            round(r['plan'] - r['forecast'], 1) if r['plan'] is not None else '',
+            f"{r['gap']:+.0f}%" if r['gap'] is not None else '',
+            r['status'],
+        ])
+        s = r['status']
+        fill = "FFB3B3" if s.startswith("▲") else "FFD9B3" if s.startswith("▼") else \
+               "FFF2CC" if s == "No sales history" else "E2EFDA" if s else "F2F2F2"
+        style_row(ws, ws.max_row, ncols, make_fill(fill), left_cols=[1, 2, ncols])
+
+    plan_rows  = sorted([r for r in rows if r['plan'] is not None], key=lambda r: r['ref'])
+    other_rows = sorted([r for r in rows if r['plan'] is None], key=lambda r: -r['forecast'])
+
+    write_section_title(ws, f"  📋  Plan Products ({len(plan_rows)})", PLAN_COLOR, ncols)
+    write_headers(ws, HEAD, PLAN_COLOR)
+    for r in plan_rows:
+        write_fc_row(r)
+    ws.append([])
+    write_section_title(ws, f"  📦  Other Finished Goods with Demand ({len(other_rows)})", MAIN_COLOR, ncols)
+    write_headers(ws, HEAD, MAIN_COLOR)
+    for r in other_rows:
+        write_fc_row(r)
+    ws.freeze_panes = "C4"
+
+    # ================================================================
+    # SHEET 2 — MONTHLY SALES HISTORY
+    # ================================================================
+    ws2 = wb.create_sheet("🗓 Sales History")
+    ncols2 = 2 + HISTORY_MONTHS
+    ws2.column_dimensions["A"].width = 11
+    ws2.column_dimensions["B"].width = 40
+    for i in range(3, ncols2 + 1):
+        ws2.column_dimensions[get_column_letter(i)].width = 8
+    ws2.append([f"Confirmed Sales by Order Month — {month_labels[0]} → {month_labels[-1]}"])
+    ws2.merge_cells(f"A1:{get_column_letter(ncols2)}1")
+    ws2["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws2["A1"].fill      = make_fill(MAIN_COLOR)
+    ws2["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws2.row_dimensions[1].height = 22
+    ws2.append([])
+    write_headers(ws2, ["Ref", "Product"] + month_labels, MAIN_COLOR)
+    for r in plan_rows + [r for r in other_rows if r['has_hist']]:
+        ws2.append([r['ref'], r['name'][:38]] + [int(v) if v == int(v) else round(float(v), 1) for v in Y[r['i']]])
+        style_row(ws2, ws2.max_row, ncols2, make_fill("DDEBF7" if r['plan'] is not None else "F2F2F2"),
+                  left_cols=[1, 2])
+    ws2.freeze_panes = "C4"
+
+    output_file = f"sales_forecast_{now.strftime('%Y%m%d_%H%M')}.xlsx"
+    wb.save(output_file)
+    print(f"✅ Saved: {output_file}")
+
+    print("\n=== PLAN vs FORECAST ===")
+    for r in plan_rows:
+        print(f"  {r['ref']:<10} plan {r['plan']:>6} | forecast {r['forecast']:>7.1f} "
+              f"({r['method'] or '—'}) | {r['status']}")
+    print("=== Done ===")
+
+except Exception as e:
+    import traceback
+    print(f"\nERROR: {e}")
+    traceback.print_exc()
+
+input("\nPress Enter to close...")
@@ -0,0 +1,121 @@
+import odoo_config as cfg
+import odoo_client as oc
+
+# ================================================================
+# INSTALLED BASE — every shipped serial joined to its service events
+# ================================================================
+# All loads are bulk paginated queries; joins are in-memory dict (hash)
+# lookups keyed by lot id — never one query per lot.
+
+
+def _first_by_lot(rows, date_field='create_date'):
+    """lot_id -> (earliest date, count) from records carrying lot_id."""
+    out = {}
+    for r in rows:
+        lot_id = oc.m2o_id(r.get('lot_id'))
+        d      = (r.get(date_field) or '')[:19]
+        if not lot_id or not d:
+            continue
+        if lot_id not in out:
+            out[lot_id] = [d, 0]
+        elif d < out[lot_id][0]:
+            out[lot_id][0] = d
+        out[lot_id][1] += 1
+    return out
+
+
+def load_installed_base(models, uid):
+    """
+    One row per serial that has ever left on a customer delivery:
+      lot_id, serial, product_id, ref, device, batch, produced, delivered, delivery,
+      first_ticket, n_tickets, first_repair, n_repairs   (dates as 'YYYY-MM-DD HH:MM:SS' or '')
+    Tickets/repairs logged before the first delivery are not field failures and are ignored.
+    """
+    print("Loading delivered serials...")
+    deliveries = oc.search_read_all(models, uid, 'stock.move.line',
+        [['lot_id', '!=', False], ['state', '=', 'done'],
+         ['picking_id.picking_type_id.code', '=', 'outgoing']],
+        ['lot_id', 'product_id', 'date', 'picking_id', 'reference']
+    )
+    print(f"  → {len(deliveries)} delivery move lines")
+
+    # First delivery per lot
+    delivered = {}
+    for ml in deliveries:
+        lot_id = oc.m2o_id(ml['lot_id'])
+        if lot_id not in delivered or (ml['date'] or '') < delivered[lot_id]['date']:
+            delivered[lot_id] = ml
+
+    print("Loading production batches...")
+    produced = oc.search_read_all(models, uid, 'stock.move.line',
+        [['lot_id', '!=', False], ['state', '=', 'done'],
+         ['location_id.usage', '=', 'production']],
+        ['lot_id', 'reference', 'date']
+    )
+    batch_by_lot = {}
+    for ml in produced:
+        lot_id = oc.m2o_id(ml['lot_id'])
+        if lot_id not in delivered:
+            continue
+        if lot_id not in batch_by_lot or (ml['date'] or '') < batch_by_lot[lot_id]['date']:
+            batch_by_lot[lot_id] = ml
+    print(f"  → {len(batch_by_lot)} serials traced to a production order")
+
+    lots = oc.read_batched(models, uid, 'stock.production.lot', list(delivered),
+                           ['name', 'product_id', 'create_date'])
+
+    print("Loading tickets and repairs with a serial...")
+    # Same exclusions as the repair report — returns from these customers are not field failures
+    excluded_partner_ids = [p['id'] for p in oc.cached_execute(models, uid, 'res.partner', 'search_read',
+        [[['name', 'in', cfg.REPAIR_EXCLUDED_CUSTOMERS]]], {'fields': ['id', 'name']}
+    )]
+    tickets = oc.search_read_all(models, uid, 'helpdesk.ticket',
+        [['lot_id', '!=', False], ['partner_id', 'not in', excluded_partner_ids]],
+        ['lot_id', 'create_date']
+    )
+    excluded_tag_ids = oc.cached_execute(models, uid, 'repair.tags', 'search',
+        [[['name', 'in', cfg.REPAIR_EXCLUDED_TAGS]]]
+    )
+    repairs = oc.search_read_all(models, uid, 'repair.order',
+        [['lot_id', '!=', False], ['state', '!=', 'cancel'],
+         ['tag_ids', 'not in', excluded_tag_ids], ['partner_id', 'not in', excluded_partner_ids]],
+        ['lot_id', 'create_date']
+    )
+    print(f"  → {len(tickets)} tickets, {len(repairs)} repairs")
+
+    prod_ids = list({oc.m2o_id(ml['product_id']) for ml in delivered.values()})
+    prods    = oc.read_batched(models, uid, 'product.product', prod_ids, ['default_code'])
+    c2_ids   = {pid for pid, p in prods.items() if p.get('default_code') in cfg.C2_PRODUCT_REFS}
+
+    # Only service events on/after the first delivery count
+    ship_date = {lot_id: (ml['date'] or '')[:19] for lot_id, ml in delivered.items()}
+    def in_field(r):
+        shipped = ship_date.get(oc.m2o_id(r['lot_id']))
+        return bool(shipped) and (r.get('create_date') or '') >= shipped
+
+    first_ticket = _first_by_lot([t for t in tickets if in_field(t)])
+    first_repair = _first_by_lot([r for r in repairs if in_field(r)])
+
+    rows = []
+    for lot_id, ml in delivered.items():
+        lot    = lots.get(lot_id, {})
+        pid    = oc.m2o_id(ml['product_id'])
+        batch  = batch_by_lot.get(lot_id, {})
+        ft     = first_ticket.get(lot_id, ['', 0])
+        fr     = first_repair.get(lot_id, ['', 0])
+        rows.append({
+            'lot_id':       lot_id,
+            'serial':       lot.get('name') or ml['lot_id'][1],
+            'product_id':   pid,
+            'ref':          prods.get(pid, {}).get('default_code', '') or '',
+            'device':       'C2' if pid in c2_ids else 'C-100',
+            'batch':        batch.get('reference') or 'Unknown',
+            'produced':     (batch.get('date') or lot.get('create_date') or '')[:19],
+            'delivered':    ship_date[lot_id],
+            'delivery':     ml['picking_id'][1] if ml.get('picking_id') else ml.get('reference', ''),
+            'first_ticket': ft[0],
+            'n_tickets':    ft[1],
+            'first_repair': fr[0],
+            'n_repairs':    fr[1],
+        })
+    return rows
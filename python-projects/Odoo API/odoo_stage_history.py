@@ -0,0 +1,146 @@
+import numpy as np
+import odoo_client as oc
+
+# ================================================================
+# STAGE HISTORY — bulk mail.tracking.value ingestion + dwell times
+# ================================================================
+PERCENTILES     = [50, 75, 90]
+SECONDS_PER_DAY = 86400.0
+MESSAGE_BATCH   = 2000
+
+
+def _tracking_field_column(models, uid):
+    """Column of mail.tracking.value pointing at the tracked field: 'field_id' on Odoo 17+, 'field' before."""
+    cols = oc.execute(models, uid, 'mail.tracking.value', 'fields_get',
+        [['field_id', 'field']], {'attributes': ['type']}
+    )
+    return 'field_id' if 'field_id' in cols else 'field'
+
+
+def fetch_tracking(models, uid, model, field_name, selection=False):
+    """
+    Every tracked change of `field_name` on `model`, as compact columnar arrays.
+    Many2one fields are coded by record id (old/new_value_integer) and `names` maps
+    id → display name. Selection fields are tracked by label, so they are coded by
+    position in the field's selection and `names` maps code → selection key.
+    Returns {'res_id', 'date', 'old', 'new' (int arrays / datetime64), 'names'}.
+    """
+    field_ids = oc.execute(models, uid, 'ir.model.fields', 'search',
+        [[['model', '=', model], ['name', '=', field_name]]]
+    )
+    values = oc.search_read_all(models, uid, 'mail.tracking.value',
+        [[_tracking_field_column(models, uid), 'in', field_ids]],
+        ['mail_message_id', 'old_value_integer', 'new_value_integer',
+         'old_value_char', 'new_value_char']
+    )
+    msg_ids  = list({oc.m2o_id(v['mail_message_id']) for v in values if v.get('mail_message_id')})
+    messages = oc.read_batched(models, uid, 'mail.message', msg_ids,
+                               ['res_id', 'date'], batch_size=MESSAGE_BATCH)
+
+    names, label_code = {}, {}
+    if selection:
+        sel = oc.execute(models, uid, model, 'fields_get',
+            [[field_name]], {'attributes': ['selection']}
+        )[field_name]['selection']
+        for i, (key, label) in enumerate(sel):
+            names[i], label_code[label] = key, i
+
+    def code(val_int, val_char):
+        label = val_char or ''
+        if selection:
+            if label not in label_code:
+                label_code[label] = len(names)
+                names[label_code[label]] = label
+            return label_code[label]
+        if val_int and label:
+            names.setdefault(val_int, label)
+        return val_int or 0
+
+    res_id, dates, old, new = [], [], [], []
+    for v in values:
+        msg = messages.get(oc.m2o_id(v.get('mail_message_id')))
+        if not msg or not msg.get('date'):
+            continue
+        res_id.append(msg['res_id'])
+        dates.append(msg['date'])
+        old.append(code(v.get('old_value_integer'), v.get('old_value_char')))
+        new.append(code(v.get('new_value_integer'), v.get('new_value_char')))
+
+    return {
+        'res_id': np.array(res_id, dtype=np.int32),
+        'date':   oc.to_datetime64(dates),
+        'old':    np.array(old, dtype=np.int32),
+        'new':    np.array(new, dtype=np.int32),
+        'names':  names,
+    }
+
+
+def dwell_segments(hist, rec_ids, created, current, now):
+    """
+    Cut each record's life into (stage, start, end) segments, fully vectorized.
+      rec_ids / created / current — one entry per record (id, create datetime64, current stage code)
+    The first segment runs from create_date in the first change's old stage (or the current
+    stage if it never changed); the last segment is still open and ends at `now`.
+    Returns {'res_id', 'code', 'days', 'open'} arrays, one entry per segment.
+    """
+    rec_ids = np.asarray(rec_ids, dtype=np.int32)
+    created = np.asarray(created, dtype='datetime64[s]')
+    current = np.asarray(current, dtype=np.int32)
+    keep    = ~np.isnat(created)
+    rec_ids, created, current = rec_ids[keep], created[keep], current[keep]
+
+    ev = np.isin(hist['res_id'], rec_ids) & ~np.isnat(hist['date'])
+    ev_res, ev_date = hist['res_id'][ev], hist['date'][ev]
+    ev_old, ev_new  = hist['old'][ev], hist['new'][ev]
+    order = np.lexsort((ev_date, ev_res))
+    ev_res, ev_date, ev_old, ev_new = ev_res[order], ev_date[order], ev_old[order], ev_new[order]
+
+    # Opening stage: old value of the first change, else the current stage
+    first_res, first_idx = np.unique(ev_res, return_index=True)
+    opening = current.copy()
+    if len(first_res):
+        pos       = np.minimum(np.searchsorted(first_res, rec_ids), len(first_res) - 1)
+        has_event = first_res[pos] == rec_ids
+        opening[has_event] = ev_old[first_idx[pos[has_event]]]
+
+    seg_res   = np.concatenate([rec_ids, ev_res])
+    seg_start = np.concatenate([created, ev_date]).astype('int64')
+    seg_code  = np.concatenate([opening, ev_new])
+    seg_kind  = np.concatenate([np.zeros(len(rec_ids), np.int8), np.ones(len(ev_res), np.int8)])
+    order     = np.lexsort((seg_kind, seg_start, seg_res))
+    seg_res, seg_start, seg_code = seg_res[order], seg_start[order], seg_code[order]
+
+    now_s     = np.datetime64(now.replace(tzinfo=None), 's').astype('int64')
+    is_last   = np.append(seg_res[1:] != seg_res[:-1], True)
+    seg_end   = np.where(is_last, now_s, np.append(seg_start[1:], now_s))
+    days      = np.maximum(seg_end - seg_start, 0) / SECONDS_PER_DAY
+
+    return {'res_id': seg_res, 'code': seg_code, 'days': days, 'open': is_last}
+
+
+def dwell_stats(seg, mask=None):
+    """
+    Per-stage dwell distribution. Closed segments feed the percentiles; open
+    segments are counted as "currently in stage" with their median age so far.
+    Returns {code: {'done', 'p50', 'p75', 'p90', 'mean', 'open', 'open_p50'}}.
+    """
+    codes, days, is_open = seg['code'], seg['days'], seg['open']
+    if mask is not None:
+        codes, days, is_open = codes[mask], days[mask], is_open[mask]
+
+    stats = {}
+    for c in np.unique(codes):
+        in_c   = codes == c
+        closed = days[in_c & ~is_open]
+        still  = days[in_c & is_open]
+        pct    = np.percentile(closed, PERCENTILES) if len(closed) else [0.0] * len(PERCENTILES)
+        stats[int(c)] = {
+            'done':     int(len(closed)),
+            'p50':      round(float(pct[0]), 1),
+            'p75':      round(float(pct[1]), 1),
+            'p90':      round(float(pct[2]), 1),
+            'mean':     round(float(closed.mean()), 1) if len(closed) else 0.0,
+            'open':     int(len(still)),
+            'open_p50': round(float(np.median(still)), 1) if len(still) else 0.0,
+        }
+    return stats
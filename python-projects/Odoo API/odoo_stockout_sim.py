@@ -0,0 +1,40 @@
+import numpy as np
+
+# ================================================================
+# STOCKOUT SIMULATION — Monte Carlo over demand and lead time
+# ================================================================
+# Every array is components × paths; there is no Python loop over either.
+DAYS_PER_MONTH = 30.44
+
+
+def simulate(available, monthly_mean, monthly_cv, lead_fixed,
+             lead_days, lead_start, lead_count, paths=10000, seed=None):
+    """
+    Risk of running out before an order placed today is received.
+      available                  — stock + open incoming per component
+      monthly_mean / monthly_cv  — demand rate and its month-to-month variability
+      lead_fixed                 — lead time used when a component has no receipt history
+      lead_days / start / count  — ragged actual lead-time samples (odoo_lead_times.samples)
+    Lead time is bootstrapped from the component's own receipts; demand over the lead
+    time is normal (truncated at 0) with sd = cv · mean · sqrt(lead months).
+    Returns (stockout probability, expected shortage qty) per component.
+    """
+    rng          = np.random.default_rng(seed)
+    available    = np.asarray(available, dtype=np.float64)[:, None]
+    monthly_mean = np.asarray(monthly_mean, dtype=np.float64)[:, None]
+    monthly_cv   = np.asarray(monthly_cv, dtype=np.float64)[:, None]
+    lead_fixed   = np.asarray(lead_fixed, dtype=np.float64)[:, None]
+    n            = len(available)
+
+    if len(lead_days):
+        pick = lead_start[:, None] + (rng.random((n, paths)) * lead_count[:, None]).astype(np.int64)
+        pick = np.minimum(pick, len(lead_days) - 1)
+        lead = np.where(lead_count[:, None] > 0, lead_days[pick], lead_fixed)
+    else:
+        lead = np.broadcast_to(lead_fixed, (n, paths))
+
+    months  = lead / DAYS_PER_MONTH
+    demand  = monthly_mean * months + monthly_cv * monthly_mean * np.sqrt(months) \
+              * rng.standard_normal((n, paths))
+    short   = np.maximum(np.maximum(demand, 0.0) - available, 0.0)
+    return (short > 0).mean(axis=1), short.mean(axis=1)
@@ -1,6 +1,10 @@
 import xmlrpc.client
 import openpyxl
+import numpy as np
 import odoo_config as cfg
+import odoo_client as oc
+import odoo_frames as fr
+import odoo_dataset_export as dx
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from openpyxl.chart import PieChart, Reference
@@ -93,16 +97,14 @@ def add_pie_chart(wb, title, tags_counter, total, period_label, color_hex):
 
     return chart
 
-def count_tags(ticket_list):
-    c = Counter()
-    for t in ticket_list:
-        for tid in t.get('tag_ids', []):
-            c[tag_name_map.get(tid, f'Unknown({tid})')] += 1
-    return c
+def count_tags(mask=None):
+    """Tag name → tickets carrying it, over the rows of the ticket frame where `mask`."""
+    ids, counts = fr.m2m_counts(F, 'tag_ids', mask)
+    return Counter({tag_name_map.get(tid, f'Unknown({tid})'): cnt for tid, cnt in zip(ids.tolist(), counts.tolist())})
 
-def top_tags_table(ws, ticket_list, color, period_label, num_cols=5):
-    total = len(ticket_list)
-    tags  = count_tags(ticket_list)
+def top_tags_table(ws, mask, color, period_label, num_cols=5):
+    total = int(mask.sum())
+    tags  = count_tags(mask)
     write_headers(ws, ["Rank", "Tag", f"# Tickets ({period_label})", f"% of {period_label}", "Visual Bar"], color)
     if tags:
         for rank, (tag, cnt) in enumerate(tags.most_common(TOP_N), 1):
@@ -147,19 +149,19 @@ try:
     d90  = now - timedelta(days=90)
 
     # --- Get teams ---
-    all_teams = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'helpdesk.team', 'search_read',
+    all_teams = oc.cached_execute(models, uid, 'helpdesk.team', 'search_read',
         [[]], {'fields': ['id', 'name']}
     )
     team_map = {t['name']: t['id'] for t in all_teams}
 
     # --- Get tag definitions ---
-    all_tags = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'helpdesk.tag', 'search_read',
+    all_tags = oc.cached_execute(models, uid, 'helpdesk.tag', 'search_read',
         [[]], {'fields': ['id', 'name']}
     )
     tag_name_map = {t['id']: t['name'] for t in all_tags}
 
     # --- Resolve C2 product IDs from internal refs ---
-    c2_products = models.execute_kw(cfg.DB, uid, cfg.API_KEY, 'product.product', 'search_read',
+    c2_products = oc.cached_execute(models, uid, 'product.product', 'search_read',
         [[['default_code', 'in', cfg.C2_PRODUCT_REFS]]],
         {'fields': ['id', 'name', 'default_code']}
     )
@@ -174,39 +176,35 @@ try:
         {'fields': ['id', 'tag_ids', 'create_date', 'team_id', 'stage_id', 'product_id']}
     )
     print(f"  → {len(all_tickets)} total tickets fetched\n")
-
-    # --- Annotate each ticket ---
-    for t in all_tickets:
-        cd = t.get('create_date', '')
-        t['_created']  = datetime.strptime(cd, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc) if cd else None
-        t['_division'] = next((d for d in cfg.DIVISIONS if team_map.get(d) == t['team_id'][0]), 'Unknown') if t.get('team_id') else 'Unknown'
-        t['_stage']    = t['stage_id'][1] if t.get('stage_id') else 'Unknown'
-        t['_is_open']  = t['_stage'] not in cfg.CLOSED_STAGES
-
-        # Device line
-        prod_id        = t['product_id'][0] if t.get('product_id') else None
-        t['_device']   = 'C2' if prod_id in c2_product_ids else 'C-100'
-
-        # Age bucket
-        if t['_created']:
-            age = (now - t['_created']).days
-            t['_age'] = age
-            if age <= 30:   t['_bucket'] = '0-30 days'
-            elif age <= 60: t['_bucket'] = '31-60 days'
-            elif age <= 90: t['_bucket'] = '61-90 days'
-            else:           t['_bucket'] = '90+ days'
-        else:
-            t['_age']    = 0
-            t['_bucket'] = 'Unknown'
-
-    total_all    = len(all_tickets)
-    open_tickets = [t for t in all_tickets if t['_is_open']]
-    total_open   = len(open_tickets)
-    tickets_30   = [t for t in open_tickets if t['_created'] and t['_created'] >= d30]
-    tickets_90   = [t for t in open_tickets if t['_created'] and t['_created'] >= d90]
-    tickets_p30  = [t for t in open_tickets if t['_created'] and d60 <= t['_created'] < d30]
-
-    tags_all = count_tags(all_tickets)
+    dx.export('tickets', all_tickets)
+
+    # --- Columnar view of the tickets: one array per attribute, parsed once ---
+    F = fr.frame(all_tickets, {'team_id': 'm2o', 'stage_id': 'm2o', 'product_id': 'm2o',
+                               'create_date': 'datetime', 'tag_ids': 'm2m'})
+    div_of_team    = {team_map[d]: d for d in reversed(cfg.DIVISIONS) if d in team_map}
+    team_ids, inv  = np.unique(F['team_id_id'], return_inverse=True)
+    F['_division'] = np.array([div_of_team.get(i, 'Unknown') for i in team_ids.tolist()], dtype=str)[inv]
+    codes, cats    = fr.recode(F['stage_id'], F['cats']['stage_id'], {fr.EMPTY: 'Unknown'})
+    F['_stage']    = cats[codes]
+    F['_is_open']  = ~np.isin(F['_stage'], list(cfg.CLOSED_STAGES))
+    F['_device']   = np.where(np.isin(F['product_id_id'], list(c2_product_ids)), 'C2', 'C-100')
+    created        = F['create_date']
+    F['_age']      = fr.age_days(created, now)
+    F['_bucket']   = np.where(np.isnat(created), 'Unknown',
+                              np.array(bucket_order)[np.minimum(fr.bucket(F['_age'], [30, 60, 90]), 3)])
+
+    def since(d):
+        return np.datetime64(d.replace(tzinfo=None), 's')
+    has_date     = ~np.isnat(created)
+    all_rows     = np.ones(F['n'], dtype=bool)
+    total_all    = F['n']
+    open_tickets = F['_is_open']
+    total_open   = int(open_tickets.sum())
+    tickets_30   = open_tickets & has_date & (created >= since(d30))
+    tickets_90   = open_tickets & has_date & (created >= since(d90))
+    tickets_p30  = open_tickets & has_date & (created >= since(d60)) & (created < since(d30))
+
+    tags_all = count_tags(all_rows)
     tags_90d = count_tags(tickets_90)
     tags_30d = count_tags(tickets_30)
 
@@ -225,12 +223,12 @@ try:
     top_trending = sorted(trending.items(), key=lambda x: x[1]['pct_change'], reverse=True)[:TOP_N]
 
     # --- Build slice helper ---
-    # slice_tickets(tickets, division=None, device=None)
-    def sl(tickets, division=None, device=None):
-        r = tickets
-        if division: r = [t for t in r if t['_division'] == division]
-        if device:   r = [t for t in r if t['_device']   == device]
-        return r
+    # sl(mask, division=None, device=None) → row mask narrowed to the segment
+    def sl(mask, division=None, device=None):
+        m = mask.copy()
+        if division: m &= F['_division'] == division
+        if device:   m &= F['_device']   == device
+        return m
 
     # ================================================================
     # BUILD EXCEL
@@ -258,14 +256,14 @@ try:
     ws.merge_cells("A2:G2")
     ws["A2"] = (f"Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC   |   "
                 f"All Tickets: {total_all}   |   Open: {total_open}   |   "
-                f"Open Last 90d: {len(tickets_90)}   |   Open Last 30d: {len(tickets_30)}")
+                f"Open Last 90d: {int(tickets_90.sum())}   |   Open Last 30d: {int(tickets_30.sum())}")
     ws["A2"].font      = Font(italic=True)
     ws["A2"].alignment = Alignment(horizontal="center")
     ws.append([])
 
     # --- TABLE 1: Top 5 Tags All Time ---
     write_section_title(ws, "  📊  Top 5 Tags — All Time (all tickets incl. closed)", MAIN_COLOR, 5)
-    top_tags_table(ws, all_tickets, MAIN_COLOR, "All Time")
+    top_tags_table(ws, all_rows, MAIN_COLOR, "All Time")
 
     # --- TABLE 2: Top 5 Tags Last 90d (open only) ---
     write_section_title(ws, "  📊  Top 5 Tags — Last 90 Days (open tickets only)", "375623", 5)
@@ -279,11 +277,11 @@ try:
     write_section_title(ws, "  ⏱  Ticket Age Distribution — Open Tickets Only", "4A4A4A", 8)
     write_headers(ws, ["Age Bracket", "Total Open", "% of Open", "Americas", "EMEA", "APAC", "C2", "C-100"], "4A4A4A")
     for bucket in bucket_order:
-        bt = [t for t in open_tickets if t['_bucket'] == bucket]
-        cnt = len(bt)
+        bt = open_tickets & (F['_bucket'] == bucket)
+        cnt = int(bt.sum())
         pct = round(cnt / total_open * 100, 1) if total_open else 0
-        div_cnts = [len(sl(bt, division=d)) for d in cfg.DIVISIONS]
-        dev_cnts = [len(sl(bt, device=dv)) for dv in cfg.DEVICE_LINES]
+        div_cnts = [int(sl(bt, division=d).sum()) for d in cfg.DIVISIONS]
+        dev_cnts = [int(sl(bt, device=dv).sum()) for dv in cfg.DEVICE_LINES]
         ws.append([bucket, cnt, f"{pct}%"] + div_cnts + dev_cnts)
         style_row(ws, ws.max_row, 8, make_fill(bucket_colors[bucket]), left_cols=[1])
     ws.append([])
@@ -308,10 +306,10 @@ try:
     for div in cfg.DIVISIONS:
         short = div.replace("Support - ", "")
         for device in cfg.DEVICE_LINES:
-            d_all  = len(sl(all_tickets,  division=div, device=device))
-            d_open = len(sl(open_tickets, division=div, device=device))
-            d_90   = len(sl(tickets_90,   division=div, device=device))
-            d_30   = len(sl(tickets_30,   division=div, device=device))
+            d_all  = int(sl(all_rows,     division=div, device=device).sum())
+            d_open = int(sl(open_tickets, division=div, device=device).sum())
+            d_90   = int(sl(tickets_90,   division=div, device=device).sum())
+            d_30   = int(sl(tickets_30,   division=div, device=device).sum())
             pct30  = round(d_30 / d_open * 100, 1) if d_open else 0
             # Top trending tag for this segment
             seg_tags = count_tags(sl(tickets_30, division=div, device=device))
@@ -342,14 +340,14 @@ try:
 
     # Chart 1 — Last 90 days
     if tags_90d:
-        chart_90 = add_pie_chart(wb, f"Top 5 Tags — Last 90 Days ({len(tickets_90)} open tickets)",
-                                 tags_90d, len(tickets_90), "90d", "1F4E79")
+        chart_90 = add_pie_chart(wb, f"Top 5 Tags — Last 90 Days ({int(tickets_90.sum())} open tickets)",
+                                 tags_90d, int(tickets_90.sum()), "90d", "1F4E79")
         ws_charts.add_chart(chart_90, "B4")
 
     # Chart 2 — Last 30 days
     if tags_30d:
-        chart_30 = add_pie_chart(wb, f"Top 5 Tags — Last 30 Days ({len(tickets_30)} open tickets)",
-                                 tags_30d, len(tickets_30), "30d", "7B2C2C")
+        chart_30 = add_pie_chart(wb, f"Top 5 Tags — Last 30 Days ({int(tickets_30.sum())} open tickets)",
+                                 tags_30d, int(tickets_30.sum()), "30d", "7B2C2C")
         ws_charts.add_chart(chart_30, "K4")
 
     # ================================================================
@@ -380,29 +378,29 @@ try:
             seg_open    = sl(open_tickets,  division=div, device=device)
             seg_30      = sl(tickets_30,    division=div, device=device)
             seg_90      = sl(tickets_90,    division=div, device=device)
-            seg_all     = sl(all_tickets,   division=div, device=device)
+            seg_all     = sl(all_rows,      division=div, device=device)
+            n_open      = int(seg_open.sum())
 
-            write_section_title(ws2, f"  {short}  ▸  {device}  ({len(seg_open)} open tickets)", dev_color, 6)
+            write_section_title(ws2, f"  {short}  ▸  {device}  ({n_open} open tickets)", dev_color, 6)
 
             # All time
-            write_section_title(ws2, f"    All Time ({len(seg_all)} tickets incl. closed)", div_color, 6)
+            write_section_title(ws2, f"    All Time ({int(seg_all.sum())} tickets incl. closed)", div_color, 6)
             top_tags_table(ws2, seg_all, div_color, "All Time", num_cols=5)
 
             # Last 90d
-            write_section_title(ws2, f"    Last 90 Days ({len(seg_90)} open tickets)", div_color, 6)
+            write_section_title(ws2, f"    Last 90 Days ({int(seg_90.sum())} open tickets)", div_color, 6)
             top_tags_table(ws2, seg_90, div_color, "90d", num_cols=5)
 
             # Last 30d
-            write_section_title(ws2, f"    Last 30 Days ({len(seg_30)} open tickets)", div_color, 6)
+            write_section_title(ws2, f"    Last 30 Days ({int(seg_30.sum())} open tickets)", div_color, 6)
             top_tags_table(ws2, seg_30, div_color, "30d", num_cols=5)
 
             # Age buckets for this segment
-            write_section_title(ws2, f"    Age Distribution ({len(seg_open)} open tickets)", div_color, 5)
+            write_section_title(ws2, f"    Age Distribution ({n_open} open tickets)", div_color, 5)
             write_headers(ws2, ["Age Bracket", "# Tickets", "% of Segment", "Visual Bar", ""], div_color)
             for bucket in bucket_order:
-                bt  = [t for t in seg_open if t['_bucket'] == bucket]
-                cnt = len(bt)
-                pct = round(cnt / len(seg_open) * 100, 1) if seg_open else 0
+                cnt = int((seg_open & (F['_bucket'] == bucket)).sum())
+                pct = round(cnt / n_open * 100, 1) if n_open else 0
                 ws2.append([bucket, cnt, f"{pct}%", make_bar(pct), ""])
                 style_row(ws2, ws2.max_row, 5, make_fill(bucket_colors[bucket]), left_cols=[1])
             ws2.append([])
@@ -428,17 +426,15 @@ try:
     ws3.append([])
 
     write_headers(ws3, ["Tag", "Americas C2", "Americas C-100", "EMEA C2", "EMEA C-100", "APAC C2", "APAC C-100", "Global Total", "Trend (30d)"], MAIN_COLOR)
+    seg_tags = [count_tags(sl(all_rows, division=div, device=device))
+                for div in cfg.DIVISIONS for device in cfg.DEVICE_LINES]
     alt = False
     for tag, global_cnt in tags_all.most_common(10):
         row_fill = make_fill("EBF3FB") if alt else make_fill("FFFFFF")
         alt = not alt
         trend_data = trending.get(tag, {})
         t_str = f"🔺 +{trend_data['pct_change']}%" if trend_data else "—"
-        row = [tag]
-        for div in cfg.DIVISIONS:
-            for device in cfg.DEVICE_LINES:
-                row.append(count_tags(sl(all_tickets, division=div, device=device)).get(tag, 0))
-        row += [global_cnt, t_str]
+        row = [tag] + [c.get(tag, 0) for c in seg_tags] + [global_cnt, t_str]
         ws3.append(row)
         style_row(ws3, ws3.max_row, 9, row_fill, left_cols=[1])
 
@@ -446,6 +442,7 @@ try:
     output_file = f"tag_analysis_{now.strftime('%Y%m%d_%H%M')}.xlsx"
     wb.save(output_file)
     print(f"\nExcel report saved: {output_file}")
+    print(oc.cache_summary())
     print("=== Done ===")
 
 except Exception as e:
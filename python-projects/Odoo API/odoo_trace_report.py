@@ -0,0 +1,153 @@
+import argparse
+import openpyxl
+import odoo_client as oc
+import odoo_traceability as tr
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from datetime import datetime, timezone
+
+# ================================================================
+# Recall / traceability report
+#   python odoo_trace_report.py --lot 2401-0042
+#   python odoo_trace_report.py --product 102069 --so S04521
+#   python odoo_trace_report.py --po P01234 --hops 4
+# Filters combine (AND). With no arguments, asks for a lot number.
+# ================================================================
+parser = argparse.ArgumentParser(description="Lot genealogy and recall scope")
+parser.add_argument('--lot',     help="Lot / serial number")
+parser.add_argument('--product', help="Product internal reference")
+parser.add_argument('--so',      help="Sales order (e.g. S04521)")
+parser.add_argument('--po',      help="Purchase order (e.g. P01234)")
+parser.add_argument('--hops',    type=int, default=tr.MAX_HOPS, help="Max BOM levels to walk")
+args = parser.parse_args()
+
+def make_fill(hex_): return PatternFill("solid", fgColor=hex_)
+def tb():
+    s = Side(style='thin')
+    return Border(left=s, right=s, top=s, bottom=s)
+
+MAIN = "2E4057"
+UP   = "1A5276"
+DOWN = "7B241C"
+
+def make_sheet(wb, title, heading, color, headers, widths):
+    ws = wb.create_sheet(title)
+    for i, w in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = w
+    n = len(headers)
+    ws.merge_cells(f"A1:{get_column_letter(n)}1")
+    ws["A1"] = heading
+    ws["A1"].font      = Font(bold=True, size=14, color="FFFFFF")
+    ws["A1"].fill      = make_fill(color)
+    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
+    ws.row_dimensions[1].height = 24
+    ws.merge_cells(f"A2:{get_column_letter(n)}2")
+    ws["A2"] = f"Query: {query}  |  Generated: {now.strftime('%Y-%m-%d %H:%M')} UTC"
+    ws["A2"].font      = Font(italic=True, size=9)
+    ws["A2"].alignment = Alignment(horizontal="center")
+    for i, h in enumerate(headers, 1):
+        c = ws.cell(row=3, column=i, value=h)
+        c.font      = Font(bold=True, color="FFFFFF", size=10)
+        c.fill      = make_fill(color)
+        c.alignment = Alignment(horizontal="center", vertical="center")
+        c.border    = tb()
+    ws.row_dimensions[3].height = 20
+    ws.freeze_panes = "A4"
+    return ws
+
+def write_row(ws, values, fill, left_cols):
+    ws.append(values)
+    rn = ws.max_row
+    for col in range(1, len(values) + 1):
+        c = ws.cell(rn, col)
+        c.fill      = fill
+        c.border    = tb()
+        c.alignment = Alignment(horizontal="left" if col in left_cols else "center", vertical="center")
+
+def lot_rows(index, dist, direction):
+    """Lots reached by the walk with hop distance and their neighbours toward the seeds."""
+    back = 'down' if direction == 'up' else 'up'
+    rows = []
+    for lot_id, hops in sorted(dist.items(), key=lambda x: (x[1], index['lots'].get(x[0], {}).get('name', ''))):
+        if hops == 0:
+            continue
+        info = index['lots'].get(lot_id, {})
+        via  = sorted(index['lots'].get(l, {}).get('name', '') for l in index[back].get(lot_id, ()) if l in dist)
+        rows.append([hops, info.get('name', ''), info.get('product', ''), ", ".join(via)])
+    return rows
+
+try:
+    if not any([args.lot, args.product, args.so, args.po]):
+        args.lot = input("Lot / serial number to trace: ").strip()
+
+    query = "  ".join(f"{k.upper()}={v}" for k, v in
+                      [('lot', args.lot), ('product', args.product), ('so', args.so), ('po', args.po)] if v)
+    now   = datetime.now(timezone.utc)
+
+    print("Connecting to Odoo...")
+    models, uid = oc.connect()
+    print("Connected!\n")
+
+    index = tr.new_index()
+    seeds = tr.seed_lots(models, uid, index, lot=args.lot, product=args.product, so=args.so, po=args.po)
+    print(f"Seed lots: {len(seeds)}")
+    if not seeds:
+        raise SystemExit(f"No lots found for {query}")
+
+    print("Walking upstream (components)...")
+    up   = tr.expand(models, uid, index, seeds, 'up',   max_hops=args.hops)
+    print(f"  → {len(up) - len(seeds)} component lots")
+    print("Walking downstream (where consumed)...")
+    down = tr.expand(models, uid, index, seeds, 'down', max_hops=args.hops)
+    print(f"  → {len(down) - len(seeds)} finished lots")
+
+    print("Loading customer deliveries...")
+    shipped = tr.deliveries(models, uid, set(down))
+    print(f"  → {len(shipped)} delivery lines")
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    # --- Seeds ---
+    ws = make_sheet(wb, "Seed Lots", f"Traced Lots — {len(seeds)}", MAIN,
+                    ["Serial / Lot", "Product", "# Components", "# Used In"], [22, 45, 14, 14])
+    for lot_id in sorted(seeds, key=lambda l: index['lots'][l]['name']):
+        info = index['lots'][lot_id]
+        write_row(ws, [info['name'], info['product'], len(index['up'].get(lot_id, ())),
+                       len(index['down'].get(lot_id, ()))], make_fill("DDEBF7"), [1, 2])
+
+    # --- Upstream ---
+    ws = make_sheet(wb, "Upstream Components", f"Component Lots — {len(up) - len(seeds)}", UP,
+                    ["Level", "Serial / Lot", "Product", "Consumed Into"], [8, 22, 45, 40])
+    for r in lot_rows(index, up, 'up'):
+        write_row(ws, r, make_fill("DDEBF7" if r[0] == 1 else "F2F2F2"), [2, 3, 4])
+
+    # --- Downstream ---
+    ws = make_sheet(wb, "Downstream Lots", f"Affected Finished Lots — {len(down) - len(seeds)}", DOWN,
+                    ["Level", "Serial / Lot", "Product", "Made From"], [8, 22, 45, 40])
+    for r in lot_rows(index, down, 'down'):
+        write_row(ws, r, make_fill("FCE4D6" if r[0] == 1 else "F2F2F2"), [2, 3, 4])
+
+    # --- Recall scope ---
+    customers = {oc.m2o_id(ml.get('picking_partner_id')) for ml in shipped if ml.get('picking_partner_id')}
+    ws = make_sheet(wb, "Customer Deliveries",
+                    f"Recall Scope — {len(shipped)} deliveries to {len(customers)} customers", DOWN,
+                    ["Customer", "Serial / Lot", "Product", "Delivery", "Origin", "Date", "Level"],
+                    [35, 22, 45, 20, 14, 12, 8])
+    for ml in sorted(shipped, key=lambda m: ((m['picking_partner_id'] or [0, ''])[1], m['date'] or '')):
+        write_row(ws, [(ml['picking_partner_id'] or [0, ''])[1], ml['lot_id'][1],
+                       ml['product_id'][1] if ml.get('product_id') else '', ml.get('reference') or '',
+                       ml.get('origin') or '', (ml['date'] or '')[:10], down.get(oc.m2o_id(ml['lot_id']), 0)],
+                  make_fill("FFF2CC"), [1, 2, 3, 4])
+
+    output = f"trace_{now.strftime('%Y%m%d_%H%M')}.xlsx"
+    wb.save(output)
+    print(f"\n✅ Saved: {output}")
+
+except SystemExit as e:
+    print(e)
+except Exception as e:
+    import traceback
+    traceback.print_exc()
+
+input("\nPress Enter to close...")
@@ -0,0 +1,102 @@
+import odoo_client as oc
+from collections import defaultdict, deque
+
+# ================================================================
+# LOT GENEALOGY — batched BFS over stock.move.line produce/consume links
+# ================================================================
+# Edges live in an in-memory adjacency index:
+#   index['up'][lot]   = component lots consumed to make `lot`
+#   index['down'][lot] = lots that `lot` was consumed into
+# Each hop level costs one search_read for the whole frontier plus one
+# batched read of the linked lines — never one query per lot.
+MAX_HOPS = 10
+LINK_FIELD = {'up': 'consume_line_ids', 'down': 'produce_line_ids'}
+
+
+def new_index():
+    return {
+        'up':       defaultdict(set),
+        'down':     defaultdict(set),
+        'lots':     {},                   # lot_id -> {'name', 'product'}
+        'expanded': {'up': set(), 'down': set()},
+    }
+
+
+def _remember(index, ml):
+    lot_id = oc.m2o_id(ml.get('lot_id'))
+    if lot_id and lot_id not in index['lots']:
+        index['lots'][lot_id] = {
+            'name':    ml['lot_id'][1],
+            'product': ml['product_id'][1] if ml.get('product_id') else '',
+        }
+    return lot_id
+
+
+def seed_lots(models, uid, index, lot=None, product=None, so=None, po=None):
+    """Resolve any of lot name / product ref / SO name / PO name to a set of lot ids."""
+    domain = [['lot_id', '!=', False]]
+    if lot:     domain.append(['lot_id.name', '=', lot])
+    if product: domain.append(['product_id.default_code', '=', product])
+    if so:      domain.append(['picking_id.sale_id.name', '=', so])
+    if po:      domain.append(['picking_id.purchase_id.name', '=', po])
+    if len(domain) == 1:
+        return set()
+    lines = oc.search_read_all(models, uid, 'stock.move.line', domain, ['lot_id', 'product_id'])
+    return {_remember(index, ml) for ml in lines}
+
+
+def expand(models, uid, index, seeds, direction, max_hops=MAX_HOPS):
+    """
+    Breadth-first walk from `seeds` in one direction ('up' = components,
+    'down' = where-used / finished lots), filling the adjacency index.
+    Lots already expanded in that direction are served from the index.
+    """
+    link     = LINK_FIELD[direction]
+    reverse  = 'down' if direction == 'up' else 'up'
+    done     = index['expanded'][direction]
+    frontier = set(seeds) - done
+    hops     = 0
+    while frontier and hops < max_hops:
+        lines = oc.search_read_all(models, uid, 'stock.move.line',
+            [['lot_id', 'in', list(frontier)], [link, '!=', False]],
+            ['lot_id', 'product_id', link]
+        )
+        linked_ids = {lid for ml in lines for lid in ml[link]}
+        linked     = oc.read_batched(models, uid, 'stock.move.line', linked_ids,
+                                     ['lot_id', 'product_id'], batch_size=1000)
+        for ml in lines:
+            src = _remember(index, ml)
+            for lid in ml[link]:
+                dst = _remember(index, linked.get(lid, {}))
+                if dst and dst != src:
+                    index[direction][src].add(dst)
+                    index[reverse][dst].add(src)
+        done |= frontier
+        frontier = {dst for src in frontier for dst in index[direction].get(src, ())} - done
+        hops += 1
+    # Walk whatever is already indexed (cheap, in memory) for the final answer
+    return reach(index, seeds, direction)
+
+
+def reach(index, seeds, direction):
+    """All lots reachable from seeds in the index → {lot_id: hop distance}."""
+    dist  = {s: 0 for s in seeds}
+    queue = deque(seeds)
+    while queue:
+        cur = queue.popleft()
+        for nxt in index[direction].get(cur, ()):
+            if nxt not in dist:
+                dist[nxt] = dist[cur] + 1
+                queue.append(nxt)
+    return dist
+
+
+def deliveries(models, uid, lot_ids):
+    """Every done customer delivery of the given lots (recall scope)."""
+    if not lot_ids:
+        return []
+    return oc.search_read_all(models, uid, 'stock.move.line',
+        [['lot_id', 'in', list(lot_ids)], ['state', '=', 'done'],
+         ['picking_id.picking_type_id.code', '=', 'outgoing']],
+        ['lot_id', 'product_id', 'date', 'reference', 'picking_partner_id', 'origin']
+    )
@@ -0,0 +1,57 @@
+import numpy as np
+
+# ================================================================
+# VENDOR / PRICE-BREAK OPTIMIZER
+# ================================================================
+# Every supplierinfo row is a tier: (vendor, min qty, unit price, lead time).
+# For each component the cheapest feasible tier is picked in one vectorized
+# pass over all tiers of all components (sort + first-per-group).
+LANDED_COST_PCT     = 0.05   # freight / duty / handling on top of the unit price
+CARRYING_RATE       = 0.20   # annual cost of holding stock bought beyond the need
+MAX_COVERAGE_MONTHS = 12     # tiers that leave more on hand are used only when nothing else fits
+DAYS_PER_MONTH      = 30.44
+
+
+def landed_cost(qty, price, need, monthly):
+    """
+    Purchase cost + landed cost + carrying cost of the excess over `need`
+    (excess is drawn down linearly at `monthly`, so it is held half its duration on average).
+    """
+    qty, price, need, monthly = (np.asarray(a, dtype=np.float64) for a in (qty, price, need, monthly))
+    excess = np.maximum(qty - need, 0.0)
+    months = np.where(monthly > 0, excess / np.where(monthly > 0, monthly, 1.0), 0.0)
+    return qty * price * (1 + LANDED_COST_PCT) + excess * price * CARRYING_RATE / 12 * months / 2
+
+
+def optimize(tier_comp, tier_price, tier_moq, tier_delay, need, monthly, available, round_to):
+    """
+    tier_*           — one entry per supplierinfo tier; tier_comp = row index of its component
+    need / monthly / available — one entry per component (need = qty to reach the coverage target)
+    Constraints: order qty ≥ need and ≥ tier min qty (rounded up to round_to); the vendor must
+    deliver before stock runs out (if no vendor can, the fastest ones are allowed); tiers that
+    overshoot MAX_COVERAGE_MONTHS rank after all that do not.
+    Returns (best tier index per component, -1 when none; order qty; landed cost) per tier.
+    """
+    need      = np.asarray(need, dtype=np.float64)
+    monthly   = np.asarray(monthly, dtype=np.float64)
+    available = np.asarray(available, dtype=np.float64)
+    tier_comp = np.asarray(tier_comp, dtype=np.int64)
+    delay     = np.asarray(tier_delay, dtype=np.float64)
+
+    need_t = need[tier_comp]
+    mon_t  = monthly[tier_comp]
+    qty    = np.ceil(np.maximum(need_t, tier_moq) / round_to) * round_to
+    cost   = landed_cost(qty, tier_price, need_t, mon_t)
+
+    days_left = np.where(monthly > 0, available / np.where(monthly > 0, monthly, 1.0) * DAYS_PER_MONTH, np.inf)
+    late      = delay > days_left[tier_comp]
+    over      = (mon_t > 0) & ((available[tier_comp] + qty) / np.where(mon_t > 0, mon_t, 1.0) > MAX_COVERAGE_MONTHS)
+    priced    = np.asarray(tier_price) > 0
+
+    # Primary key last: component, on-time first (late ones by speed), priced, within coverage cap, cost
+    order = np.lexsort((cost, over, ~priced, np.where(late, delay, 0.0), late, tier_comp))
+    comps, first = np.unique(tier_comp[order], return_index=True)
+    best = np.full(len(need), -1, dtype=np.int64)
+    best[comps] = order[first]
+    best[need <= 0] = -1
+    return best, qty, cost
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import odoo_client as oc
+import odoo_dataset_export as dx
+
+
+def _export(monkeypatch, tmp_path, rows, key):
+    monkeypatch.setattr(dx, 'ENABLED', True)
+    monkeypatch.setattr(dx, 'FORMAT', 'npy')
+    monkeypatch.chdir(tmp_path)
+    dx.export('quants', rows, key=key)
+    return dx.load('quants', f"{dx._script()}.{key}")
+
+
+def test_records_record_fetched_columns(monkeypatch, tmp_path):
+    rows = [oc.Quant.decode({'id': 1, 'product_id': [11, 'P1'], 'quantity': 2.0, 'reserved_quantity': 1.0})]
+    F    = _export(monkeypatch, tmp_path, rows, 'rec')
+    assert F['fetched'] == ['product_id', 'quantity', 'reserved_quantity']
+    assert F['named'] == []          # Quant keeps the product id only
+    assert list(F['product_id_id']) == [11]
+
+
+def test_dicts_record_fetched_columns(monkeypatch, tmp_path):
+    rows = [{'id': 5, 'product_id': [7, 'Seven'], 'quantity': 1.0}]
+    F    = _export(monkeypatch, tmp_path, rows, 'dict')
+    assert F['fetched'] == ['product_id', 'quantity']
+    assert F['named'] == ['product_id']
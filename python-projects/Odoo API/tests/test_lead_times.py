@@ -0,0 +1,23 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import odoo_lead_times as lt
+
+
+def test_percentiles_match_numpy_per_group():
+    rng   = np.random.default_rng(7)
+    store = {'product_id': rng.integers(1, 40, 2000).astype(np.int32),
+             'days':       rng.integers(0, 90, 2000).astype(np.int16)}
+    store['product_id'][0] = 999          # a group of one
+    st = lt.percentiles(store, 'product_id')
+    for i, pid in enumerate(st['ids']):
+        days = store['days'][store['product_id'] == pid]
+        assert st['n'][i] == len(days)
+        assert np.allclose([st['p50'][i], st['p90'][i]], np.percentile(days, [50, 90]))
+
+
+def test_percentiles_on_empty_store():
+    st = lt.percentiles({'product_id': np.zeros(0, np.int32), 'days': np.zeros(0, np.int16)}, 'product_id')
+    assert len(st['ids']) == len(st['p50']) == len(st['p90']) == 0
@@ -0,0 +1,30 @@
+import os
+import sys
+import numpy as np
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import odoo_price_history as ph
+
+
+def test_stats_on_empty_store():
+    store = ph.load('/nonexistent/price_history_store.npz')
+    st    = ph.stats(store, np.zeros(0), date(2026, 1, 1))
+    assert set(st) == {'ids', 'last', 'avg_12m', 'min', 'max', 'slope', 'n_12m'}
+    assert all(len(v) == 0 for v in st.values())
+
+
+def test_stats_last_and_range():
+    store = {
+        'line_id':    np.array([1, 2, 3], dtype=np.int32),
+        'product_id': np.array([7, 7, 9], dtype=np.int32),
+        'date':       np.array(['2025-06-01', '2025-12-01', '2025-09-01'], dtype='datetime64[s]'),
+        'price':      np.array([10.0, 12.0, 5.0]),
+        'qty':        np.array([1.0, 1.0, 1.0]),
+        'currency':   np.array(['USD'] * 3, dtype='<U3'),
+        'po_name':    np.array(['P1', 'P2', 'P3'], dtype='<U24'),
+    }
+    st = ph.stats(store, store['price'], date(2026, 1, 1))
+    assert st['ids'].tolist() == [7, 9]
+    assert st['last'].tolist() == [1, 2]
+    assert st['min'].tolist() == [10.0, 5.0] and st['max'].tolist() == [12.0, 5.0]